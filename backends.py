@@ -0,0 +1,162 @@
+import functools
+
+import numpy as np
+
+from ram_snapshot import (WRAM_START, WRAM_END, MEM_PARTY_COUNT, MEM_PARTY_MONS, MEM_PARTY_NICKS,
+                          MEM_MAP_ID, MEM_X_COORD, MEM_Y_COORD)
+
+# An emulator backend is a callable (rom_path, headless) -> emulator, where
+# the emulator exposes the slice of PyBoy's API NuzlockeEnv uses: tick(),
+# button_press/release(), memory[addr], screen.ndarray, load_state/save_state,
+# hook_register(), set_emulation_speed() and stop().
+
+# --- REPLAY CONFIG ---
+FRAME_SHAPE = (144, 160, 4)
+SAMPLE_STRIDE = 32   # Emulated frames per recorded RAM/frame sample (one agent step)
+
+
+def pyboy_backend(rom_path, headless):
+    """The real emulator. Headless = no window and uncapped speed."""
+    from pyboy import PyBoy
+    if headless:
+        pyboy = PyBoy(rom_path, window="null")
+        pyboy.set_emulation_speed(0)
+    else:
+        pyboy = PyBoy(rom_path, window="SDL2")
+        pyboy.set_emulation_speed(1)
+    return pyboy
+
+
+def replay_backend(recording, rom_path=None, headless=True):
+    """ReplayEmulator over a recording dict or .npz path (rom_path is ignored)."""
+    if isinstance(recording, str):
+        recording = load_recording(recording)
+    return ReplayEmulator(recording)
+
+
+def replay(recording_path):
+    """Picklable backend factory, e.g. NuzlockeEnv(..., backend=replay('run.npz'))."""
+    return functools.partial(replay_backend, recording_path)
+
+
+class _ReplayMemory:
+    def __init__(self):
+        self.wram = bytes(WRAM_END - WRAM_START)
+
+    def __getitem__(self, addr):
+        if isinstance(addr, slice):   # Like PyBoy: a list of ints (RamSnapshot reads spans this way)
+            return [self[a] for a in range(addr.start, addr.stop, addr.step or 1)]
+        if WRAM_START <= addr < WRAM_END:
+            return self.wram[addr - WRAM_START]
+        return 0
+
+
+class _ReplayScreen:
+    def __init__(self, frame):
+        self.ndarray = frame
+
+
+class ReplayEmulator:
+    """
+    Stand-in emulator that plays back recorded WRAM and screen samples.
+
+    Every SAMPLE_STRIDE ticked frames moves on to the next sample (looping),
+    so the env's RAM reads, event diffs and renders see real game data
+    without the ROM. Buttons are accepted and ignored; a savestate is just
+    the playback position.
+    """
+
+    def __init__(self, recording):
+        self.ram = recording["ram"]
+        self.frames = recording["frames"]
+        self.stride = int(recording.get("stride", SAMPLE_STRIDE))
+        self.memory = _ReplayMemory()
+        self.screen = _ReplayScreen(self.frames[0])
+        self.frame_count = 0
+        self.pressed = set()
+        self._sample = -1
+        self._seek(0)
+
+    def _seek(self, frame_count):
+        self.frame_count = frame_count
+        sample = frame_count // self.stride
+        if sample != self._sample:
+            self._sample = sample
+            self.memory.wram = self.ram[sample % len(self.ram)].tobytes()
+            self.screen.ndarray = self.frames[sample % len(self.frames)]
+
+    def tick(self, count=1, render=True):
+        self._seek(self.frame_count + count)
+        return True
+
+    def button_press(self, button):
+        self.pressed.add(button)
+
+    def button_release(self, button):
+        self.pressed.discard(button)
+
+    def set_emulation_speed(self, speed):
+        pass
+
+    def hook_register(self, bank, addr, callback, context):
+        raise ValueError(f"Symbol not found: {addr}")  # Same as PyBoy without a .sym
+
+    def save_state(self, f):
+        f.write(int(self.frame_count).to_bytes(8, "little"))
+
+    def load_state(self, f):
+        data = f.read(8)
+        self._sample = -1
+        self._seek(int.from_bytes(data, "little") if data else 0)
+
+    def stop(self, save=True):
+        pass
+
+
+# --- RECORDINGS ---
+def save_recording(path, recording):
+    np.savez_compressed(path, **recording)
+
+
+def load_recording(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def record_session(env, steps, rng=None):
+    """Samples WRAM and the screen once per step while a live env plays random buttons."""
+    rng = rng if rng is not None else np.random.default_rng()
+    ram = np.zeros((steps, WRAM_END - WRAM_START), dtype=np.uint8)
+    frames = np.zeros((steps,) + FRAME_SHAPE, dtype=np.uint8)
+    mem = env.pyboy.memory
+    for i in range(steps):
+        env.step(int(rng.integers(env.action_space.n)))
+        ram[i] = [mem[a] for a in range(WRAM_START, WRAM_END)]
+        frames[i] = env.screen_buffer()
+    return {"ram": ram, "frames": frames,
+            "stride": np.int64(env.hold_frames + env.cooldown_frames)}
+
+
+def synthetic_recording(samples=256, n_frames=16, seed=0):
+    """
+    ROM-free recording: one Charmander walking around Pallet Town, taking
+    and healing damage and levelling up now and then, over noise frames.
+    """
+    rng = np.random.default_rng(seed)
+    ram = np.zeros((samples, WRAM_END - WRAM_START), dtype=np.uint8)
+    at = lambda addr: addr - WRAM_START
+
+    mon = at(MEM_PARTY_MONS)
+    ram[:, at(MEM_PARTY_COUNT)] = 1
+    ram[:, mon] = 176                                    # Charmander
+    ram[:, mon + 0x21] = 5 + np.arange(samples) // 64    # Level
+    ram[:, mon + 0x23] = 20                              # Max HP (low byte)
+    ram[:, mon + 0x02] = 20 - (np.arange(samples) % 40) // 4
+    ram[:, at(MEM_PARTY_NICKS):at(MEM_PARTY_NICKS) + 11] = [0x82, 0x87, 0x80, 0x91, 0x50] + [0x50] * 6
+    ram[:, at(MEM_MAP_ID)] = np.where(np.arange(samples) % 128 < 96, 0, 12)
+    ram[:, at(MEM_X_COORD)] = rng.integers(0, 20, samples)
+    ram[:, at(MEM_Y_COORD)] = rng.integers(0, 18, samples)
+
+    frames = rng.integers(0, 256, (n_frames,) + FRAME_SHAPE, dtype=np.uint8)
+    frames[..., 3] = 255
+    return {"ram": ram, "frames": frames, "stride": np.int64(SAMPLE_STRIDE)}
@@ -0,0 +1,72 @@
+"""
+Game-screen blit micro-benchmark: old allocate-per-frame path vs the
+preallocated path used by BroadcastRenderer.
+
+Runs without a ROM or a display (synthetic RGBA framebuffer, dummy SDL driver):
+    python benchmarks/render_blit.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame
+
+from gui_stream import WINDOW_WIDTH, WINDOW_HEIGHT, GAME_SCALE, RECT_GAME
+
+FRAMES = 2000
+
+
+def old_path(screen, framebuffer):
+    # NuzlockeEnv.render() + draw_frame() before the preallocated surfaces
+    raw = np.array(framebuffer, dtype=np.uint8, copy=True, order='C')[:, :, :3]
+    game_surface = pygame.surfarray.make_surface(raw.swapaxes(0, 1))
+    game_surface = pygame.transform.scale(game_surface, (160 * GAME_SCALE, 144 * GAME_SCALE))
+    screen.blit(game_surface, RECT_GAME.topleft)
+
+
+def make_new_path(screen):
+    frame = np.zeros((144, 160, 4), dtype=np.uint8)  # The display's FrameRing read buffer
+    game_source = pygame.image.frombuffer(frame, (160, 144), "RGBX")
+    game_native = pygame.Surface((160, 144), 0, screen)
+    game_target = screen.subsurface(RECT_GAME)
+
+    def new_path(screen, framebuffer):
+        np.copyto(frame, framebuffer)  # FrameRing write + read are plain RGBA memcpys
+        game_native.blit(game_source, (0, 0))
+        pygame.transform.scale(game_native, RECT_GAME.size, game_target)
+    return new_path
+
+
+def measure(name, draw, screen, framebuffer):
+    for _ in range(50):
+        draw(screen, framebuffer)
+
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        draw(screen, framebuffer)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in range(100):
+        draw(screen, framebuffer)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<8} {FRAMES / elapsed:9.0f} frames/s   {1e6 * elapsed / FRAMES:7.1f} us/frame   peak alloc {peak / 1024:7.1f} KiB")
+    return FRAMES / elapsed
+
+
+if __name__ == "__main__":
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    framebuffer = np.random.default_rng(0).integers(0, 256, (144, 160, 4), dtype=np.uint8)
+
+    before = measure("before", old_path, screen, framebuffer)
+    after = measure("after", make_new_path(screen), screen, framebuffer)
+    print(f"speedup  {after / before:.2f}x")
+    pygame.quit()
@@ -0,0 +1,253 @@
+"""
+Env / render benchmark suite. Needs no ROM and no display: NuzlockeEnv runs
+on the replay backend (a recorded or synthetic RAM + frame trace) and the
+broadcast renderer draws to a dummy SDL surface.
+
+    python benchmarks/suite.py                         # synthetic trace
+    python benchmarks/suite.py --recording run.npz     # trace from backends.record_session()
+    python benchmarks/suite.py --only env_step --baseline benchmarks/results/abc1234.json
+
+Results go to benchmarks/results/<commit>.json so runs can be diffed
+across commits.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from backends import ReplayEmulator, replay, save_recording, load_recording, synthetic_recording
+from nuzlocke_env import NuzlockeEnv
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+ALLOC_STEPS = 100   # Steps traced by tracemalloc (separate pass; tracing skews timings)
+
+
+def measure(step, steps, frames=None):
+    """Runs step() steps times. frames() -> emulated frames so far, if it applies."""
+    for _ in range(min(50, steps)):
+        step()
+
+    start_frames = frames() if frames else 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        step()
+    elapsed = time.perf_counter() - start
+    result = {"steps_per_sec": steps / elapsed, "us_per_step": 1e6 * elapsed / steps}
+    if frames:
+        result["frames_per_sec"] = (frames() - start_frames) / elapsed
+
+    tracemalloc.start()
+    for _ in range(ALLOC_STEPS):
+        step()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result["alloc_peak_kib"] = peak / 1024
+    return result
+
+
+# --- CASES ---
+def make_env(ctx, **kwargs):
+    return NuzlockeEnv(None, ctx["state"], backend=replay(ctx["recording"]), **kwargs)
+
+
+def stepper(env):
+    actions = iter(np.random.default_rng(0).integers(0, 8, 1 << 20).tolist())
+    return lambda: env.step(next(actions))
+
+
+def case_env_step_headless(ctx, steps):
+    env = make_env(ctx, headless=True)
+    return measure(stepper(env), steps, lambda: env.frame_count)
+
+
+def case_env_step_frameskip_off(ctx, steps):
+    env = make_env(ctx, headless=True, render_every=1)
+    return measure(stepper(env), steps, lambda: env.frame_count)
+
+
+def case_env_step_broadcast(ctx, steps):
+    """GUI cadence: a frame pushed into the FrameRing every RENDER_EVERY frames."""
+    from frame_ring import FrameRing
+    from gui_stream import RENDER_EVERY
+    env = make_env(ctx, headless=False, render_every=RENDER_EVERY)
+    ring = FrameRing(create=True)
+    env.set_render_callback(lambda: ring.write_frame(env.screen_buffer()))
+    try:
+        return measure(stepper(env), steps, lambda: env.frame_count)
+    finally:
+        ring.close()
+
+
+def case_update_data(ctx, steps):
+    env = make_env(ctx)
+
+    def step():
+        env.pyboy.tick(env.hold_frames + env.cooldown_frames, False)
+        env.update_data()
+    return measure(step, steps)
+
+
+def case_render_copy(ctx, steps):
+    env = make_env(ctx)
+    return measure(env.render, steps)
+
+
+def case_render_into(ctx, steps):
+    env = make_env(ctx)
+    out = np.empty((144, 160, 3), dtype=np.uint8)
+    return measure(lambda: env.render(out), steps)
+
+
+def _renderer(ctx):
+    import pygame
+    from gui_stream import BroadcastRenderer, WINDOW_WIDTH, WINDOW_HEIGHT, hud_state, load_fonts
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    env = make_env(ctx)
+    for _ in range(20):
+        env.step(0)
+    frame = np.zeros((144, 160, 4), dtype=np.uint8)
+    renderer = BroadcastRenderer(screen, load_fonts(), frame)
+    return env, frame, renderer, hud_state
+
+
+def case_draw_frame(ctx, steps):
+    """New game frame every draw, HUD unchanged (the common case)."""
+    env, frame, renderer, hud_state = _renderer(ctx)
+    hud = hud_state(env, "BENCH")
+    renderer.draw(hud)
+
+    def step():
+        env.pyboy.tick(2, True)
+        np.copyto(frame, env.screen_buffer())
+        renderer.draw(None, new_frame=True)
+    return measure(step, steps)
+
+
+def case_draw_frame_hud(ctx, steps):
+    """New game frame and a new HUD (log line, party) every draw."""
+    env, frame, renderer, hud_state = _renderer(ctx)
+
+    def step():
+        env.step(0)
+        np.copyto(frame, env.screen_buffer())
+        renderer.draw(hud_state(env, "BENCH"), new_frame=True)
+    return measure(step, steps)
+
+
+def _case_vec_env(n_envs):
+    def case(ctx, steps):
+        from vec_env import NuzlockeVecEnv
+        env = NuzlockeVecEnv(None, n_envs=n_envs, state_paths=[ctx["state"]] * n_envs,
+                             backend=replay(ctx["recording"]))
+        actions = np.zeros(n_envs, dtype=np.int64)
+        try:
+            result = measure(lambda: env.step(actions), max(1, steps // n_envs),
+                             lambda: sum(env.get_attr("frame_count")))
+        finally:
+            env.close()
+        result["env_steps_per_sec"] = result["steps_per_sec"] * n_envs
+        return result
+    case.__doc__ = f"NuzlockeVecEnv, {n_envs} worker processes"
+    return case
+
+
+CASES = {
+    "env_step_headless": case_env_step_headless,
+    "env_step_frameskip_off": case_env_step_frameskip_off,
+    "env_step_broadcast": case_env_step_broadcast,
+    "update_data": case_update_data,
+    "render_copy": case_render_copy,
+    "render_into": case_render_into,
+    "draw_frame": case_draw_frame,
+    "draw_frame_hud": case_draw_frame_hud,
+    "vec_env_2": _case_vec_env(2),
+    "vec_env_4": _case_vec_env(4),
+}
+
+
+# --- RUNNER ---
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "nogit"
+
+
+def prepare(workdir, recording_path=None):
+    """Recording on disk (vec env workers load it by path) plus a replay start state."""
+    if recording_path is None:
+        recording_path = os.path.join(workdir, "synthetic.npz")
+        save_recording(recording_path, synthetic_recording())
+    state = os.path.join(workdir, "replay.state")
+    buf = io.BytesIO()
+    ReplayEmulator(load_recording(recording_path)).save_state(buf)
+    with open(state, "wb") as f:
+        f.write(buf.getvalue())
+    return {"recording": recording_path, "state": state}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recording", help="Replay trace (.npz); synthetic if omitted")
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--only", nargs="*", help="Run cases whose name starts with any of these")
+    parser.add_argument("--out", help="Result file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", help="Earlier result file to compare steps/sec against")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    names = [n for n in CASES if not args.only or any(n.startswith(p) for p in args.only)]
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = prepare(workdir, args.recording)
+        for name in names:
+            result = CASES[name](ctx, args.steps)
+            results[name] = result
+            line = f"{name:<24} {result['steps_per_sec']:10.0f} steps/s {result['us_per_step']:9.1f} us" \
+                   f"   peak {result['alloc_peak_kib']:8.1f} KiB"
+            if "frames_per_sec" in result:
+                line += f"   {result['frames_per_sec']:9.0f} frames/s"
+            if name in baseline:
+                line += f"   x{result['steps_per_sec'] / baseline[name]['steps_per_sec']:.2f} vs baseline"
+            print(line)
+
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "recording": args.recording or "synthetic",
+            "steps": args.steps,
+        },
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"-> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Broadcast recording: the frames the stream showed, minus the repeats.
+
+The recorder takes frames on the emulation thread with one copy into a
+bounded ring; a background thread drops frames identical to the previous
+one (CRC, then an exact compare), XORs the rest against the previous
+frame and zlib-compresses them into segment files. An index row per
+stored frame makes any moment seekable: decode from the keyframe before
+it, then apply deltas.
+
+    python broadcast_recorder.py recordings/<run> --start 60 --end 90 --out clip.npz
+    python broadcast_recorder.py recordings/<run> --start 60 --play
+"""
+import argparse
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from frame_ring import FRAME_SHAPE
+
+# --- CONFIG ---
+RING_FRAMES = 128                # Frames waiting for the encoder (~12 MB); beyond that they're dropped
+KEYFRAME_EVERY = 300             # Stored frames between keyframes: worst-case seek decodes this many deltas
+SEGMENT_BYTES = 16 * 1024 ** 2   # Compressed bytes per segment file; each starts with a keyframe
+COMPRESS_LEVEL = 1               # Deltas are mostly zeros, so fast levels lose little
+POLL_SECONDS = 0.05              # Encoder wake-up interval; push() only wakes it early past half a ring
+
+# One row per stored frame; it stays on screen until the next row's time
+INDEX_FILE = "index.bin"
+INDEX_DTYPE = np.dtype([
+    ("time", "<f8"),      # Seconds since the recording started
+    ("frame", "<u8"),     # Emulator frame number
+    ("segment", "<u4"),
+    ("offset", "<u4"),
+    ("length", "<u4"),
+    ("key", "u1"),        # 1 = whole frame, 0 = XOR against the previous stored frame
+])
+
+
+def _segment_path(directory, segment):
+    return os.path.join(directory, f"segment_{segment:05d}.bin")
+
+
+class BroadcastRecorder:
+    """
+    Records a stream into directory (segment files + index.bin).
+
+    push() is all the emulation thread pays: a 92 KB copy into a ring slot
+    (~3 us). The encoder polls the ring instead of being signalled per
+    frame - a wake-up per push costs a thread switch on the emulation
+    thread's time. If the encoder falls RING_FRAMES behind, new frames are
+    dropped (and counted) rather than queued, so memory stays bounded and
+    emulation never waits. close() drains the ring and finishes the files.
+    """
+
+    def __init__(self, directory, ring_frames=RING_FRAMES, keyframe_every=KEYFRAME_EVERY,
+                 segment_bytes=SEGMENT_BYTES):
+        self.directory = directory
+        self.keyframe_every = keyframe_every
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        # --- RING (written by push, read by the encoder thread) ---
+        self._ring = np.zeros((ring_frames,) + FRAME_SHAPE, dtype=np.uint8)
+        self._times = np.zeros(ring_frames, dtype=np.float64)
+        self._frame_nos = np.zeros(ring_frames, dtype=np.uint64)
+        self._head = 0   # Frames pushed into the ring
+        self._tail = 0   # Frames the encoder is done with
+        self._t0 = time.monotonic()
+
+        # --- ENCODER STATE ---
+        self._prev = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+        self._delta = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+        self._prev_crc = None
+        self._since_key = 0
+        self._segment = -1
+        self._segment_file = None
+        self._segment_fill = 0
+        self._index = open(os.path.join(directory, INDEX_FILE), "wb")
+        self._row = np.zeros(1, dtype=INDEX_DTYPE)
+        self._pending = bytearray()   # Index rows whose blobs may not be on disk yet
+
+        self.pushed = self.dropped = self.repeats = self.stored = self.bytes_written = 0
+        self._wake = threading.Event()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="broadcast-recorder", daemon=True)
+        self._thread.start()
+
+    # --- EMULATION THREAD ---
+    def push(self, frame, frame_no=0):
+        """Queues an RGBA frame. False if the ring was full and it was dropped."""
+        self.pushed += 1
+        if self._head - self._tail >= len(self._ring):
+            self.dropped += 1
+            return False
+        slot = self._head % len(self._ring)
+        np.copyto(self._ring[slot], frame)
+        self._times[slot] = time.monotonic() - self._t0
+        self._frame_nos[slot] = frame_no
+        self._head += 1
+        if self._head - self._tail == len(self._ring) // 2:
+            self._wake.set()
+        return True
+
+    # --- ENCODER THREAD ---
+    def _run(self):
+        while True:
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+            while self._tail < self._head:
+                self._encode(self._tail % len(self._ring))
+                self._tail += 1   # Only now may push() reuse the slot
+            if self._closing and self._tail == self._head:
+                break
+        if self._segment_file is not None:
+            self._publish()
+            self._segment_file.close()
+        self._index.close()
+
+    def _encode(self, slot):
+        frame = self._ring[slot]
+        crc = zlib.crc32(frame)
+        if crc == self._prev_crc and np.array_equal(frame, self._prev):
+            self.repeats += 1
+            return
+
+        if self._segment_file is None or self._segment_fill >= self.segment_bytes:
+            self._next_segment()
+        key = self._since_key == 0 or self._since_key >= self.keyframe_every
+        if key:
+            blob = zlib.compress(frame, COMPRESS_LEVEL)
+            self._since_key = 0
+        else:
+            np.bitwise_xor(frame, self._prev, out=self._delta)
+            blob = zlib.compress(self._delta, COMPRESS_LEVEL)
+        self._since_key += 1
+
+        self._segment_file.write(blob)
+        self._row[0] = (self._times[slot], self._frame_nos[slot], self._segment, self._segment_fill, len(blob), key)
+        self._pending += self._row.tobytes()
+        if key:
+            self._publish()   # A player reading a live recording can seek up to the newest keyframe
+        self._segment_fill += len(blob)
+        self.bytes_written += len(blob)
+        self.stored += 1
+        np.copyto(self._prev, frame)
+        self._prev_crc = crc
+
+    def _publish(self):
+        """Flushes the segment, then the index rows pointing into it - never the other way round."""
+        self._segment_file.flush()
+        self._index.write(self._pending)
+        self._index.flush()
+        self._pending.clear()
+
+    def _next_segment(self):
+        if self._segment_file is not None:
+            self._publish()
+            self._segment_file.close()
+        self._segment += 1
+        self._segment_file = open(_segment_path(self.directory, self._segment), "wb")
+        self._segment_fill = 0
+        self._since_key = 0   # Segments decode on their own
+
+    def stats(self):
+        return {"pushed": self.pushed, "stored": self.stored, "repeats": self.repeats,
+                "dropped": self.dropped, "bytes": self.bytes_written, "backlog": self._head - self._tail}
+
+    def close(self):
+        self._closing = True
+        self._wake.set()
+        self._thread.join()
+
+
+class BroadcastPlayer:
+    """Reads a recording back: any moment, or every stored frame of a time range."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        data = np.fromfile(os.path.join(directory, INDEX_FILE), dtype=np.uint8)
+        usable = len(data) - len(data) % INDEX_DTYPE.itemsize   # Torn last row of a live/crashed recording
+        self.index = self._complete(data[:usable].view(INDEX_DTYPE))
+        self.keyframes = np.flatnonzero(self.index["key"])
+        self._frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+        self._files = {}
+
+    def _complete(self, index):
+        """Index up to the first row whose blob isn't (fully) in its segment file."""
+        sizes = {}
+        for segment in np.unique(index["segment"]).tolist():
+            path = _segment_path(self.directory, segment)
+            sizes[segment] = os.path.getsize(path) if os.path.exists(path) else 0
+        ends = index["offset"].astype(np.int64) + index["length"]
+        ok = ends <= np.array([sizes[s] for s in index["segment"].tolist()], dtype=np.int64)
+        return index if ok.all() else index[:int(np.argmin(ok))]
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def duration(self):
+        return float(self.index["time"][-1]) if len(self.index) else 0.0
+
+    def _blob(self, row):
+        f = self._files.get(int(row["segment"]))
+        if f is None:
+            f = self._files[int(row["segment"])] = open(_segment_path(self.directory, int(row["segment"])), "rb")
+        f.seek(int(row["offset"]))
+        return np.frombuffer(zlib.decompress(f.read(int(row["length"]))), dtype=np.uint8).reshape(FRAME_SHAPE)
+
+    def _decode(self, i):
+        row = self.index[i]
+        if row["key"]:
+            np.copyto(self._frame, self._blob(row))
+        else:
+            np.bitwise_xor(self._frame, self._blob(row), out=self._frame)
+
+    def frames(self, start=0.0, end=None):
+        """
+        (time, emulator frame, RGBA frame) for the frame on screen at start
+        and every stored frame after it up to end (seconds). The array is
+        reused - copy it to keep it.
+        """
+        if not len(self.index):
+            return
+        times = self.index["time"]
+        first = max(int(np.searchsorted(times, start, side="right")) - 1, 0)
+        last = len(self.index) if end is None else int(np.searchsorted(times, end, side="left"))
+        key = self.keyframes[np.searchsorted(self.keyframes, first, side="right") - 1]
+        for i in range(key, max(last, first + 1)):
+            self._decode(i)
+            if i >= first:
+                yield float(times[i]), int(self.index["frame"][i]), self._frame
+
+    def frame_at(self, t):
+        """Copy of the RGBA frame on screen t seconds in."""
+        for _, _, frame in self.frames(t, t):
+            return frame.copy()
+        return None
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+def play(player, start, end, scale=3):
+    """Shows a time range in a window at recorded speed."""
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((160 * scale, 144 * scale))
+    pygame.display.set_caption(f"POKEMON AI - REPLAY {player.directory}")
+    frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    source = pygame.image.frombuffer(frame, (160, 144), "RGBX")
+    t_start, clock_start = None, time.monotonic()
+    try:
+        for t, _, decoded in player.frames(start, end):
+            t_start = t if t_start is None else t_start
+            delay = (t - t_start) - (time.monotonic() - clock_start)
+            if delay > 0:
+                time.sleep(delay)
+            if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                break
+            np.copyto(frame, decoded)
+            pygame.transform.scale(source, screen.get_size(), screen)
+            pygame.display.flip()
+    finally:
+        pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay or export part of a broadcast recording.")
+    parser.add_argument("recording", help="recordings/<run> directory")
+    parser.add_argument("--start", type=float, default=0.0, help="Seconds into the recording")
+    parser.add_argument("--end", type=float, help="Seconds into the recording (default: the end)")
+    parser.add_argument("--out", help="Write the range as .npz (time, frame, RGB frames)")
+    parser.add_argument("--play", action="store_true", help="Show the range in a window")
+    args = parser.parse_args()
+
+    player = BroadcastPlayer(args.recording)
+    print(f">> {len(player)} stored frames, {player.duration:.1f} s")
+    try:
+        if args.out:
+            rows = [(t, n, frame[:, :, :3].copy()) for t, n, frame in player.frames(args.start, args.end)]
+            times, frame_nos, frames = zip(*rows) if rows else ((), (), ())
+            np.savez_compressed(args.out, time=np.array(times), frame=np.array(frame_nos, dtype=np.uint64),
+                                frames=np.array(frames, dtype=np.uint8).reshape((-1, 144, 160, 3)))
+            print(f">> {len(rows)} frames -> {args.out}")
+        if args.play:
+            play(player, args.start, args.end)
+    finally:
+        player.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import copy
+import glob
+import os
+import threading
+import zipfile
+from collections import deque
+
+from policy_runtime import export_policy, policy_state
+
+# --- CONFIG ---
+CHECKPOINT_DIR = "models/PPO/checkpoints"
+KEEP_LAST = 5   # Rolling window; milestones are never rotated out
+
+
+def snapshot(model):
+    """
+    Everything model.save() would write, detached from the live model.
+
+    This is the only part that runs on the training thread: the state dicts
+    are deep-copied (cheap for our nets) so the optimizer can keep stepping
+    while the writer serializes the copy.
+    """
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dicts, torch_vars = model._get_torch_save_params()
+    for name in state_dicts + torch_vars:
+        exclude.add(name.split(".")[0])
+    for name in exclude:
+        data.pop(name, None)
+    for name, value in data.items():
+        if isinstance(value, deque):
+            data[name] = deque(value, maxlen=value.maxlen)
+
+    params = copy.deepcopy(model.get_parameters())
+    torch_variables = {name: copy.deepcopy(_getattr_path(model, name)) for name in torch_vars}
+    return {"data": data, "params": params, "pytorch_variables": torch_variables,
+            "activation": model.policy.activation_fn.__name__.lower()}
+
+
+def _getattr_path(obj, dotted):
+    for part in dotted.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def is_valid(path):
+    """True if path is a complete SB3 zip (a crash mid-write never gets this far)."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names = set(archive.namelist())
+            return "data" in names and "policy.pth" in names and archive.testzip() is None
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+def write_atomic(path, snap):
+    """Serializes to a temp file next to path, then renames it into place."""
+    from stable_baselines3.common.save_util import save_to_zip_file   # Lazily: keeps the actor torch-free
+    tmp = path + ".tmp"
+    save_to_zip_file(tmp, data=snap["data"], params=snap["params"],
+                     pytorch_variables=snap["pytorch_variables"])
+    os.replace(tmp, path)
+
+
+def export_snapshot(snap, path):
+    """The policy export (see policy_runtime) of a snapshot, without touching the live model."""
+    weights = {k: v.cpu().numpy() for k, v in snap["params"]["policy"].items()}
+    export_policy(policy_state(weights, snap["activation"]), path)
+
+
+def latest_valid(directory=CHECKPOINT_DIR, fallback=None):
+    """Newest checkpoint (rolling or milestone) that opens cleanly, else fallback if valid."""
+    paths = glob.glob(os.path.join(directory, "*.zip"))
+    paths.sort(key=os.path.getmtime, reverse=True)
+    if fallback is not None:
+        paths.append(fallback)
+    for path in paths:
+        if os.path.exists(path) and is_valid(path):
+            return path
+    return None
+
+
+class CheckpointWriter:
+    """
+    Background checkpointing.
+
+    save() / milestone() take an in-memory snapshot and return; a daemon
+    thread does the zip serialization and the atomic rename. If rolling
+    saves arrive faster than the disk keeps up, only the newest pending
+    one is written - milestones are always written. With export_path,
+    every rolling save also refreshes the NumPy policy export from the
+    same snapshot, on the same thread.
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR, keep=KEEP_LAST, prefix="nuzlocke_live", export_path=None):
+        self.directory = directory
+        self.export_path = export_path
+        self.keep = keep
+        self.prefix = prefix
+        os.makedirs(directory, exist_ok=True)
+        self._pending = deque()   # (path, snapshot, rolling)
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self.written = 0
+        self.coalesced = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, model):
+        """Queue a rolling checkpoint, named by timestep so the window sorts naturally."""
+        path = os.path.join(self.directory, f"{self.prefix}_{model.num_timesteps:012d}.zip")
+        self._submit(path, snapshot(model), rolling=True)
+
+    def milestone(self, model, tag):
+        """Queue a checkpoint that survives rotation (e.g. tag='badge_3')."""
+        path = os.path.join(self.directory, f"{self.prefix}_{tag}.zip")
+        self._submit(path, snapshot(model), rolling=False)
+
+    def _submit(self, path, snap, rolling):
+        with self._cond:
+            if rolling:
+                stale = [job for job in self._pending if job[2]]
+                for job in stale:
+                    self._pending.remove(job)
+                self.coalesced += len(stale)
+            self._pending.append((path, snap, rolling))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                path, snap, rolling = self._pending.popleft()
+                self._busy = True
+            try:
+                write_atomic(path, snap)
+                self.written += 1
+                if rolling:
+                    self._rotate()
+                    if self.export_path:
+                        export_snapshot(snap, self.export_path)
+            except Exception as e:
+                print(f"!! CHECKPOINT FAILED ({path}): {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _rotate(self):
+        rolling = sorted(glob.glob(os.path.join(self.directory, f"{self.prefix}_" + "[0-9]" * 12 + ".zip")))
+        for path in rolling[:-self.keep]:
+            os.remove(path)
+
+    def flush(self):
+        """Block until everything queued so far is on disk."""
+        with self._cond:
+            while self._pending or self._busy:
+                self._cond.wait()
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
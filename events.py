@@ -0,0 +1,159 @@
+from collections import deque, namedtuple
+
+import numpy as np
+
+from ram_snapshot import (PARTY_SIZE, BAG_SIZE, WRAM_START, MEM_PARTY_COUNT, MEM_BADGES, MEM_ITEM_COUNT,
+                          MEM_MAP_ID)
+
+# --- EVENTS ---
+LevelUp = namedtuple("LevelUp", "slot species level")
+Faint = namedtuple("Faint", "slot species")
+Capture = namedtuple("Capture", "slot species")        # Any new party member (caught, gifted, traded)
+BadgeEarned = namedtuple("BadgeEarned", "badge total")  # badge = bit index (0 = Boulder)
+MapChange = namedtuple("MapChange", "old new")
+HpLoss = namedtuple("HpLoss", "amount")                # Summed over the party since the last sync
+ItemGained = namedtuple("ItemGained", "item_id")        # Item id that wasn't in the bag before
+
+# pokered routines that make the changes we track. With a pokered .sym next
+# to the ROM, entering one arms a sync at its return address (read off the
+# stack), so the snapshot is taken right after the change, while the
+# emulator is still inside the step: a level-up or faint that is healed
+# before the step ends is still seen. Without symbols (the default - none is
+# shipped) the env syncs once per step, which costs one compare of the
+# tracked WRAM window unless something in it changed.
+SYNC_SYMBOLS = (
+    "GainExperience",
+    "HandlePlayerMonFainted",
+    "AddPartyMon",
+    "LoadMapHeader",
+    "AddItemToInventory_",
+)
+
+MAX_QUEUED = 256
+TRACKED_WINDOW = (MEM_PARTY_COUNT, MEM_MAP_ID + 1)   # One WRAM range holding everything _diff reads
+MEM_LOADED_ROM_BANK = 0xFFB8   # pokered's hLoadedROMBank: the bank a return address >= 0x4000 is in
+
+
+class EventTracker:
+    """
+    Turns RamSnapshot refreshes into typed game events.
+
+    Every sync() refreshes the snapshot and diffs it against the previous
+    one with a handful of array compares; anything that changed is appended
+    to a queue the consumers drain(). The first sync after reset() only
+    records a baseline, so loading a savestate never fires events.
+    """
+
+    def __init__(self, ram):
+        self.ram = ram
+        self.queue = deque(maxlen=MAX_QUEUED)
+        self.hooked = []
+        self._species = np.zeros(PARTY_SIZE, dtype=np.uint8)
+        self._levels = np.zeros(PARTY_SIZE, dtype=np.uint8)
+        self._hp = np.zeros(PARTY_SIZE, dtype=np.int32)
+        start, end = TRACKED_WINDOW
+        self._window = ram.buf[start - WRAM_START:end - WRAM_START]
+        self._last_window = np.zeros_like(self._window)
+        self._return_sites = set()
+        self._armed = False
+        self.reset()
+
+    def attach(self, pyboy):
+        """Hooks whichever SYNC_SYMBOLS this ROM's symbol file knows (see _arm)."""
+        for symbol in SYNC_SYMBOLS:
+            try:
+                pyboy.hook_register(None, symbol, self._arm, pyboy)
+            except ValueError:
+                continue  # No .sym loaded, or not a pokered build
+            self.hooked.append(symbol)
+        return self.hooked
+
+    def _arm(self, pyboy):
+        """
+        Entry hook: the change happens inside the routine, so sync when it
+        returns. The return address gets a hook the first time each call
+        site is seen; it only syncs while armed.
+        """
+        mem, sp = pyboy.memory, pyboy.register_file.SP
+        ret = mem[sp] | mem[sp + 1] << 8
+        if ret >= 0x8000:
+            self.sync(pyboy)   # Returning into RAM code: nothing to hook, sync at entry instead
+            return
+        site = (0 if ret < 0x4000 else mem[MEM_LOADED_ROM_BANK], ret)
+        if site not in self._return_sites:
+            self._return_sites.add(site)
+            try:
+                pyboy.hook_register(site[0], ret, self._returned, pyboy)
+            except ValueError:
+                pass  # Already hooked (e.g. another SYNC_SYMBOLS routine's return site)
+        self._armed = True
+
+    def _returned(self, pyboy):
+        if self._armed:
+            self._armed = False
+            self.sync(pyboy)
+
+    def reset(self):
+        """Forget the baseline (call after loading a state)."""
+        self._primed = False
+        self.queue.clear()
+
+    def sync(self, pyboy):
+        ram = self.ram.refresh(pyboy)
+        if self._primed and np.array_equal(self._window, self._last_window):
+            return  # Nothing tracked changed since the last sync
+        party = ram.party
+        count = ram.party_count
+        species = party["species"]
+        levels = party["level"]
+        hp = party["hp"].astype(np.int32)
+        badge_bits = ram[MEM_BADGES]
+        map_id = ram.map_id
+        items = set(ram.bag[:min(ram[MEM_ITEM_COUNT], BAG_SIZE), 0].tolist())
+
+        if self._primed:
+            self._diff(count, species, levels, hp, badge_bits, map_id, items)
+
+        self._count = count
+        self._species[:] = species
+        self._levels[:] = levels
+        self._hp[:] = hp
+        self._badge_bits = badge_bits
+        self._map_id = map_id
+        self._items = items
+        np.copyto(self._last_window, self._window)
+        self._primed = True
+
+    def _diff(self, count, species, levels, hp, badge_bits, map_id, items):
+        emit = self.queue.append
+        n = min(count, self._count)
+
+        # Same species in the same slot = same mon (ignores party reordering)
+        same = species[:n] == self._species[:n]
+        for slot in np.flatnonzero(same & (levels[:n] > self._levels[:n])):
+            emit(LevelUp(int(slot), int(species[slot]), int(levels[slot])))
+
+        lost = np.where(same, self._hp[:n] - hp[:n], 0)
+        if lost.max(initial=0) > 0:
+            emit(HpLoss(int(lost[lost > 0].sum())))
+        for slot in np.flatnonzero(same & (hp[:n] == 0) & (self._hp[:n] > 0)):
+            emit(Faint(int(slot), int(species[slot])))
+
+        for slot in range(self._count, count):
+            emit(Capture(slot, int(species[slot])))
+
+        new_badges = badge_bits & ~self._badge_bits
+        for bit in range(8):
+            if new_badges >> bit & 1:
+                emit(BadgeEarned(bit, bin(badge_bits).count('1')))
+
+        if map_id != self._map_id:
+            emit(MapChange(self._map_id, map_id))
+
+        for item_id in items - self._items:
+            emit(ItemGained(item_id))
+
+    def drain(self):
+        events = list(self.queue)
+        self.queue.clear()
+        return events
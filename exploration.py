@@ -0,0 +1,121 @@
+import io
+
+import numpy as np
+
+# --- CONFIG ---
+HEATMAP_SIZE = (40, 140)   # Max (rows, cols) of a heatmap; bigger maps are max-pooled down to fit
+
+
+class ExplorationIndex:
+    """
+    Where the player has been: uint16 visit counters, one page per visited
+    map sized to that map (a cell is new while its counter is 0).
+
+    visit() is a few scalar array operations, whatever the run length.
+    Pages are the map's real size (2 x 2 steps per block, from RamSnapshot.
+    map_shape), so a Gen 1 map costs a few KB and a whole playthrough well
+    under a MB; snapshot() compresses the lot to a few KB to keep next to a
+    savestate. version only moves when a new cell is seen, so anything
+    derived from the index (the GUI heatmap) is recomputed only then.
+    """
+
+    def __init__(self):
+        self.pages = {}      # map_id -> uint16 counters [y, x]
+        self.cells = 0
+        self.version = 0
+        self._heatmaps = {}  # map_id -> (version, image)
+
+    def visit(self, map_id, x, y, shape=None):
+        """Counts one step on (map_id, x, y); shape = the map's (rows, cols). True if the cell was new."""
+        page = self.pages.get(map_id)
+        if page is None or y >= page.shape[0] or x >= page.shape[1]:
+            page = self._grow(map_id, y, x, shape)
+        count = page[y, x]
+        if count < 0xFFFF:
+            page[y, x] = count + 1
+        if count:
+            return False
+        self.cells += 1
+        self.version += 1
+        return True
+
+    def _grow(self, map_id, y, x, shape):
+        """
+        The map's page, (re)allocated to hold (y, x): the map's size on
+        first visit, larger only if a position lies outside it (coordinates
+        read mid-warp, or no shape given).
+        """
+        old = self.pages.get(map_id)
+        rows, cols = shape if shape else (0, 0)
+        if old is not None:
+            rows, cols = max(rows, old.shape[0]), max(cols, old.shape[1])
+        page = np.zeros((max(rows, y + 1), max(cols, x + 1)), dtype=np.uint16)
+        if old is not None:
+            page[:old.shape[0], :old.shape[1]] = old
+        self.pages[map_id] = page
+        return page
+
+    def seen(self, map_id, x, y):
+        return self.visits(map_id, x, y) > 0
+
+    def visits(self, map_id, x, y):
+        page = self.pages.get(map_id)
+        if page is None or y >= page.shape[0] or x >= page.shape[1]:
+            return 0
+        return int(page[y, x])
+
+    # --- HEATMAP ---
+    def heatmap(self, map_id, max_size=HEATMAP_SIZE):
+        """
+        uint8 image of one map's visit counts (log scale, 0 = never visited),
+        cropped to the visited area and max-pooled to fit max_size. Cached
+        until a new cell is seen anywhere.
+        """
+        cached = self._heatmaps.get(map_id)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        page = self.pages.get(map_id)
+        if page is None or not page.any():
+            image = np.zeros((1, 1), dtype=np.uint8)
+        else:
+            rows, cols = np.flatnonzero(page.any(axis=1)), np.flatnonzero(page.any(axis=0))
+            crop = page[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+            factor = max(-(-crop.shape[0] // max_size[0]), -(-crop.shape[1] // max_size[1]))
+            if factor > 1:
+                h, w = -(-crop.shape[0] // factor) * factor, -(-crop.shape[1] // factor) * factor
+                padded = np.zeros((h, w), dtype=np.uint16)
+                padded[:crop.shape[0], :crop.shape[1]] = crop
+                crop = padded.reshape(h // factor, factor, w // factor, factor).max(axis=(1, 3))
+            scaled = np.log1p(crop.astype(np.float32))
+            image = (scaled * (255 / max(scaled.max(), 1e-6))).astype(np.uint8)
+            image[(crop > 0) & (image == 0)] = 1
+        self._heatmaps[map_id] = (self.version, image)
+        return image
+
+    # --- SNAPSHOTS ---
+    def snapshot(self):
+        """Compressed bytes of the whole index (see restore())."""
+        buf = io.BytesIO()
+        np.savez_compressed(buf, **{f"map_{m}": page for m, page in self.pages.items()})
+        return buf.getvalue()
+
+    def restore(self, blob):
+        with np.load(io.BytesIO(blob)) as data:
+            if "pages" in data.files:   # Older snapshots: stacked fixed-size pages plus a bitset
+                self.pages = {int(m): page.copy() for m, page in zip(data["maps"], data["pages"])}
+            else:
+                self.pages = {int(k[4:]): data[k].copy() for k in data.files if k.startswith("map_")}
+        self.cells = sum(int(np.count_nonzero(page)) for page in self.pages.values())
+        self.version += 1
+        self._heatmaps.clear()
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.snapshot())
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with open(path, "rb") as f:
+            index.restore(f.read())
+        return index
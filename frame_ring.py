@@ -0,0 +1,254 @@
+import json
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# --- LAYOUT ---
+FRAME_SHAPE = (144, 160, 4)   # PyBoy's RGBA framebuffer, copied as-is
+FRAME_SLOTS = 4          # Writer can lap the reader this many times before a read tears
+HUD_BYTES = 64 * 1024    # Per HUD half (JSON, double-buffered)
+
+# Header words (int64)
+H_FRAME_SEQ = 0   # Frames published so far (latest lives in slot (seq - 1) % FRAME_SLOTS)
+H_HUD_SEQ = 1     # HUD snapshots published so far
+H_STOP = 2        # Set by the display when the window is closed
+HEADER_WORDS = 8
+
+
+def _encode_hud(hud):
+    """
+    JSON of hud in at most HUD_BYTES. If it doesn't fit, the text lists (log,
+    graveyard, ...) lose their oldest half, biggest list first, until it
+    does; ValueError if it still doesn't without them.
+    """
+    payload = json.dumps(hud, ensure_ascii=False).encode("utf-8")
+    if len(payload) <= HUD_BYTES:
+        return payload
+    hud = dict(hud)
+    texts = [key for key, value in hud.items()
+             if isinstance(value, list) and all(isinstance(item, str) for item in value)]
+    while len(payload) > HUD_BYTES:
+        key = max(texts, key=lambda k: sum(len(item) for item in hud[k]), default=None)
+        if key is None or not hud[key]:
+            raise ValueError(f"HUD needs {len(payload)} bytes without its text lists (limit {HUD_BYTES})")
+        hud[key] = hud[key][(len(hud[key]) + 1) // 2:]
+        payload = json.dumps(hud, ensure_ascii=False).encode("utf-8")
+    return payload
+
+
+def _write_hud(header, seq_word, meta, data, hud):
+    """JSON into the idle half of a double buffer; meta[half] = [seq, length], seq stamped last."""
+    payload = _encode_hud(hud)
+    seq = int(header[seq_word]) + 1
+    half = seq % 2
+    meta[half, 0] = -1
+    data[half, :len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+    meta[half, 1] = len(payload)
+    meta[half, 0] = seq
+    header[seq_word] = seq
+
+
+def _read_hud(header, seq_word, meta, data, last_seq):
+    """(hud or None, seq now seen) - None if nothing newer than last_seq or the read raced the writer."""
+    seq = int(header[seq_word])
+    if seq == last_seq:
+        return None, last_seq
+    half = seq % 2
+    length = int(meta[half, 1])
+    payload = data[half, :length].tobytes()
+    if int(meta[half, 0]) != seq:
+        return None, last_seq
+    return json.loads(payload.decode("utf-8")), seq
+
+
+class FrameRing:
+    """
+    Shared-memory mailbox between the emulator and the broadcast window.
+
+    One writer (the env process) drops RGBA frames into a small ring of slots
+    and HUD state into a double-buffered JSON area; the reader (display
+    process) only ever looks at the newest entry and skips anything older.
+    Every slot is stamped with its sequence number after the copy, so a read
+    that raced the writer is detected and retried instead of shown torn.
+    Neither side ever waits on the other.
+    """
+
+    def __init__(self, name=None, create=False):
+        frame_bytes = int(np.prod(FRAME_SHAPE))
+        size = 8 * HEADER_WORDS + 8 * FRAME_SLOTS + FRAME_SLOTS * frame_bytes + 2 * (8 + 8 + HUD_BYTES)
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.owner = create
+        buf = self.shm.buf
+
+        offset = 0
+        self.header = np.ndarray((HEADER_WORDS,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += 8 * HEADER_WORDS
+        self.slot_seq = np.ndarray((FRAME_SLOTS,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += 8 * FRAME_SLOTS
+        self.slots = np.ndarray((FRAME_SLOTS,) + FRAME_SHAPE, dtype=np.uint8, buffer=buf, offset=offset)
+        offset += FRAME_SLOTS * frame_bytes
+        # Each HUD half: [seq, length] + payload
+        self.hud_meta = np.ndarray((2, 2), dtype=np.int64, buffer=buf, offset=offset)
+        offset += 2 * 16
+        self.hud_data = np.ndarray((2, HUD_BYTES), dtype=np.uint8, buffer=buf, offset=offset)
+
+        if create:
+            self.header[:] = 0
+            self.slot_seq[:] = 0
+            self.hud_meta[:] = 0
+
+        self._last_frame = 0
+        self._last_hud = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # --- WRITER SIDE ---
+    def write_frame(self, frame):
+        seq = int(self.header[H_FRAME_SEQ]) + 1
+        slot = (seq - 1) % FRAME_SLOTS
+        self.slot_seq[slot] = -1
+        np.copyto(self.slots[slot], frame)
+        self.slot_seq[slot] = seq
+        self.header[H_FRAME_SEQ] = seq
+
+    def write_hud(self, hud):
+        _write_hud(self.header, H_HUD_SEQ, self.hud_meta, self.hud_data, hud)
+
+    # --- READER SIDE ---
+    def read_frame(self, out):
+        """Copies the newest frame into out. False if nothing new (or the read raced the writer)."""
+        seq = int(self.header[H_FRAME_SEQ])
+        if seq == self._last_frame:
+            return False
+        slot = (seq - 1) % FRAME_SLOTS
+        np.copyto(out, self.slots[slot])
+        if int(self.slot_seq[slot]) != seq:
+            return False  # Overwritten mid-copy; the next poll picks up the newer frame
+        self._last_frame = seq
+        return True
+
+    def read_hud(self):
+        """Newest HUD dict, or None if it hasn't changed since the last read."""
+        hud, self._last_hud = _read_hud(self.header, H_HUD_SEQ, self.hud_meta, self.hud_data, self._last_hud)
+        return hud
+
+    # --- CONTROL ---
+    @property
+    def stopped(self):
+        return bool(self.header[H_STOP])
+
+    def request_stop(self):
+        self.header[H_STOP] = 1
+
+    def close(self):
+        self.header = self.slot_seq = self.slots = self.hud_meta = self.hud_data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# Mosaic header words (int64)
+M_STOP = 0       # Set by the display when the window is closed
+M_SELECTED = 1   # Worker promoted to the full HUD (-1 = mosaic view)
+M_HUD_SEQ = 2    # HUD snapshots published (by the selected worker only)
+M_TILES = 3      # Tile count, so attaching processes only need the name
+
+
+class MosaicBoard:
+    """
+    Shared-memory wall of frames, one tile per vec env worker.
+
+    Each worker is the only writer of its tile and bumps the tile's
+    sequence number only when the frame actually differs from what the
+    tile holds, so the display can tell which tiles changed from one int
+    compare each and redraw just those. The worker the display selects
+    also publishes its HUD (same double-buffered JSON as FrameRing).
+    """
+
+    def __init__(self, n_tiles=None, name=None, create=False):
+        if create:
+            frame_bytes = int(np.prod(FRAME_SHAPE))
+            size = 8 * HEADER_WORDS + 8 * n_tiles + n_tiles * frame_bytes + 2 * (8 + 8 + HUD_BYTES)
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = create
+        buf = self.shm.buf
+
+        offset = 0
+        self.header = np.ndarray((HEADER_WORDS,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += 8 * HEADER_WORDS
+        if create:
+            self.header[:] = 0
+            self.header[M_TILES] = n_tiles
+            self.header[M_SELECTED] = -1
+        self.n_tiles = n_tiles = int(self.header[M_TILES])
+        self.tile_seq = np.ndarray((n_tiles,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += 8 * n_tiles
+        self.tiles = np.ndarray((n_tiles,) + FRAME_SHAPE, dtype=np.uint8, buffer=buf, offset=offset)
+        offset += n_tiles * int(np.prod(FRAME_SHAPE))
+        self.hud_meta = np.ndarray((2, 2), dtype=np.int64, buffer=buf, offset=offset)
+        offset += 2 * 16
+        self.hud_data = np.ndarray((2, HUD_BYTES), dtype=np.uint8, buffer=buf, offset=offset)
+
+        if create:
+            self.tile_seq[:] = 0
+            self.tiles[:] = 0
+            self.hud_meta[:] = 0
+        self._last_hud = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # --- WRITER SIDE (worker `tile`) ---
+    def write_tile(self, tile, frame):
+        """Publishes frame unless the tile already shows exactly it. True if it changed."""
+        target = self.tiles[tile]
+        if np.array_equal(target, frame):
+            return False
+        seq = int(self.tile_seq[tile])
+        self.tile_seq[tile] = -1
+        np.copyto(target, frame)
+        self.tile_seq[tile] = seq + 1
+        return True
+
+    def write_hud(self, hud):
+        _write_hud(self.header, M_HUD_SEQ, self.hud_meta, self.hud_data, hud)
+
+    # --- READER SIDE ---
+    def read_tile(self, tile, out):
+        """Copies a tile into out; its sequence number, or -1 if the read raced the writer."""
+        seq = int(self.tile_seq[tile])
+        if seq < 0:
+            return -1
+        np.copyto(out, self.tiles[tile])
+        return seq if int(self.tile_seq[tile]) == seq else -1
+
+    def read_hud(self):
+        hud, self._last_hud = _read_hud(self.header, M_HUD_SEQ, self.hud_meta, self.hud_data, self._last_hud)
+        return hud
+
+    # --- CONTROL ---
+    @property
+    def selected(self):
+        return int(self.header[M_SELECTED])
+
+    def select(self, tile):
+        """Promotes a worker to the full HUD (-1 = back to the mosaic)."""
+        self.header[M_SELECTED] = tile
+
+    @property
+    def stopped(self):
+        return bool(self.header[M_STOP])
+
+    def request_stop(self):
+        self.header[M_STOP] = 1
+
+    def close(self):
+        self.header = self.tile_seq = self.tiles = self.hud_meta = self.hud_data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
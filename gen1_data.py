@@ -0,0 +1,118 @@
+"""
+Static Gen 1 (Red/Blue) lookup tables, built once at import and shared by
+every env in the process.
+"""
+
+# --- SPECIES ---
+# (internal index, name, glyph, type). Internal order is the ROM's, not the
+# Pokedex's - e.g. 0x01 is Rhydon. Gaps are MissingNo. slots.
+_SPECIES_ROWS = [
+    (1, "Rhydon", "🦏", "GND"), (2, "Kangaskhan", "🦘", "NRM"), (3, "NidoranM", "🐇", "PSN"),
+    (4, "Clefairy", "🧚", "NRM"), (5, "Spearow", "🐦", "FLY"), (6, "Voltorb", "🔴", "ELC"),
+    (7, "Nidoking", "👑", "PSN"), (8, "Slowbro", "🐚", "WTR"), (9, "Ivysaur", "🐸", "GRS"),
+    (10, "Exeggutor", "🌴", "GRS"), (11, "Lickitung", "👅", "NRM"), (12, "Exeggcute", "🥚", "GRS"),
+    (13, "Grimer", "💩", "PSN"), (14, "Gengar", "😈", "GST"), (15, "NidoranF", "🐇", "PSN"),
+    (16, "Nidoqueen", "👑", "PSN"), (17, "Cubone", "🦴", "GND"), (18, "Rhyhorn", "🦏", "GND"),
+    (19, "Lapras", "🦕", "WTR"), (20, "Arcanine", "🐕", "FIR"), (21, "Mew", "🧬", "PSY"),
+    (22, "Gyarados", "🐉", "WTR"), (23, "Shellder", "🐚", "WTR"), (24, "Tentacool", "🦑", "WTR"),
+    (25, "Gastly", "👻", "GST"), (26, "Scyther", "🦗", "BUG"), (27, "Staryu", "⭐", "WTR"),
+    (28, "Blastoise", "🐢", "WTR"), (29, "Pinsir", "🦗", "BUG"), (30, "Tangela", "🍝", "GRS"),
+    (33, "Growlithe", "🐕", "FIR"), (34, "Onix", "🐍", "RCK"), (35, "Fearow", "🦅", "FLY"),
+    (36, "Pidgey", "🐦", "FLY"), (37, "Slowpoke", "🦥", "WTR"), (38, "Kadabra", "🦊", "PSY"),
+    (39, "Graveler", "🪨", "RCK"), (40, "Chansey", "🥚", "NRM"), (41, "Machoke", "💪", "FGT"),
+    (42, "Mr. Mime", "🤡", "PSY"), (43, "Hitmonlee", "🥋", "FGT"), (44, "Hitmonchan", "🥊", "FGT"),
+    (45, "Arbok", "🐍", "PSN"), (46, "Parasect", "🦀", "BUG"), (47, "Psyduck", "🦆", "WTR"),
+    (48, "Drowzee", "🐘", "PSY"), (49, "Golem", "🪨", "RCK"), (51, "Magmar", "🔥", "FIR"),
+    (53, "Electabuzz", "⚡", "ELC"), (54, "Magneton", "🧲", "ELC"), (55, "Koffing", "☁️", "PSN"),
+    (57, "Mankey", "🐒", "FGT"), (58, "Seel", "🦭", "WTR"), (59, "Diglett", "🥔", "GND"),
+    (60, "Tauros", "🐂", "NRM"), (64, "Farfetch'd", "🦆", "NRM"), (65, "Venonat", "👾", "BUG"),
+    (66, "Dragonite", "🐉", "DRG"), (70, "Doduo", "🐦", "FLY"), (71, "Poliwag", "tadpole", "WTR"),
+    (72, "Jynx", "💋", "ICE"), (73, "Moltres", "🔥", "FIR"), (74, "Articuno", "❄️", "ICE"),
+    (75, "Zapdos", "⚡", "ELC"), (76, "Ditto", "😐", "NRM"), (77, "Meowth", "🐱", "NRM"),
+    (78, "Krabby", "🦀", "WTR"), (82, "Vulpix", "🦊", "FIR"), (83, "Ninetales", "🦊", "FIR"),
+    (84, "Pikachu", "🐭", "ELC"), (85, "Raichu", "🐭", "ELC"), (88, "Dratini", "🐉", "DRG"),
+    (89, "Dragonair", "🐉", "DRG"), (90, "Kabuto", "🐚", "RCK"), (91, "Kabutops", "🐚", "RCK"),
+    (92, "Horsea", "🌊", "WTR"), (93, "Seadra", "🌊", "WTR"), (96, "Sandshrew", "🐁", "GND"),
+    (97, "Sandslash", "🦔", "GND"), (98, "Omanyte", "🐚", "RCK"), (99, "Omastar", "🐚", "RCK"),
+    (100, "Jigglypuff", "🎈", "NRM"), (101, "Wigglytuff", "🎈", "NRM"), (102, "Eevee", "🐕", "NRM"),
+    (103, "Flareon", "🔥", "FIR"), (104, "Jolteon", "⚡", "ELC"), (105, "Vaporeon", "🧜", "WTR"),
+    (106, "Machop", "💪", "FGT"), (107, "Zubat", "🦇", "PSN"), (108, "Ekans", "🐍", "PSN"),
+    (109, "Paras", "🦀", "BUG"), (110, "Poliwhirl", "🐸", "WTR"), (111, "Poliwrath", "🐸", "FGT"),
+    (112, "Weedle", "🐛", "BUG"), (113, "Kakuna", "Cocoon", "BUG"), (114, "Beedrill", "🐝", "BUG"),
+    (116, "Dodrio", "🐦", "FLY"), (117, "Primeape", "🦍", "FGT"), (118, "Dugtrio", "🥔", "GND"),
+    (119, "Venomoth", "🦋", "BUG"), (120, "Dewgong", "🦭", "WTR"), (123, "Caterpie", "🐛", "BUG"),
+    (124, "Metapod", "Cocoon", "BUG"), (125, "Butterfree", "🦋", "BUG"), (126, "Machamp", "💪", "FGT"),
+    (128, "Golduck", "🦆", "WTR"), (129, "Hypno", "PENDULUM", "PSY"), (130, "Golbat", "🦇", "PSN"),
+    (131, "Mewtwo", "🧬", "PSY"), (132, "Snorlax", "😴", "NRM"), (133, "Magikarp", "🐟", "WTR"),
+    (136, "Muk", "💩", "PSN"), (138, "Kingler", "🦀", "WTR"), (139, "Cloyster", "🐚", "WTR"),
+    (141, "Electrode", "🔴", "ELC"), (142, "Clefable", "🧚", "NRM"), (143, "Weezing", "☁️", "PSN"),
+    (144, "Persian", "🐆", "NRM"), (145, "Marowak", "🦴", "GND"), (147, "Haunter", "👻", "GST"),
+    (148, "Abra", "🦊", "PSY"), (149, "Alakazam", "🧙", "PSY"), (150, "Pidgeotto", "🦅", "FLY"),
+    (151, "Pidgeot", "🦅", "FLY"), (152, "Starmie", "⭐", "WTR"), (153, "Bulbasaur", "🐸", "GRS"),
+    (154, "Venusaur", "🌺", "GRS"), (155, "Tentacruel", "🦑", "WTR"), (157, "Goldeen", "🐟", "WTR"),
+    (158, "Seaking", "🐟", "WTR"), (163, "Ponyta", "🐎", "FIR"), (164, "Rapidash", "🦄", "FIR"),
+    (165, "Rattata", "🐀", "NRM"), (166, "Raticate", "🐀", "NRM"), (167, "Nidorino", "🐇", "PSN"),
+    (168, "Nidorina", "🐇", "PSN"), (169, "Geodude", "🪨", "RCK"), (170, "Porygon", "👾", "NRM"),
+    (171, "Aerodactyl", "🦖", "FLY"), (173, "Magnemite", "🧲", "ELC"), (176, "Charmander", "🦎", "FIR"),
+    (177, "Squirtle", "🐢", "WTR"), (178, "Charmeleon", "🦎", "FIR"), (179, "Wartortle", "🐢", "WTR"),
+    (180, "Charizard", "🐉", "FIR"), (185, "Oddish", "🌱", "GRS"), (186, "Gloom", "🌺", "GRS"),
+    (187, "Vileplume", "🌺", "GRS"), (188, "Bellsprout", "🌱", "GRS"), (189, "Weepinbell", "🌱", "GRS"),
+    (190, "Victreebel", "🌱", "GRS"),
+]
+
+UNKNOWN_SPECIES = ("UNK", "❓", "???")
+
+
+def _build_species_table(rows):
+    """256-slot tuple indexed by internal ID. Refuses duplicate IDs or names."""
+    table = [UNKNOWN_SPECIES] * 256
+    seen_names = set()
+    for index, name, glyph, type_label in rows:
+        if not 0 < index < 256:
+            raise ValueError(f"species index out of range: {index} ({name})")
+        if table[index] is not UNKNOWN_SPECIES:
+            raise ValueError(f"species index {index} used by both {table[index][0]} and {name}")
+        if name in seen_names:
+            raise ValueError(f"species {name} listed twice")
+        seen_names.add(name)
+        table[index] = (name, glyph, type_label)
+    if len(seen_names) != 151:
+        raise ValueError(f"expected 151 species, got {len(seen_names)}")
+    return tuple(table)
+
+
+SPECIES = _build_species_table(_SPECIES_ROWS)
+
+
+# --- TEXT ---
+TERMINATOR = 0x50
+NAME_LENGTH = 11   # Nickname buffers, terminator included
+
+_CHARS = {0x7F: " "}
+_CHARS.update({0x80 + i: chr(ord("A") + i) for i in range(26)})
+_CHARS.update({0xA0 + i: chr(ord("a") + i) for i in range(26)})
+_CHARS.update({0xF6 + i: str(i) for i in range(10)})
+_CHARS.update({
+    0x9A: "(", 0x9B: ")", 0x9C: ":", 0x9D: ";", 0x9E: "[", 0x9F: "]",
+    0xBA: "é", 0xBB: "'d", 0xBC: "'l", 0xBD: "'s", 0xBE: "'t", 0xBF: "'v",
+    0xE0: "'", 0xE1: "PK", 0xE2: "MN", 0xE3: "-", 0xE4: "'r", 0xE5: "'m",
+    0xE6: "?", 0xE7: "!", 0xE8: ".", 0xEF: "♂", 0xF0: "¥", 0xF1: "×",
+    0xF3: "/", 0xF4: ",", 0xF5: "♀",
+})
+
+# str.translate table over the latin-1 view of the raw bytes; control codes
+# and tiles without a printable glyph are dropped.
+CHARSET = {code: _CHARS.get(code) for code in range(256)}
+
+
+def decode_text(raw):
+    """One Gen 1 string (bytes / uint8 array), up to its terminator."""
+    text = bytes(raw).decode("latin-1")
+    return text.split(chr(TERMINATOR), 1)[0].translate(CHARSET)
+
+
+def decode_names(raw, length=NAME_LENGTH):
+    """Every fixed-width name in one buffer (e.g. all six party nicknames)."""
+    text = bytes(raw).decode("latin-1")
+    return [text[i:i + length].split(chr(TERMINATOR), 1)[0].translate(CHARSET)
+            for i in range(0, len(text), length)]
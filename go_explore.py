@@ -0,0 +1,112 @@
+import io
+import math
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# --- CONFIG ---
+CELL_SIZE = 4                     # Tiles per cell side: coarse enough that a cell is a "place", not a step
+MEMORY_BUDGET = 64 * 1024 ** 2    # Compressed savestate bytes kept before cells are evicted
+EXPLORE_PROB = 0.75               # Chance a restart comes from the archive instead of the start states
+PROGRESS_WEIGHT = 0.5             # Selection bonus per badge / party member held in the cell
+
+
+class Cell:
+    """One archived place: the first savestate that reached it plus counters."""
+
+    __slots__ = ("state", "visits", "chosen", "first_step", "progress")
+
+    def __init__(self, state, step, progress):
+        self.state = state        # zlib-compressed savestate
+        self.visits = 1           # Steps that ended in this cell
+        self.chosen = 0           # Restarts that started from it
+        self.first_step = step
+        self.progress = progress  # badges + party size
+
+
+class CellArchive:
+    """
+    Go-Explore archive: compressed savestates keyed by game cell.
+
+    A cell is (map, x // cell_size, y // cell_size, badges, party size), so
+    the same room with a new badge or a new team member is a new place.
+    observe() runs every step and costs a dict lookup unless the cell is
+    new, when the savestate is taken (~30 ms). Restarts favour cells that
+    were rarely visited or chosen and that hold more progress; the same
+    score, oldest-used first, picks what to evict past the memory budget.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE, memory_budget=MEMORY_BUDGET, explore_prob=EXPLORE_PROB,
+                 progress_weight=PROGRESS_WEIGHT):
+        self.cell_size = cell_size
+        self.memory_budget = memory_budget
+        self.explore_prob = explore_prob
+        self.progress_weight = progress_weight
+        self.cells = OrderedDict()   # key -> Cell, least recently used first
+        self.state_bytes = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def cell_key(self, ram):
+        size = self.cell_size
+        return (ram.map_id, ram.x // size, ram.y // size, ram.badges, ram.party_count)
+
+    def observe(self, pyboy, ram, step=0):
+        """Counts a visit to the current cell (archiving it if new). True if it was new."""
+        key = self.cell_key(ram)
+        cell = self.cells.get(key)
+        if cell is not None:
+            cell.visits += 1
+            self.cells.move_to_end(key)
+            return False
+
+        buf = io.BytesIO()
+        pyboy.save_state(buf)
+        cell = Cell(zlib.compress(buf.getvalue(), 1), step, ram.badges + ram.party_count)
+        self.cells[key] = cell
+        self.state_bytes += len(cell.state)
+        while self.state_bytes > self.memory_budget and len(self.cells) > 1:
+            self._evict(keep=key)
+        return True
+
+    # --- SELECTION ---
+    def score(self, cell):
+        novelty = 1.0 / math.sqrt(cell.visits + 1) + 1.0 / math.sqrt(cell.chosen + 1)
+        return novelty + self.progress_weight * cell.progress
+
+    def sample(self, rng):
+        """Key of a cell to restart from, drawn in proportion to score()."""
+        keys = list(self.cells)
+        scores = np.array([self.score(self.cells[k]) for k in keys])
+        return keys[rng.choice(len(keys), p=scores / scores.sum())]
+
+    def restore(self, pyboy, key):
+        cell = self.cells[key]
+        cell.chosen += 1
+        self.cells.move_to_end(key)
+        pyboy.load_state(io.BytesIO(zlib.decompress(cell.state)))
+
+    def load(self, pyboy, rng, fallback=None):
+        """
+        Restart: a sampled cell with probability explore_prob (always if
+        there's no fallback), else fallback.load() - e.g. a StartStatePool.
+        Returns the cell key or whatever the fallback returned.
+        """
+        if fallback is not None and (not self.cells or rng.random() >= self.explore_prob):
+            return fallback.load(pyboy, rng)
+        key = self.sample(rng)
+        self.restore(pyboy, key)
+        return key
+
+    def _evict(self, keep):
+        victim = min((k for k in self.cells if k != keep), key=lambda k: self.score(self.cells[k]))
+        self.state_bytes -= len(self.cells.pop(victim).state)
+        self.evicted += 1
+
+    def frontier(self, n=10):
+        """The n highest-scoring cells as (key, score), best first."""
+        scored = sorted(((k, self.score(c)) for k, c in self.cells.items()), key=lambda kv: -kv[1])
+        return scored[:n]
@@ -1,166 +1,574 @@
-﻿import pygame
+﻿import base64
+import math
+import multiprocessing as mp
+import os
+from collections import OrderedDict
+import pygame
 import sys
+import time
 import numpy as np
-from stable_baselines3 import PPO
 from nuzlocke_env import NuzlockeEnv
+from learner import LearnerClient
+from broadcast_recorder import BroadcastRecorder
+from frame_ring import FrameRing, MosaicBoard, FRAME_SHAPE
+from perf import PERF, export_summary
+from observation import copy_obs, observation_space, policy_for
+from policy_runtime import NumpyPolicy, load_policy
+from state_cache import default_start_pool
 
 # --- CONFIG ---
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
-GAME_SCALE = 3 
+GAME_SCALE = 3
+RENDER_EVERY = 2   # Emulator frames per GUI redraw (2 = 30 fps broadcast)
+DISPLAY_FPS = 60   # Broadcast window refresh cap (runs in its own process)
+HUD_FPS = 15       # HUD publishes per second at most; the panels are built only then
+PERF_REFRESH_SECONDS = 1.0             # Diagnostics panel / export cadence
+PERF_EXPORT_PATH = "models/perf.prom"  # .csv appends rows instead; None = panel only
+TRAJECTORY_DIR = "trajectories"        # Per-step binary records (see trajectory.py); None = memory only
+KEYFRAME_EVERY = 100                   # Replay keyframes (see timeline.py); saved next to the trajectory
+RECORDING_DIR = "recordings"           # What the window showed, deduplicated (see broadcast_recorder.py); None = off
+MODEL_LABEL = f"PPO ({policy_for(observation_space())})"
 
 # RETRO COLOR SCHEME
-COLOR_BG = (10, 10, 15)       
-COLOR_PANEL = (25, 25, 30)    
+COLOR_BG = (10, 10, 15)
+COLOR_PANEL = (25, 25, 30)
 COLOR_TEXT_MAIN = (240, 240, 240)
-COLOR_TEXT_LOG = (0, 255, 0)  
-COLOR_ACCENT = (255, 215, 0)  
+COLOR_TEXT_LOG = (0, 255, 0)
+COLOR_ACCENT = (255, 215, 0)
 COLOR_HP_HIGH = (50, 205, 50)
 COLOR_HP_LOW = (220, 20, 60)
 COLOR_BORDER = (100, 100, 100)
 
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-    pygame.display.set_caption("POKEMON AI - BROADCAST GUI")
-    clock = pygame.time.Clock()
-    
-    # Fonts
+def hud_state(env, brain_status, diagnostics=()):
+    """Everything the broadcast window shows besides the game screen."""
+    return {
+        "cookies": env.cookies,
+        "bonks": env.bonks,
+        "total_steps": env.total_steps,
+        "last_brain_update": env.last_brain_update,
+        "current_objective": env.current_objective,
+        "party_info": env.party_info,
+        "log_history": env.log_lines(),
+        "graveyard": list(env.graveyard),
+        "brain_status": brain_status,
+        "diagnostics": list(diagnostics),
+        "explore": explore_state(env.exploration, env.map_id),
+    }
+
+class HudPacer:
+    """Says when to publish the HUD: once per new agent step, at most HUD_FPS times a second."""
+
+    def __init__(self):
+        self.step = -1
+        self.next_time = 0.0
+
+    def due(self, step):
+        if step == self.step:
+            return False
+        now = time.monotonic()
+        if now < self.next_time:
+            return False   # A later display frame picks the step up
+        self.step, self.next_time = step, now + 1.0 / HUD_FPS
+        return True
+
+def explore_state(index, map_id):
+    """Heatmap panel content; the image is only rebuilt when a new cell was visited."""
+    heat = index.heatmap(map_id)
+    return [map_id, index.version, index.cells, len(index.pages),
+            heat.shape[0], heat.shape[1], base64.b64encode(heat.tobytes()).decode("ascii")]
+
+def diagnostics_lines(actor, learner, dropped_batches, recording=None):
+    """Panel text from the actor's and the learner's PERF summaries."""
+    def ms(stats, phase, key="p50_ms"):
+        return f"{stats[phase][key]:.1f}" if phase in stats else "-"
+
+    step = actor.get("step")
+    if step is None:
+        return ["STEP: warming up..."]
+    busy = sum(actor[p]["mean_ms"] for p in ("emulator", "render_callback", "update_data") if p in actor)
+    share = lambda p: f"{100 * actor[p]['mean_ms'] / busy:.0f}%" if p in actor and busy else "-"
+    return [
+        f"STEP: {step['rate']:.1f}/s | p50 {ms(actor, 'step')} ms | p99 {ms(actor, 'step', 'p99_ms')} ms"
+        f" | PREDICT p50 {ms(actor, 'predict')} ms",
+        f"EMU {share('emulator')} | RENDER {share('render_callback')} | UPDATE_DATA {share('update_data')}",
+        f"LEARNER: update p50 {ms(learner, 'learner_update')} ms | save p50 {ms(learner, 'learner_save')} ms"
+        f" | idle p50 {ms(learner, 'learner_idle')} ms",
+        f"STALL: swap p99 {ms(actor, 'swap', 'p99_ms')} ms | dropped batches {dropped_batches}",
+    ] + ([f"REC: {recording['stored']} frames ({recording['bytes'] / 1e6:.1f} MB) | {recording['repeats']} repeats"
+          f" skipped | {recording['dropped']} dropped"] if recording else [])
+
+def load_fonts():
     try:
         font_head = pygame.font.SysFont("impact", 20)
         font_emoji = pygame.font.SysFont("segoe ui emoji", 20)
-        font_mono = pygame.font.SysFont("consolas", 14) 
+        font_mono = pygame.font.SysFont("consolas", 14)
         font_small = pygame.font.SysFont("arial", 14)
     except:
         font_head = pygame.font.SysFont("arial", 20, bold=True)
         font_emoji = pygame.font.SysFont("arial", 20)
         font_mono = pygame.font.SysFont("courier new", 14)
         font_small = pygame.font.SysFont("arial", 14)
-    
-    print(">> GUI: Initializing Environment...")
-    env = NuzlockeEnv("PokemonRed.gb", "states/outside.state")
-    
-    print(">> GUI: Loading Brain...")
-    try:
-        model = PPO.load("models/PPO/nuzlocke_live", env=env)
-        brain_status = "RESUMED (v.LIVE)"
-    except:
-        model = PPO('MlpPolicy', env, verbose=0)
-        brain_status = "CREATED NEW (v.0)"
+    return font_head, font_emoji, font_mono, font_small
+
+# --- LAYOUT ---
+GAME_X = (WINDOW_WIDTH - (160 * GAME_SCALE)) // 2
+GAME_Y = 60
+PANEL_Y = 60
+BOTTOM_BOX_X = 340
+BOTTOM_BOX_Y = GAME_Y + (144*GAME_SCALE) + 10
+BOTTOM_BOX_W = (WINDOW_WIDTH - 320) - 320 - 40
+BOTTOM_BOX_H = WINDOW_HEIGHT - BOTTOM_BOX_Y - 10
+GRAVE_Y = PANEL_Y + 350
+HEAT_Y = PANEL_Y + 510
+HEAT_AREA = (280, 80)   # Heatmap is scaled to fit this, keeping its aspect
+
+# Regions that get repainted (and pushed to the display) when their content changes
+RECT_HEADER = pygame.Rect(0, 10, WINDOW_WIDTH, 40)
+RECT_GAME = pygame.Rect(GAME_X, GAME_Y, 160 * GAME_SCALE, 144 * GAME_SCALE)
+RECT_TEAM = pygame.Rect(21, PANEL_Y + 45, 298, 454)
+RECT_LOG = pygame.Rect(WINDOW_WIDTH - 319, PANEL_Y + 45, 298, GRAVE_Y - PANEL_Y - 45)
+RECT_GRAVE = pygame.Rect(WINDOW_WIDTH - 319, GRAVE_Y + 30, 298, 8 * 20)
+RECT_DIAG = pygame.Rect(BOTTOM_BOX_X + 1, BOTTOM_BOX_Y + 35, BOTTOM_BOX_W - 2, BOTTOM_BOX_H - 36)
+RECT_HEAT = pygame.Rect(21, HEAT_Y + 30, 298, WINDOW_HEIGHT - HEAT_Y - 41)
+
+# Mosaic: every worker's screen in a grid under the header, as large as fits
+MOSAIC_Y = 60
+MOSAIC_AREA = (WINDOW_WIDTH - 40, WINDOW_HEIGHT - MOSAIC_Y - 10)
+MOSAIC_GAP = 4
+
+TEXT_CACHE_SIZE = 512
+
+class TextCache:
+    """font.render() results keyed by (font, text, colour), least recently used evicted first."""
+
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surf = self._surfaces.get(key)
+        if surf is None:
+            surf = font.render(text, True, color)
+            self._surfaces[key] = surf
+            if len(self._surfaces) > self.max_entries:
+                self._surfaces.popitem(last=False)
+        else:
+            self._surfaces.move_to_end(key)
+        return surf
+
+class BroadcastRenderer:
+    """
+    Draws the broadcast overlay. Panels, borders and titles are painted once
+    into a background layer; each update only repaints the regions whose
+    content changed and pushes just those rects to the display.
+    """
+
+    def __init__(self, screen, fonts, frame):
+        self.screen = screen
+        self.fonts = fonts
+        self.text = TextCache()
+        self.background = self._build_background()
+        self._drawn = {}  # region -> content it currently shows
+
+        # --- GAME SURFACES (allocated once) ---
+        # game_source wraps the RGBA frame buffer itself (no copy); each frame
+        # it is converted into a native-size surface in the window's pixel
+        # format and scaled straight into the game area. Nothing is allocated
+        # per frame.
+        self.game_source = pygame.image.frombuffer(frame, (160, 144), "RGBX")
+        self.game_native = pygame.Surface((160, 144), 0, self.screen)
+        self.game_target = self.screen.subsurface(RECT_GAME)
+        self.redraw()
+
+    def redraw(self):
+        """Repaints the whole window from the background (e.g. back from the mosaic)."""
+        self._drawn.clear()
+        self.screen.blit(self.background, (0, 0))
+        pygame.display.flip()
+
+    def _build_background(self):
+        font_head = self.fonts[0]
+        bg = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        bg.fill(COLOR_BG)
+
+        # Game border
+        pygame.draw.rect(bg, COLOR_BORDER, (GAME_X-4, GAME_Y-4, (160*GAME_SCALE)+8, (144*GAME_SCALE)+8))
+
+        # Left panel
+        pygame.draw.rect(bg, COLOR_PANEL, (20, PANEL_Y, 300, 500))
+        pygame.draw.rect(bg, COLOR_ACCENT, (20, PANEL_Y, 300, 500), 1)
+        bg.blit(font_head.render("ACTIVE TEAM", True, COLOR_ACCENT), (30, PANEL_Y + 10))
+
+        # Right panel + graveyard divider
+        pygame.draw.rect(bg, COLOR_PANEL, (WINDOW_WIDTH - 320, PANEL_Y, 300, 500))
+        pygame.draw.rect(bg, COLOR_ACCENT, (WINDOW_WIDTH - 320, PANEL_Y, 300, 500), 1)
+        bg.blit(font_head.render("TERMINAL LOG", True, COLOR_ACCENT), (WINDOW_WIDTH - 310, PANEL_Y + 10))
+        pygame.draw.line(bg, (100, 100, 100), (WINDOW_WIDTH - 310, GRAVE_Y), (WINDOW_WIDTH - 30, GRAVE_Y), 1)
+        bg.blit(font_head.render("GRAVEYARD", True, (200, 50, 50)), (WINDOW_WIDTH - 310, GRAVE_Y + 5))
+
+        # Exploration panel (under the team)
+        pygame.draw.rect(bg, COLOR_PANEL, (20, HEAT_Y, 300, WINDOW_HEIGHT - HEAT_Y - 10))
+        pygame.draw.rect(bg, COLOR_ACCENT, (20, HEAT_Y, 300, WINDOW_HEIGHT - HEAT_Y - 10), 1)
+        bg.blit(font_head.render("EXPLORED", True, COLOR_ACCENT), (30, HEAT_Y + 5))
+
+        # Bottom panel
+        pygame.draw.rect(bg, COLOR_PANEL, (BOTTOM_BOX_X, BOTTOM_BOX_Y, BOTTOM_BOX_W, BOTTOM_BOX_H))
+        pygame.draw.rect(bg, (50, 50, 100), (BOTTOM_BOX_X, BOTTOM_BOX_Y, BOTTOM_BOX_W, BOTTOM_BOX_H), 1)
+        bg.blit(font_head.render("NEURAL NET DIAGNOSTICS", True, (100, 200, 255)), (BOTTOM_BOX_X + 10, BOTTOM_BOX_Y + 10))
+        return bg
+
+    def _repaint(self, rect, content, painter, dirty):
+        """Restores rect from the background and redraws it, unless content is unchanged."""
+        if self._drawn.get(rect.topleft) == content:
+            return
+        self._drawn[rect.topleft] = content
+        self.screen.blit(self.background, rect, rect)
+        painter(content)
+        dirty.append(rect)
+
+    def draw(self, hud=None, new_frame=True):
+        """Pushes the new game frame and/or a new HUD snapshot (None = unchanged)."""
+        dirty = []
 
-    # --- THE RENDER CALLBACK ---
-    # This function is sent to the emulator so it can force a redraw 
-    # whenever it wants (even inside loops)
-    def draw_frame():
-        # Process events so the window doesn't freeze
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                env.close()
-                pygame.quit()
-                sys.exit()
-
-        screen.fill(COLOR_BG)
-
-        # 1. HEADER
-        header_text = f"COOKIES: {env.cookies}   BONKS: {env.bonks}   STEPS: {env.total_steps}   LAST REV: {env.last_brain_update}   OBJ: {env.current_objective}"
-        header_surf = font_head.render(header_text, True, COLOR_TEXT_MAIN)
-        screen.blit(header_surf, (WINDOW_WIDTH//2 - header_surf.get_width()//2, 20))
-        
         # 2. GAME AREA
-        raw_screen = env.render()
-        if raw_screen.shape == (144, 160, 3):
-            game_surface = pygame.surfarray.make_surface(raw_screen.swapaxes(0, 1))
-            game_surface = pygame.transform.scale(game_surface, (160 * GAME_SCALE, 144 * GAME_SCALE))
-            game_x = (WINDOW_WIDTH - (160 * GAME_SCALE)) // 2
-            game_y = 60
-            pygame.draw.rect(screen, COLOR_BORDER, (game_x-4, game_y-4, (160*GAME_SCALE)+8, (144*GAME_SCALE)+8))
-            screen.blit(game_surface, (game_x, game_y))
-
-        # 3. LEFT PANEL
-        panel_y = 60
-        pygame.draw.rect(screen, COLOR_PANEL, (20, panel_y, 300, 500))
-        pygame.draw.rect(screen, COLOR_ACCENT, (20, panel_y, 300, 500), 1)
-        title_surf = font_head.render("ACTIVE TEAM", True, COLOR_ACCENT)
-        screen.blit(title_surf, (30, panel_y + 10))
-        
-        y_offset = panel_y + 50
-        for mon in env.party_info:
+        if new_frame:
+            self.game_native.blit(self.game_source, (0, 0))
+            pygame.transform.scale(self.game_native, RECT_GAME.size, self.game_target)
+            dirty.append(RECT_GAME)
+
+        if hud is not None:
+            header_text = f"COOKIES: {hud['cookies']}   BONKS: {hud['bonks']}   STEPS: {hud['total_steps']}   LAST REV: {hud['last_brain_update']}   OBJ: {hud['current_objective']}"
+            self._repaint(RECT_HEADER, header_text, self._draw_header, dirty)
+            self._repaint(RECT_TEAM, tuple(tuple(mon.values()) for mon in hud['party_info']),
+                          lambda _: self._draw_team(hud['party_info']), dirty)
+            self._repaint(RECT_LOG, tuple(hud['log_history'][::-1][:11]), self._draw_log, dirty)
+            self._repaint(RECT_GRAVE, tuple(hud['graveyard']), self._draw_graveyard, dirty)
+            self._repaint(RECT_DIAG, (hud['brain_status'],) + tuple(hud['diagnostics']), self._draw_diagnostics, dirty)
+            self._repaint(RECT_HEAT, tuple(hud['explore']), self._draw_heatmap, dirty)
+
+        if dirty:
+            pygame.display.update(dirty)
+
+    # 1. HEADER
+    def _draw_header(self, header_text):
+        header_surf = self.text.render(self.fonts[0], header_text, COLOR_TEXT_MAIN)
+        self.screen.blit(header_surf, (WINDOW_WIDTH//2 - header_surf.get_width()//2, 20))
+
+    # 3. LEFT PANEL
+    def _draw_team(self, party_info):
+        _, font_emoji, _, font_small = self.fonts
+        y_offset = PANEL_Y + 50
+        for mon in party_info:
             line1 = f"{mon['emoji']} {mon['name']} (L{mon['lvl']})"
-            screen.blit(font_emoji.render(line1, True, COLOR_TEXT_MAIN), (30, y_offset))
+            self.screen.blit(self.text.render(font_emoji, line1, COLOR_TEXT_MAIN), (30, y_offset))
             line2 = f"{mon['species']} [{mon['type']}]"
-            screen.blit(font_small.render(line2, True, (150, 150, 150)), (30, y_offset + 20))
+            self.screen.blit(self.text.render(font_small, line2, (150, 150, 150)), (30, y_offset + 20))
             bar_y = y_offset + 40
-            pygame.draw.rect(screen, (40, 40, 40), (30, bar_y, 200, 8)) 
+            pygame.draw.rect(self.screen, (40, 40, 40), (30, bar_y, 200, 8))
             fill_width = int(200 * mon['pct'])
             hp_color = COLOR_HP_HIGH if mon['pct'] > 0.5 else COLOR_HP_LOW
-            pygame.draw.rect(screen, hp_color, (30, bar_y, fill_width, 8)) 
+            pygame.draw.rect(self.screen, hp_color, (30, bar_y, fill_width, 8))
             hp_txt = f"{mon['hp']}/{mon['max_hp']}"
-            screen.blit(font_small.render(hp_txt, True, (200,200,200)), (240, bar_y - 5))
+            self.screen.blit(self.text.render(font_small, hp_txt, (200,200,200)), (240, bar_y - 5))
             y_offset += 70
 
-        # 4. RIGHT PANEL
-        pygame.draw.rect(screen, COLOR_PANEL, (WINDOW_WIDTH - 320, panel_y, 300, 500))
-        pygame.draw.rect(screen, COLOR_ACCENT, (WINDOW_WIDTH - 320, panel_y, 300, 500), 1)
-        log_title = font_head.render("TERMINAL LOG", True, COLOR_ACCENT)
-        screen.blit(log_title, (WINDOW_WIDTH - 310, panel_y + 10))
-        log_y = panel_y + 50
-        for i, log in enumerate(list(env.log_history)[::-1]):
-            if i > 10: break 
+    # 4. RIGHT PANEL
+    def _draw_log(self, lines):
+        font_mono = self.fonts[2]
+        log_y = PANEL_Y + 50
+        for log in lines:
             color = COLOR_ACCENT if "***" in log else COLOR_TEXT_LOG
-            log_surf = font_mono.render(log, True, color)
-            screen.blit(log_surf, (WINDOW_WIDTH - 310, log_y))
+            self.screen.blit(self.text.render(font_mono, log, color), (WINDOW_WIDTH - 310, log_y))
             log_y += 18
 
-        # GRAVEYARD
-        grave_y = panel_y + 350
-        pygame.draw.line(screen, (100, 100, 100), (WINDOW_WIDTH - 310, grave_y), (WINDOW_WIDTH - 30, grave_y), 1)
-        grave_title = font_head.render("GRAVEYARD", True, (200, 50, 50))
-        screen.blit(grave_title, (WINDOW_WIDTH - 310, grave_y + 5))
-        gy_offset = grave_y + 30
-        for dead_mon in env.graveyard:
-            screen.blit(font_emoji.render(f"✝ {dead_mon}", True, (150, 150, 150)), (WINDOW_WIDTH - 310, gy_offset))
+    def _draw_graveyard(self, graveyard):
+        font_emoji = self.fonts[1]
+        gy_offset = GRAVE_Y + 30
+        for dead_mon in graveyard:
+            self.screen.blit(self.text.render(font_emoji, f"✝ {dead_mon}", (150, 150, 150)), (WINDOW_WIDTH - 310, gy_offset))
             gy_offset += 20
 
-        # 5. BOTTOM PANEL
-        bottom_box_y = game_y + (144*GAME_SCALE) + 10
-        bottom_box_h = 720 - bottom_box_y - 10
-        bottom_box_w = (WINDOW_WIDTH - 320) - 320 - 40 
-        bottom_box_x = 340 
-        pygame.draw.rect(screen, COLOR_PANEL, (bottom_box_x, bottom_box_y, bottom_box_w, bottom_box_h))
-        pygame.draw.rect(screen, (50, 50, 100), (bottom_box_x, bottom_box_y, bottom_box_w, bottom_box_h), 1)
-        
-        info_title = font_head.render("NEURAL NET DIAGNOSTICS", True, (100, 200, 255))
-        screen.blit(info_title, (bottom_box_x + 10, bottom_box_y + 10))
-        status_txt = f"STATUS: {brain_status} | MODEL: PPO (MlpPolicy)"
-        screen.blit(font_small.render(status_txt, True, COLOR_TEXT_MAIN), (bottom_box_x + 10, bottom_box_y + 40))
-        learn_txt = f"LEARNING RATE: Adaptive | BATCH: 2048 | GAMMA: 0.99"
-        screen.blit(font_small.render(learn_txt, True, COLOR_TEXT_MAIN), (bottom_box_x + 10, bottom_box_y + 60))
+    # 5. BOTTOM PANEL
+    def _draw_diagnostics(self, lines):
+        font_small = self.fonts[3]
+        brain_status, perf_lines = lines[0], lines[1:]
+        status_txt = f"STATUS: {brain_status} | MODEL: {MODEL_LABEL}"
+        self.screen.blit(self.text.render(font_small, status_txt, COLOR_TEXT_MAIN), (BOTTOM_BOX_X + 10, BOTTOM_BOX_Y + 40))
+        y = BOTTOM_BOX_Y + 60
+        for line in perf_lines:
+            self.screen.blit(self.text.render(font_small, line, COLOR_TEXT_MAIN), (BOTTOM_BOX_X + 10, y))
+            y += 20
 
+    # 6. EXPLORATION PANEL
+    def _draw_heatmap(self, explore):
+        map_id, _, cells, maps, h, w, data = explore
+        summary = f"MAP {map_id} | {cells} TILES | {maps} MAPS"
+        self.screen.blit(self.text.render(self.fonts[3], summary, COLOR_TEXT_MAIN), (30, HEAT_Y + 30))
+
+        heat = np.frombuffer(base64.b64decode(data), dtype=np.uint8).reshape(h, w).T.astype(np.int32)   # surfarray is (x, y)
+        rgb = np.empty((w, h, 3), dtype=np.uint8)
+        rgb[..., 0] = np.where(heat > 0, 110 + heat * 145 // 255, COLOR_PANEL[0])
+        rgb[..., 1] = np.where(heat > 0, 30 + heat * 185 // 255, COLOR_PANEL[1])
+        rgb[..., 2] = np.where(heat > 0, 0, COLOR_PANEL[2])
+        scale = min(HEAT_AREA[0] / w, HEAT_AREA[1] / h)
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        self.screen.blit(pygame.transform.scale(pygame.surfarray.make_surface(rgb), size), (30, HEAT_Y + 52))
+
+class MosaicRenderer:
+    """
+    Wall of worker screens. The grid area of the window is the atlas: each
+    tile is a subsurface of it, with its own frombuffer surface over a local
+    copy of the frame. A redraw only touches tiles whose sequence number
+    moved (workers don't bump it for identical frames) and pushes just their
+    rects, so the cost follows the number of changed tiles, not of workers.
+    """
+
+    def __init__(self, screen, fonts, n_tiles):
+        self.screen = screen
+        self.fonts = fonts
+        self.text = TextCache()
+        cols = math.ceil(math.sqrt(n_tiles))
+        rows = math.ceil(n_tiles / cols)
+        scale = min((MOSAIC_AREA[0] - MOSAIC_GAP * (cols - 1)) / (cols * 160),
+                    (MOSAIC_AREA[1] - MOSAIC_GAP * (rows - 1)) / (rows * 144))
+        tile_w, tile_h = max(1, int(160 * scale)), max(1, int(144 * scale))
+        x0 = (WINDOW_WIDTH - cols * tile_w - (cols - 1) * MOSAIC_GAP) // 2
+        self.rects = [pygame.Rect(x0 + (i % cols) * (tile_w + MOSAIC_GAP), MOSAIC_Y + (i // cols) * (tile_h + MOSAIC_GAP),
+                                  tile_w, tile_h) for i in range(n_tiles)]
+
+        self.frames = np.zeros((n_tiles,) + FRAME_SHAPE, dtype=np.uint8)
+        self.seen = np.zeros(n_tiles, dtype=np.int64)   # Tile sequence number currently drawn
+        self.sources = [pygame.image.frombuffer(self.frames[i], (160, 144), "RGBX") for i in range(n_tiles)]
+        self.native = pygame.Surface((160, 144), 0, self.screen)
+        self.targets = [self.screen.subsurface(rect) for rect in self.rects]
+        self.background = self._build_background()
+
+    def _build_background(self):
+        bg = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        bg.fill(COLOR_BG)
+        title = f"MOSAIC: {len(self.rects)} WORKERS  |  CLICK A TILE TO FOLLOW IT, ESC / RIGHT CLICK TO COME BACK"
+        title_surf = self.fonts[0].render(title, True, COLOR_TEXT_MAIN)
+        bg.blit(title_surf, (WINDOW_WIDTH // 2 - title_surf.get_width() // 2, 20))
+        for rect in self.rects:
+            pygame.draw.rect(bg, COLOR_BORDER, rect.inflate(2, 2), 1)
+        return bg
+
+    def redraw(self):
+        """Whole window from the local frame copies (after the full HUD was up)."""
+        self.screen.blit(self.background, (0, 0))
+        for i in range(len(self.rects)):
+            self._draw_tile(i)
         pygame.display.flip()
 
-    # Register the callback
-    env.set_render_callback(draw_frame)
+    def draw(self, board):
+        """Redraws the tiles that changed on board; returns how many."""
+        dirty = []
+        for i in np.flatnonzero(board.tile_seq != self.seen):
+            seq = board.read_tile(i, self.frames[i])
+            if seq < 0:
+                continue   # Mid-write; picked up on the next poll
+            self.seen[i] = seq
+            self._draw_tile(i)
+            dirty.append(self.rects[i])
+        if dirty:
+            pygame.display.update(dirty)
+        return len(dirty)
+
+    def _draw_tile(self, i):
+        self.native.blit(self.sources[i], (0, 0))
+        pygame.transform.scale(self.native, self.rects[i].size, self.targets[i])
+        self.targets[i].blit(self.text.render(self.fonts[3], f"#{i}", COLOR_ACCENT), (3, 1))
+
+    def tile_at(self, pos):
+        for i, rect in enumerate(self.rects):
+            if rect.collidepoint(pos):
+                return i
+        return None
+
+def run_mosaic(board_name):
+    """
+    Mosaic window process for a NuzlockeVecEnv started with mosaic=board_name.
+    Clicking a tile promotes that worker to the full broadcast HUD; Esc or a
+    right click goes back. Like run_display, it never holds up the workers.
+    """
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption("POKEMON AI - MOSAIC")
+    clock = pygame.time.Clock()
+    board = MosaicBoard(name=board_name)
+    fonts = load_fonts()
+    focus_frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    broadcast = BroadcastRenderer(screen, fonts, focus_frame)
+    mosaic = MosaicRenderer(screen, fonts, board.n_tiles)
+    mosaic.redraw()
+    focus_seq = -1
+    try:
+        while not board.stopped:
+            selected = board.selected
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    board.request_stop()
+                elif selected < 0 and event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    tile = mosaic.tile_at(event.pos)
+                    if tile is not None:
+                        selected, focus_seq = tile, -1
+                        board.select(tile)
+                        broadcast.redraw()
+                elif selected >= 0 and ((event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE)
+                                        or (event.type == pygame.MOUSEBUTTONDOWN and event.button == 3)):
+                    selected = -1
+                    board.select(-1)
+                    mosaic.redraw()
+
+            if selected < 0:
+                mosaic.draw(board)
+            else:
+                new_frame = False
+                if board.tile_seq[selected] != focus_seq:
+                    seq = board.read_tile(selected, focus_frame)
+                    if seq >= 0:
+                        focus_seq, new_frame = seq, True
+                hud = board.read_hud()
+                if hud is not None and hud.get("worker") != selected:
+                    hud = None   # Published before the switch
+                if new_frame or hud is not None:
+                    broadcast.draw(hud, new_frame)
+            clock.tick(DISPLAY_FPS)
+    finally:
+        board.close()
+        pygame.quit()
+
+def run_display(ring_name):
+    """
+    Broadcast window process. Shows whatever the emulator published last,
+    at DISPLAY_FPS; a stalled window never holds up the emulator.
+    """
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption("POKEMON AI - BROADCAST GUI")
+    clock = pygame.time.Clock()
+    ring = FrameRing(ring_name)
+    frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    renderer = BroadcastRenderer(screen, load_fonts(), frame)
+    try:
+        while not ring.stopped:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    ring.request_stop()
+
+            new_frame = ring.read_frame(frame)
+            hud = ring.read_hud()
+
+            # Nothing new -> nothing to redraw (stale frames are simply skipped)
+            if new_frame or hud is not None:
+                renderer.draw(hud, new_frame)
+            clock.tick(DISPLAY_FPS)
+    finally:
+        ring.close()
+        pygame.quit()
+
+def main():
+    # --- BROADCAST WINDOW (separate process, fed through shared memory) ---
+    ring = FrameRing(create=True)
+    display = mp.get_context("spawn").Process(target=run_display, args=(ring.name,), daemon=True)
+    display.start()
+
+    print(">> GUI: Initializing Environment...")
+    env = NuzlockeEnv("PokemonRed.gb", default_start_pool(), headless=False,
+                      render_every=RENDER_EVERY, trajectory_dir=TRAJECTORY_DIR,
+                      keyframe_every=KEYFRAME_EVERY)
+
+    print(">> GUI: Loading Brain...")
+    # The actor only runs inference, in NumPy (policy_runtime) so it starts
+    # without torch; PPO updates happen in the learner process, which
+    # streams back new weights to hot-swap between steps. Until the first
+    # ones arrive it acts on the last export, or randomly if there is none.
+    policy = load_policy(env.observation_space)
+    brain_status = "RESUMED (v.LIVE)" if policy is not None else "WAITING FOR LEARNER"
+    learner = LearnerClient(env.observation_space, env.action_space)
+    recorder = BroadcastRecorder(os.path.join(RECORDING_DIR, env.trajectory.run)) if RECORDING_DIR else None
+
+    # --- THE RENDER CALLBACK ---
+    # Fired by the emulator on display frames (even inside loops and during
+    # model.learn rollouts). It only drops the frame (and the HUD, when
+    # hud_pacer says so) into shared memory; the window process does the drawing.
+    hud_pacer = HudPacer()
+    def publish_frame():
+        frame = env.screen_buffer()
+        ring.write_frame(frame)
+        if recorder is not None:
+            recorder.push(frame, env.frame_count)
+        if hud_pacer.due(env.total_steps):
+            ring.write_hud(hud_state(env, brain_status, diagnostics))
+
+    env.set_render_callback(publish_frame)
 
-    running = True
     obs, _ = env.reset()
-    
+    episode_start = True
+    best_badges = env.badges
+    diagnostics = diagnostics_lines({}, {}, 0)
+    next_perf = time.monotonic() + PERF_REFRESH_SECONDS
+    t_swap, t_predict, t_step = PERF.phase("swap"), PERF.phase("predict"), PERF.phase("step")
+    ring.write_hud(hud_state(env, brain_status, diagnostics))
+
     try:
-        while running:
+        while not ring.stopped:
+            # --- HOT SWAP (never waits on the learner) ---
+            update = learner.poll_weights()
+            if update is not None:
+                version, weights = update
+                with t_swap:
+                    if policy is None:
+                        policy = NumpyPolicy(env.observation_space, weights)
+                    else:
+                        policy.load(weights)
+                if version > 0:
+                    env.trigger_brain_review()
+                brain_status = f"LIVE (v.{version})"
+
             # We still need a main loop to drive the AI decisions
-            action, _ = model.predict(obs)
-            obs, reward, done, trunc, info = env.step(action)
-            
-            if env.total_steps % 2048 == 0:
-                env.trigger_brain_review()
-                model.learn(total_timesteps=2048, reset_num_timesteps=False)
-                model.save("models/PPO/nuzlocke_live")
+            # The learner scores the rollout with these, not with whatever policy it has by then
+            with t_predict:
+                if policy is not None:
+                    action, log_prob, value = policy.step(obs)
+                else:
+                    action, log_prob, value = env.action_space.sample(), -math.log(env.action_space.n), None
+            transition_obs = copy_obs(obs)   # step() overwrites the obs arrays in place
+            with t_step:
+                next_obs, reward, done, trunc, info = env.step(action)
+            learner.record(transition_obs, action, reward, episode_start, log_prob, value)
+
+            # --- DIAGNOSTICS (panel text only changes once a second) ---
+            if time.monotonic() >= next_perf:
+                next_perf += PERF_REFRESH_SECONDS
+                actor_stats = PERF.summary()
+                diagnostics = diagnostics_lines(actor_stats, learner.stats, learner.dropped_batches,
+                                                recorder.stats() if recorder else None)
+                if PERF_EXPORT_PATH:
+                    export_summary(PERF_EXPORT_PATH, {**actor_stats, **learner.stats})
+            if env.badges > best_badges:
+                best_badges = env.badges
+                learner.milestone(f"badge_{best_badges}")
+
+            episode_start = done or trunc
+            obs = env.reset()[0] if episode_start else next_obs
 
     finally:
         print(">> GUI: Saving Brain before shutdown...")
-        model.save("models/PPO/nuzlocke_live")
+        learner.close()
+        if recorder is not None:
+            recorder.close()
+        if TRAJECTORY_DIR and env.timeline:
+            env.timeline.save(os.path.join(TRAJECTORY_DIR, f"{env.trajectory.run}.timeline.npz"))
+        if TRAJECTORY_DIR:
+            env.exploration.save(os.path.join(TRAJECTORY_DIR, f"{env.trajectory.run}.explore.npz"))
         env.close()
-        pygame.quit()
+        ring.request_stop()
+        display.join(timeout=5)
+        ring.close()
         sys.exit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
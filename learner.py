@@ -0,0 +1,215 @@
+import queue
+import time
+import multiprocessing as mp
+
+import gymnasium as gym
+import numpy as np
+
+from checkpoints import CheckpointWriter, latest_valid
+from observation import copy_obs, policy_for
+from perf import PERF
+from policy_runtime import POLICY_EXPORT_PATH, export_policy, model_state
+
+# torch / stable_baselines3 are imported inside the functions that need them:
+# the actor (gui_stream) imports this module and must start without them.
+
+# --- CONFIG ---
+MODEL_PATH = "models/PPO/nuzlocke_live"
+ROLLOUT_STEPS = 2048   # Transitions per brain update
+SEND_EVERY = 64        # Actor batches this many transitions per queue message
+QUEUE_BATCHES = 256    # Backlog the actor may build up before it starts dropping
+
+
+class _SpacesOnlyEnv(gym.Env):
+    """PPO wants an env to size its networks and rollout buffer; the learner never steps it."""
+
+    def __init__(self, observation_space, action_space):
+        self.observation_space = observation_space
+        self.action_space = action_space
+
+
+def load_or_create(env, model_path=MODEL_PATH, **kwargs):
+    """(model, status) - resumes the newest valid checkpoint if there is one."""
+    from stable_baselines3 import PPO
+    path = latest_valid(fallback=model_path + ".zip")
+    if path is not None:
+        try:
+            return PPO.load(path, env=env, **kwargs), "RESUMED (v.LIVE)"
+        except ValueError as e:
+            # Saved for another observation/action space (e.g. before pixel observations)
+            print(f">> Not resuming {path}: {e}")
+    return PPO(policy_for(env.observation_space), env, verbose=0, **kwargs), "CREATED NEW (v.0)"
+
+
+def _train_on(model, transitions, next_obs, next_start, next_value=None):
+    """
+    One PPO update on an actor-collected rollout. The log-probs and values
+    are the actor's own (the policy that actually chose the actions), so
+    the PPO ratio and value clipping see the right "old" policy; only the
+    ones the actor couldn't supply are computed here with the current one.
+    """
+    import torch as th
+    from stable_baselines3.common.utils import obs_as_tensor
+    actions = np.array([t[1] for t in transitions])
+    log_probs = np.array([np.nan if t[4] is None else t[4] for t in transitions], dtype=np.float32)
+    values = np.array([np.nan if t[5] is None else t[5] for t in transitions], dtype=np.float32)
+    last_values = np.array([np.nan if next_value is None else next_value], dtype=np.float32)
+
+    missing = np.isnan(log_probs) | np.isnan(values)
+    model.policy.set_training_mode(False)
+    with th.no_grad():
+        if missing.any():
+            rows = np.flatnonzero(missing)
+            current_values, current_log_probs, _ = model.policy.evaluate_actions(
+                obs_as_tensor(_stack([transitions[i][0] for i in rows]), model.device),
+                th.as_tensor(actions[rows], device=model.device))
+            log_probs[rows] = np.where(np.isnan(log_probs[rows]), current_log_probs.cpu().numpy(), log_probs[rows])
+            values[rows] = np.where(np.isnan(values[rows]), current_values.cpu().numpy().ravel(), values[rows])
+        if np.isnan(last_values[0]):
+            last_values = model.policy.predict_values(obs_as_tensor(_stack([next_obs]), model.device)).cpu().numpy()
+
+    buffer = model.rollout_buffer
+    buffer.reset()
+    values, log_probs = th.as_tensor(values), th.as_tensor(log_probs)
+    for i, (obs, action, reward, episode_start, _, _) in enumerate(transitions):
+        buffer.add(_stack([obs]), actions[i:i+1], np.array([reward]), np.array([episode_start]),
+                   values[i:i+1], log_probs[i:i+1])
+    buffer.compute_returns_and_advantage(last_values=th.as_tensor(last_values).ravel(), dones=np.array([next_start]))
+    model.train()
+    model.num_timesteps += len(transitions)
+
+
+def _stack(observations):
+    if isinstance(observations[0], dict):
+        return {k: np.stack([o[k] for o in observations]) for k in observations[0]}
+    return np.stack(observations)
+
+
+def run_learner(transitions_q, weights_q, observation_space, action_space, model_path=MODEL_PATH,
+                export_path=POLICY_EXPORT_PATH):
+    """
+    Learner process: turns the actor's transition stream into PPO updates
+    and publishes each new set of policy weights for the actor to hot-swap
+    (only the acting part - see policy_runtime - also exported to
+    export_path so the next stream starts with it).
+    """
+    from stable_baselines3.common.logger import Logger
+
+    env = _SpacesOnlyEnv(observation_space, action_space)
+    model, _ = load_or_create(env, model_path, n_steps=ROLLOUT_STEPS)
+    model.set_logger(Logger(folder=None, output_formats=[]))
+    checkpoints = CheckpointWriter()
+    version = 0
+    state = model_state(model)
+    weights_q.put((version, state, PERF.summary()))
+    export_policy(state, export_path)
+    t_idle, t_learn, t_save = PERF.phase("learner_idle"), PERF.phase("learner_update"), PERF.phase("learner_save")
+
+    rollout = []
+    while True:
+        with t_idle:
+            batch = transitions_q.get()
+        if batch is None:
+            break
+        if isinstance(batch, str):
+            checkpoints.milestone(model, batch)
+            continue
+        rollout.extend(batch)
+
+        # The transition after the last one supplies the bootstrap obs, and
+        # starts the next rollout.
+        while len(rollout) > model.n_steps:
+            obs, _, _, episode_start, _, value = rollout[model.n_steps]
+            with t_learn:
+                _train_on(model, rollout[:model.n_steps], obs, episode_start, value)
+            del rollout[:model.n_steps]
+            with t_save:
+                checkpoints.save(model)
+            version += 1
+            state = model_state(model)
+            weights_q.put((version, state, PERF.summary()))
+            with t_save:
+                export_policy(state, export_path)
+
+    checkpoints.save(model)
+    checkpoints.close()
+
+
+class LearnerClient:
+    """
+    Actor-side handle: streams transitions to the learner process without
+    ever waiting on it, and hands back fresh weights when there are some.
+    """
+
+    def __init__(self, observation_space, action_space, model_path=MODEL_PATH):
+        ctx = mp.get_context("spawn")
+        self.transitions_q = ctx.Queue(maxsize=QUEUE_BATCHES)
+        self.weights_q = ctx.Queue()
+        self.process = ctx.Process(target=run_learner, daemon=True,
+                                   args=(self.transitions_q, self.weights_q, observation_space, action_space, model_path))
+        self.process.start()
+        self._pending = []
+        self._milestones = []
+        self._dropped = False
+        self.dropped_batches = 0
+        self.stats = {}   # Learner's PERF summary as of its last publish
+
+    def record(self, obs, action, reward, episode_start, log_prob=None, value=None):
+        """
+        One transition. log_prob/value are the acting policy's (see
+        NumpyPolicy.step); the learner fills in any that are None.
+        """
+        if self._dropped:
+            # Transitions went missing; don't let GAE bridge the gap
+            episode_start, self._dropped = True, False
+        # Copy now: the queue pickles later, from its feeder thread
+        self._pending.append((copy_obs(obs), int(action), float(reward), bool(episode_start),
+                              None if log_prob is None else float(log_prob), None if value is None else float(value)))
+        if len(self._pending) >= SEND_EVERY:
+            try:
+                self.transitions_q.put_nowait(self._pending)
+            except queue.Full:
+                self._dropped = True
+                self.dropped_batches += 1
+            self._pending = []
+        self._send_milestones()
+
+    def milestone(self, tag):
+        """Ask the learner for a checkpoint that is kept forever (e.g. 'badge_3')."""
+        self._milestones.append(tag)
+        self._send_milestones()
+
+    def _send_milestones(self):
+        while self._milestones:
+            try:
+                self.transitions_q.put_nowait(self._milestones[0])
+            except queue.Full:
+                return  # Retried on the next record()
+            del self._milestones[0]
+
+    def poll_weights(self):
+        """Newest (version, weights) the learner published (older ones are skipped), or None."""
+        update = None
+        while True:
+            try:
+                version, weights, self.stats = self.weights_q.get_nowait()
+                update = version, weights
+            except queue.Empty:
+                return update
+
+    def close(self, timeout=60):
+        """Flushes the learner (it saves the brain on its way out); gives up after timeout."""
+        try:
+            if self.process.is_alive():
+                for tag in self._milestones:
+                    self.transitions_q.put(tag, timeout=timeout)
+                self.transitions_q.put(None, timeout=timeout)
+                deadline = time.monotonic() + timeout
+                while self.process.is_alive() and time.monotonic() < deadline:
+                    self.poll_weights()   # It can't exit while weights sit unread in its queue
+                    self.process.join(0.1)
+                return
+        except queue.Full:
+            pass
+        print(">> Learner is gone or stuck; closing without its final save")
+        self.transitions_q.cancel_join_thread()   # Don't hang at exit on batches nobody will read
@@ -1,7 +1,12 @@
 import os
-import glob
 import random
+import numpy as np
 from pyboy import PyBoy
+from state_cache import STATE_CACHE
+from ram_snapshot import RamSnapshot, PLAYER_SPANS, PARTY_SPANS, BAG_SPANS
+from events import EventTracker, Faint, ItemGained
+from go_explore import CellArchive
+from navigation import Navigator
 
 # --- CONFIGURATION ---
 ROM_PATH = "PokemonRed.gb"
@@ -27,68 +32,65 @@ def load_latest_state(pyboy):
         print("? Error: 'states' folder missing.")
         return False
         
-    files = glob.glob(os.path.join(STATES_DIR, "*.state"))
-    if not files:
+    # Listing and file bytes are cached, so reloading after a faint stays in memory
+    latest = STATE_CACHE.latest(STATES_DIR)
+    if latest is None:
         print("? Error: No .state files found!")
         return False
     
-    latest = max(files, key=os.path.getmtime)
     print(f"? Loading state: {os.path.basename(latest)}...")
-    with open(latest, "rb") as f:
-        pyboy.load_state(f)
+    STATE_CACHE.load(pyboy, latest)
     return True
 
-def check_inventory_for_parcel(pyboy):
-    """Scans memory for Oak's Parcel."""
-    item_count = pyboy.memory[0xD31D]
-    for i in range(item_count):
-        addr = 0xD31E + (i * 2)
-        if pyboy.memory[addr] == ITEM_ID_PARCEL:
-            return True
-    return False
-
-def get_gps_weights(curr_map, curr_x, curr_y):
-    """Drunken GPS Navigation."""
-    target_x, target_y = curr_x, curr_y
-    mode = "Roaming"
-    
-    # PALLET TOWN -> Go North
-    if curr_map == 0:
-        target_x, target_y = 10, 0
-        mode = "Go North (Route 1)"
-    # ROUTE 1 -> Go North
-    elif curr_map == 12:
-        target_x, target_y = 10, 0
-        mode = "Go North (Viridian)"
-    # VIRIDIAN CITY -> Go to Mart
-    elif curr_map == 1:
-        target_x, target_y = 29, 19
-        mode = "Find Mart"
-    # INSIDE MART -> Clerk
-    elif curr_map == 6:
-        target_x, target_y = 4, 1 
-        mode = "Talk to Clerk"
+def restart(pyboy):
+    """After a faint: usually a frontier cell from the archive, else the newest save state."""
+    if len(archive) and rng.random() < archive.explore_prob:
+        key = archive.load(pyboy, rng)
+        print(f"? Restarting from cell {key} ({len(archive)} archived)...")
+        return True
+    return load_latest_state(pyboy)
+
+# --- ROUTE ---
+# Per map: navigation target (see navigation.py) and the label shown in the log.
+# Indoor maps without an entry head for the nearest warp; outdoor ones roam.
+ROUTE = {
+    0:  ("north", "Go North (Route 1)"),   # PALLET TOWN
+    12: ("north", "Go North (Viridian)"),  # ROUTE 1
+    1:  ((29, 19), "Find Mart"),           # VIRIDIAN CITY
+    6:  ((4, 1), "Talk to Clerk"),         # INSIDE MART
+}
+ACTIONS = ['up', 'down', 'left', 'right', 'a', 'b']
+ROAM_WEIGHTS = [5, 5, 5, 5, 5, 2]
+NAV_NOISE = 0.1   # Share of random presses (talking, getting round NPCs that won't move)
+
+def get_gps_button(curr_map):
+    """Next button along the cached route for this map, or a random one."""
+    grid = navigator.grid(pyboy)
+    if curr_map in ROUTE:
+        target, mode = ROUTE[curr_map]
+    elif not grid.connections:
+        target, mode = "warp", "Exit Building"
     else:
-        # INDOORS -> Leave
-        return [0, 50, 5, 5, 20, 5], "Exit Building"
+        target, mode = None, "Roaming"
 
-    dx = target_x - curr_x
-    dy = target_y - curr_y
-    weights = [5, 5, 5, 5, 5, 2] 
-    
-    if dy < 0: weights[0] += 40 
-    if dy > 0: weights[1] += 40 
-    if dx < 0: weights[2] += 40 
-    if dx > 0: weights[3] += 40 
-    
-    return weights, mode
+    button = navigator.next_button(pyboy, target) if target is not None else None
+    if button is None or random.random() < NAV_NOISE:
+        button = random.choices(ACTIONS, weights=ROAM_WEIGHTS, k=1)[0]
+    return button, mode
 
 # --- MAIN EXECUTION ---
 pyboy = PyBoy(ROM_PATH, window_type="SDL2")
 pyboy.set_emulation_speed(1)
+ram = RamSnapshot(PLAYER_SPANS + PARTY_SPANS + BAG_SPANS)
+events = EventTracker(ram)
+events.attach(pyboy)
+archive = CellArchive()
+navigator = Navigator()
+rng = np.random.default_rng()
 
 if not load_latest_state(pyboy):
     exit()
+events.sync(pyboy)
 
 print("--- NUZLOCKE MODE ACTIVE ---")
 print("??? SPAWN PROTECTION: AI is invincible for 5 seconds.")
@@ -98,24 +100,32 @@ grace_period = 300 # 5 Seconds of immunity
 
 while pyboy.tick():
     step_count += 1
-    
-    # --- 1. HEALTH MONITOR (With Safety Checks) ---
-    hp_current = (pyboy.memory[MEM_HP_CURRENT] << 8) + pyboy.memory[MEM_HP_CURRENT + 1]
-    party_count = pyboy.memory[MEM_PARTY_COUNT]
-
-    # ONLY check for death if:
-    # 1. We have passed the grace period (Invincibility frame)
-    # 2. We actually have a Pokemon (Party > 0)
-    if step_count > grace_period and party_count > 0:
-        if hp_current == 0:
-            bonks += 1
-            print(f"\n?? FAINTED! (Bonks: {bonks}) - RESTARTING TIMELINE...")
-            load_latest_state(pyboy)
-            step_count = 0 # Reset invincibility timer on reload
-            continue 
+    events.sync(pyboy)
+    hp_current = (ram[MEM_HP_CURRENT] << 8) + ram[MEM_HP_CURRENT + 1]
+    vulnerable = step_count > grace_period and ram[MEM_PARTY_COUNT] > 0
+    # Events catch a faint that is healed within a step; the state check catches one that
+    # happened during the grace period (or was restored into), after which no event comes
+    fainted = vulnerable and hp_current == 0
+    parcel = False
+    for event in events.drain():
+        # Leader fainting only counts once the grace period (Invincibility frame) is over
+        if isinstance(event, Faint) and event.slot == 0 and vulnerable:
+            fainted = True
+        elif isinstance(event, ItemGained) and event.item_id == ITEM_ID_PARCEL:
+            parcel = True
+
+    # --- 1. HEALTH MONITOR ---
+    if fainted:
+        bonks += 1
+        print(f"\n?? FAINTED! (Bonks: {bonks}) - RESTARTING TIMELINE...")
+        restart(pyboy)
+        events.reset()
+        events.sync(pyboy)
+        step_count = 0 # Reset invincibility timer on reload
+        continue 
 
     # --- 2. OBJECTIVE MONITOR ---
-    if check_inventory_for_parcel(pyboy):
+    if parcel:
         cookies += 1
         print(f"\n?? COOKIE EARNED! Oak's Parcel Obtained!")
         if not os.path.exists(STATES_DIR): os.makedirs(STATES_DIR)
@@ -124,16 +134,13 @@ while pyboy.tick():
         print("? MISSION COMPLETE. Shutting down.")
         break
 
+    archive.observe(pyboy, ram, step_count)
+
     # --- 3. NAVIGATION ---
-    curr_map = pyboy.memory[MEM_MAP_ID]
-    curr_x   = pyboy.memory[MEM_X_COORD]
-    curr_y   = pyboy.memory[MEM_Y_COORD]
-    weights, mode = get_gps_weights(curr_map, curr_x, curr_y)
+    curr_map = ram[MEM_MAP_ID]
+    choice, mode = get_gps_button(curr_map)
     
     # --- 4. ACTION ---
-    actions = ['up', 'down', 'left', 'right', 'a', 'b']
-    choice = random.choices(actions, weights=weights, k=1)[0]
-    
     hold = 5
     for _ in range(hold):
         pyboy.button(choice)
@@ -0,0 +1,214 @@
+from collections import deque
+
+import numpy as np
+
+from ram_snapshot import MEM_MAP_ID, MEM_X_COORD, MEM_Y_COORD
+
+# --- MEMORY ADDRESSES (pokered WRAM) ---
+MEM_OVERWORLD_MAP       = 0xC6E8  # Block IDs of the current map, MAP_BORDER blocks of padding all round
+MEM_SPRITE_DATA_2       = 0xC200  # 16 x 16-byte sprite structs; +4/+5 = map Y/X plus 4
+MEM_MAP_HEIGHT          = 0xD368  # In blocks (2x2 steps)
+MEM_MAP_WIDTH           = 0xD369
+MEM_MAP_CONNECTIONS     = 0xD370  # Bit flags: north 8, south 4, west 2, east 1
+MEM_NUM_WARPS           = 0xD3AE
+MEM_WARPS               = 0xD3AF  # (y, x, dest warp, dest map) x MEM_NUM_WARPS
+MEM_NUM_SPRITES         = 0xD4E1
+MEM_TILESET_BANK        = 0xD52B
+MEM_TILESET_BLOCKS      = 0xD52C  # Little-endian pointer into MEM_TILESET_BANK
+MEM_TILESET_COLLISION   = 0xD530  # Little-endian pointer (home bank) to passable tile IDs, 0xFF-terminated
+
+MAP_BORDER = 3
+BLOCK_TILES = 4    # A block is 4x4 tiles = 2x2 steps
+MAX_SPRITES = 16
+
+# Edge targets: walk off the map through a connection
+CONNECTIONS = {"north": 8, "south": 4, "west": 2, "east": 1}
+EDGE_BUTTONS = {"north": "up", "south": "down", "west": "left", "east": "right"}
+MOVES = (("up", 0, -1), ("down", 0, 1), ("left", -1, 0), ("right", 1, 0))
+UNREACHABLE = np.iinfo(np.int32).max
+
+
+class MapGrid:
+    """
+    Walkability of one map in step units: walkable[y, x] is True where the
+    player can stand. Built from the block IDs in RAM and the tileset's
+    block + collision tables in ROM; like the game, a step is passable if
+    the lower-left tile of its 2x2 tile square is on the collision list.
+    Ledges count as walls and NPCs aren't included (they move).
+    """
+
+    def __init__(self, map_id, walkable, warps, connections):
+        self.map_id = map_id
+        self.walkable = walkable
+        self.warps = warps                # [(x, y, dest_map)]
+        self.connections = connections
+        self.fields = {}                  # target -> distance field
+
+    @property
+    def shape(self):
+        return self.walkable.shape
+
+    def seeds(self, target):
+        """Cells a target covers: a (x, y), 'warp', a warp's dest map id or an edge name."""
+        height, width = self.shape
+        if isinstance(target, tuple):
+            return [target]
+        if target == "warp":
+            return [(x, y) for x, y, _ in self.warps]
+        if isinstance(target, str):
+            if not self.connections & CONNECTIONS[target]:
+                return []
+            if target in ("north", "south"):
+                row = 0 if target == "north" else height - 1
+                return [(x, row) for x in range(width) if self.walkable[row, x]]
+            col = 0 if target == "west" else width - 1
+            return [(col, y) for y in range(height) if self.walkable[y, col]]
+        return [(x, y) for x, y, dest in self.warps if dest == target]
+
+    def distance_field(self, target):
+        """Steps to the nearest cell of target from every cell (BFS, cached per target)."""
+        field = self.fields.get(target)
+        if field is not None:
+            return field
+
+        height, width = self.shape
+        field = np.full((height, width), UNREACHABLE, dtype=np.int32)
+        queue = deque()
+        for x, y in self.seeds(target):
+            if 0 <= x < width and 0 <= y < height and field[y, x]:
+                field[y, x] = 0   # Targets count as reachable even if the tile isn't (doors, NPCs)
+                queue.append((x, y))
+        walkable = self.walkable
+        while queue:
+            x, y = queue.popleft()
+            d = field[y, x] + 1
+            for _, dx, dy in MOVES:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height and walkable[ny, nx] and field[ny, nx] > d:
+                    field[ny, nx] = d
+                    queue.append((nx, ny))
+        self.fields[target] = field
+        return field
+
+    def next_button(self, x, y, target, blocked=()):
+        """
+        Button that moves one step closer to target from (x, y): four
+        lookups in the cached field. None once there (or if it's
+        unreachable); at an edge target it's the button that walks off.
+        """
+        field = self.distance_field(target)
+        height, width = self.shape
+        if not (0 <= x < width and 0 <= y < height):
+            return None
+        here = field[y, x]
+        if here == 0:
+            return _edge_button(target)
+        best, best_d = None, here
+        for button, dx, dy in MOVES:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and field[ny, nx] < best_d and (nx, ny) not in blocked:
+                best, best_d = button, field[ny, nx]
+        return best
+
+
+def _edge_button(target):
+    return EDGE_BUTTONS.get(target) if isinstance(target, str) else None
+
+
+# --- RAM / ROM READERS ---
+def _word(mem, addr):
+    return mem[addr] | (mem[addr + 1] << 8)
+
+
+def _rom(mem, bank, addr):
+    return mem[addr] if addr < 0x4000 else mem[bank, addr]
+
+
+def read_collision_tiles(mem):
+    ptr = _word(mem, MEM_TILESET_COLLISION)
+    tiles = set()
+    for addr in range(ptr, ptr + 256):
+        tile = mem[addr]
+        if tile == 0xFF:
+            break
+        tiles.add(tile)
+    return tiles
+
+
+def read_warps(mem):
+    warps = []
+    for i in range(min(mem[MEM_NUM_WARPS], 32)):
+        base = MEM_WARPS + 4 * i
+        warps.append((mem[base + 1], mem[base], mem[base + 3]))
+    return warps
+
+
+def read_npcs(mem):
+    """(x, y) of every NPC sprite on the current map, in step units."""
+    npcs = set()
+    for i in range(1, min(mem[MEM_NUM_SPRITES] + 1, MAX_SPRITES)):
+        base = MEM_SPRITE_DATA_2 + 16 * i
+        npcs.add((mem[base + 5] - 4, mem[base + 4] - 4))
+    return npcs
+
+
+def build_grid(pyboy):
+    """MapGrid for the map the player is on (~1-2k memory reads; cache it)."""
+    mem = pyboy.memory
+    height, width = mem[MEM_MAP_HEIGHT], mem[MEM_MAP_WIDTH]
+    stride = width + 2 * MAP_BORDER
+    blocks = np.array([[mem[MEM_OVERWORLD_MAP + (by + MAP_BORDER) * stride + bx + MAP_BORDER]
+                        for bx in range(width)] for by in range(height)], dtype=np.uint8)
+
+    # Per block ID: which of its 2x2 steps are passable
+    passable = read_collision_tiles(mem)
+    bank, ptr = mem[MEM_TILESET_BANK], _word(mem, MEM_TILESET_BLOCKS)
+    steps = np.zeros((256, 2, 2), dtype=bool)
+    for block in np.unique(blocks):
+        base = ptr + int(block) * BLOCK_TILES * BLOCK_TILES
+        for sy in range(2):
+            for sx in range(2):
+                tile = _rom(mem, bank, base + (2 * sy + 1) * BLOCK_TILES + 2 * sx)
+                steps[block, sy, sx] = tile in passable
+
+    walkable = steps[blocks].transpose(0, 2, 1, 3).reshape(2 * height, 2 * width)
+    return MapGrid(mem[MEM_MAP_ID], walkable, read_warps(mem), mem[MEM_MAP_CONNECTIONS])
+
+
+class Navigator:
+    """
+    Routes the player around the current map. Grids are built the first
+    time a map is seen and distance fields the first time a target is
+    asked for on it, so every later decision is a handful of array reads.
+    """
+
+    def __init__(self):
+        self.grids = {}   # map_id -> MapGrid
+
+    def grid(self, pyboy):
+        map_id = pyboy.memory[MEM_MAP_ID]
+        grid = self.grids.get(map_id)
+        if grid is None:
+            grid = self.grids[map_id] = build_grid(pyboy)
+        return grid
+
+    def invalidate(self, map_id=None):
+        """Drop cached grids (e.g. after a tree is cut or a boulder moves)."""
+        if map_id is None:
+            self.grids.clear()
+        else:
+            self.grids.pop(map_id, None)
+
+    def next_button(self, pyboy, target, avoid_npcs=True):
+        mem = pyboy.memory
+        blocked = read_npcs(mem) if avoid_npcs else ()
+        return self.grid(pyboy).next_button(mem[MEM_X_COORD], mem[MEM_Y_COORD], target, blocked)
+
+    def distance(self, pyboy, target):
+        mem = pyboy.memory
+        grid = self.grid(pyboy)
+        x, y = mem[MEM_X_COORD], mem[MEM_Y_COORD]
+        height, width = grid.shape
+        if not (0 <= x < width and 0 <= y < height):
+            return UNREACHABLE
+        return int(grid.distance_field(target)[y, x])
@@ -1,104 +1,71 @@
 ﻿import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
-from pyboy import PyBoy
 from collections import deque
+from ram_snapshot import RamSnapshot
+from state_cache import StartStatePool
+from gen1_data import SPECIES, decode_names, decode_text
+from events import EventTracker, LevelUp, Faint, Capture, HpLoss
+from backends import pyboy_backend
+from perf import PERF, perf_counter
+from trajectory import TrajectoryRecorder, BUTTONS, format_record
+from timeline import Timeline
+from observation import Observer, OBS_SHAPE, FRAME_STACK
+from rewards import RewardEngine
+from exploration import ExplorationIndex
 
 class NuzlockeEnv(gym.Env):
-    def __init__(self, rom_path, state_path):
+    def __init__(self, rom_path, state_path, headless=True,
+                 hold_frames=16, cooldown_frames=16, render_every=None, backend=pyboy_backend,
+                 trajectory_dir=None, keyframe_every=None, archive=None, max_episode_steps=None,
+                 obs_mode="dict", obs_shape=OBS_SHAPE, frame_stack=FRAME_STACK, compute_reward=True):
         super(NuzlockeEnv, self).__init__()
         
         # 1. EMULATOR SETUP
-        self.pyboy = PyBoy(rom_path, window="SDL2") 
-        self.pyboy.set_emulation_speed(1)
+        # Headless = no window, uncapped speed, render callback never fired.
+        # The broadcast GUI opts out to keep the real-time SDL2 window.
+        # backend builds the emulator (PyBoy by default; see backends.py).
+        self.headless = headless
+        self.pyboy = backend(rom_path, headless)
         
-        with open(state_path, "rb") as f:
-            self.pyboy.load_state(f)
+        # --- START STATES ---
+        # state_path: one path, a list of paths, {path: weight} or a StartStatePool.
+        # Files are cached in memory; every reset() samples one from the pool.
+        if not isinstance(state_path, StartStatePool):
+            state_path = StartStatePool(state_path)
+        self.start_states = state_path
+        self.start_states.load(self.pyboy, self.np_random)
             
         self.action_space = spaces.Discrete(8)
-        self.observation_space = spaces.Box(low=0, high=255, shape=(10,), dtype=np.uint8)
+
+        # --- OBSERVATION (see observation.py) ---
+        # obs_mode: "dict" = {"screen": stacked downsampled frames, "ram": features},
+        # "pixels" or "ram" for just one of them. Arrays are reused between steps.
+        # Frames come from the last rendered tick, so render_every should divide a step;
+        # off-cadence tick loops (handle_nicknaming) end on a forced render to stay in phase.
+        self.observer = Observer(obs_mode, obs_shape, frame_stack)
+        self.observation_space = self.observer.space
         
         # --- RENDER HOOK ---
         self.render_callback = None
-        
-        # --- PHYSICAL APPEARANCE DATABASE ---
-        self.ROM_DB = {
-            153: ("Bulbasaur", "🐸", "GRS"), 154: ("Ivysaur", "🐸", "GRS"), 155: ("Venusaur", "🌺", "GRS"),
-            176: ("Charmander", "🦎", "FIR"), 178: ("Charmeleon", "🦎", "FIR"), 180: ("Charizard", "🐉", "FIR"),
-            177: ("Squirtle", "🐢", "WTR"), 179: ("Wartortle", "🐢", "WTR"), 181: ("Blastoise", "🐢", "WTR"),
-            123: ("Caterpie", "🐛", "BUG"), 124: ("Metapod", "Cocoon", "BUG"), 125: ("Butterfree", "🦋", "BUG"),
-            112: ("Weedle", "🐛", "BUG"), 113: ("Kakuna", "Cocoon", "BUG"), 114: ("Beedrill", "🐝", "BUG"),
-            36: ("Pidgey", "🐦", "FLY"), 150: ("Pidgeotto", "🦅", "FLY"), 151: ("Pidgeot", "🦅", "FLY"),
-            165: ("Rattata", "🐀", "NRM"), 166: ("Raticate", "🐀", "NRM"),
-            5: ("Spearow", "🐦", "FLY"), 35: ("Fearow", "🦅", "FLY"),
-            108: ("Ekans", "🐍", "PSN"), 45: ("Arbok", "🐍", "PSN"),
-            84: ("Pikachu", "🐭", "ELC"), 85: ("Raichu", "🐭", "ELC"),
-            96: ("Sandshrew", "🐁", "GND"), 97: ("Sandslash", "🦔", "GND"),
-            15: ("NidoranF", "🐇", "PSN"), 168: ("Nidorina", "🐇", "PSN"), 16: ("Nidoqueen", "👑", "PSN"),
-            3: ("NidoranM", "🐇", "PSN"), 167: ("Nidorino", "🐇", "PSN"), 7: ("Nidoking", "👑", "PSN"),
-            4: ("Clefairy", "🧚", "NRM"), 142: ("Clefable", "🧚", "NRM"),
-            82: ("Vulpix", "🦊", "FIR"), 83: ("Ninetales", "🦊", "FIR"),
-            100: ("Jigglypuff", "🎈", "NRM"), 101: ("Wigglytuff", "🎈", "NRM"),
-            107: ("Zubat", "🦇", "PSN"), 130: ("Golbat", "🦇", "PSN"),
-            185: ("Oddish", "🌱", "GRS"), 186: ("Gloom", "🌺", "GRS"), 187: ("Vileplume", "🌺", "GRS"),
-            109: ("Paras", "🦀", "BUG"), 46: ("Parasect", "🦀", "BUG"),
-            65: ("Venonat", "👾", "BUG"), 119: ("Venomoth", "🦋", "BUG"),
-            59: ("Diglett", "🥔", "GND"), 118: ("Dugtrio", "🥔", "GND"),
-            77: ("Meowth", "🐱", "NRM"), 144: ("Persian", "🐆", "NRM"),
-            47: ("Psyduck", "🦆", "WTR"), 128: ("Golduck", "🦆", "WTR"),
-            57: ("Mankey", "🐒", "FGT"), 117: ("Primeape", "🦍", "FGT"),
-            33: ("Growlithe", "🐕", "FIR"), 48: ("Arcanine", "🐕", "FIR"),
-            71: ("Poliwag", "tadpole", "WTR"), 110: ("Poliwhirl", "🐸", "WTR"), 143: ("Poliwrath", "🐸", "FGT"),
-            148: ("Abra", "🦊", "PSY"), 38: ("Kadabra", "🦊", "PSY"), 149: ("Alakazam", "🧙", "PSY"),
-            106: ("Machop", "💪", "FGT"), 41: ("Machoke", "💪", "FGT"), 126: ("Machamp", "💪", "FGT"),
-            188: ("Bellsprout", "🌱", "GRS"), 189: ("Weepinbell", "🌱", "GRS"), 190: ("Victreebel", "🌱", "GRS"),
-            24: ("Tentacool", "🦑", "WTR"), 154: ("Tentacruel", "🦑", "WTR"),
-            169: ("Geodude", "🪨", "RCK"), 39: ("Graveler", "🪨", "RCK"), 49: ("Golem", "🪨", "RCK"),
-            163: ("Ponyta", "🐎", "FIR"), 164: ("Rapidash", "🦄", "FIR"),
-            37: ("Slowpoke", "🦥", "WTR"), 8: ("Slowbro", "🐚", "WTR"),
-            173: ("Magnemite", "🧲", "ELC"), 174: ("Magneton", "🧲", "ELC"),
-            64: ("Farfetch'd", "🦆", "NRM"),
-            70: ("Doduo", "🐦", "FLY"), 116: ("Dodrio", "🐦", "FLY"),
-            58: ("Seel", "🦭", "WTR"), 120: ("Dewgong", "🦭", "WTR"),
-            13: ("Grimer", "💩", "PSN"), 136: ("Muk", "💩", "PSN"),
-            23: ("Shellder", "🐚", "WTR"), 139: ("Cloyster", "🐚", "WTR"),
-            25: ("Gastly", "👻", "GST"), 147: ("Haunter", "👻", "GST"), 14: ("Gengar", "😈", "GST"),
-            34: ("Onix", "🐍", "RCK"),
-            48: ("Drowzee", "🐘", "PSY"), 115: ("Hypno", "PENDULUM", "PSY"),
-            76: ("Krabby", "🦀", "WTR"), 138: ("Kingler", "🦀", "WTR"),
-            6: ("Voltorb", "🔴", "ELC"), 141: ("Electrode", "🔴", "ELC"),
-            12: ("Exeggcute", "🥚", "GRS"), 10: ("Exeggutor", "🌴", "GRS"),
-            17: ("Cubone", "🦴", "GND"), 145: ("Marowak", "🦴", "GND"),
-            43: ("Hitmonlee", "🥋", "FGT"), 44: ("Hitmonchan", "🥊", "FGT"),
-            11: ("Lickitung", "👅", "NRM"),
-            55: ("Koffing", "☁️", "PSN"), 143: ("Weezing", "☁️", "PSN"),
-            1: ("Rhyhorn", "🦏", "GND"), 2: ("Rhydon", "🦏", "GND"),
-            40: ("Chansey", "🥚", "NRM"),
-            30: ("Tangela", "🍝", "GRS"),
-            2: ("Kangaskhan", "🦘", "NRM"),
-            92: ("Horsea", "🌊", "WTR"), 93: ("Seadra", "🌊", "WTR"),
-            157: ("Goldeen", "🐟", "WTR"), 158: ("Seaking", "🐟", "WTR"),
-            27: ("Staryu", "⭐", "WTR"), 152: ("Starmie", "⭐", "WTR"),
-            42: ("Mr. Mime", "🤡", "PSY"),
-            26: ("Scyther", "🦗", "BUG"),
-            72: ("Jynx", "💋", "ICE"),
-            53: ("Electabuzz", "⚡", "ELC"),
-            51: ("Magmar", "🔥", "FIR"),
-            29: ("Pinsir", "🦗", "BUG"),
-            60: ("Tauros", "🐂", "NRM"),
-            133: ("Magikarp", "🐟", "WTR"), 22: ("Gyarados", "🐉", "WTR"),
-            19: ("Lapras", "🦕", "WTR"),
-            76: ("Ditto", "😐", "NRM"),
-            102: ("Eevee", "🐕", "NRM"), 105: ("Vaporeon", "🧜", "WTR"), 104: ("Jolteon", "⚡", "ELC"), 103: ("Flareon", "🔥", "FIR"),
-            170: ("Porygon", "👾", "NRM"),
-            98: ("Omanyte", "🐚", "RCK"), 99: ("Omastar", "🐚", "RCK"),
-            90: ("Kabuto", "🐚", "RCK"), 91: ("Kabutops", "🐚", "RCK"),
-            171: ("Aerodactyl", "🦖", "FLY"),
-            132: ("Snorlax", "😴", "NRM"),
-            74: ("Articuno", "❄️", "ICE"), 75: ("Zapdos", "⚡", "ELC"), 73: ("Moltres", "🔥", "FIR"),
-            88: ("Dratini", "🐉", "DRG"), 89: ("Dragonair", "🐉", "DRG"), 66: ("Dragonite", "🐉", "DRG"),
-            131: ("Mewtwo", "🧬", "PSY"), 21: ("Mew", "🧬", "PSY")
-        }
+
+        # --- FRAME SKIP ---
+        # Each action = hold_frames pressed + cooldown_frames released.
+        # Only every render_every-th frame is drawn by the PPU and handed to
+        # the render callback; the frames in between are ticked in one batch.
+        # Default: every frame with a GUI, once per step when headless.
+        self.hold_frames = hold_frames
+        self.cooldown_frames = cooldown_frames
+        if render_every is None:
+            render_every = (hold_frames + cooldown_frames) if headless else 1
+        self.render_every = max(1, render_every)
+        self.frame_count = 0
+        self._since_render = 0   # Frames ticked since the last rendered one
+
+        # --- INSTRUMENTATION (see perf.py) ---
+        self._t_emulator = PERF.phase("emulator")
+        self._t_render = PERF.phase("render_callback")
+        self._t_update = PERF.phase("update_data")
         
         self.party_info = [] 
         self.total_steps = 0
@@ -110,12 +77,39 @@ class NuzlockeEnv(gym.Env):
         self.badges = 0
         self.current_objective = "OAK'S PARCEL"
         
+        # --- RAM SNAPSHOT + EVENTS (synced once per step, plus ROM hooks if symbols exist) ---
+        self.ram = RamSnapshot()
+        self.events = EventTracker(self.ram)
+        self.events.attach(self.pyboy)
+        self.events.sync(self.pyboy)
+
         self.graveyard = deque(maxlen=8)
-        self.log_history = deque(maxlen=20)
-        self.last_party_count = 0
-        self.last_party_levels = [0] * 6
-        self.last_party_species = [0] * 6
-        self.last_total_hp = 0
+
+        # --- EXPLORATION (every (map, x, y) stood on, kept across resets; see exploration.py) ---
+        self.exploration = ExplorationIndex()
+        self.novel_tile = np.zeros(1, dtype=bool)   # This step's tile was new (feeds the exploration reward)
+
+        # --- TRAJECTORY (binary per-step records; GUI log lines are formatted on demand) ---
+        self.trajectory = TrajectoryRecorder(trajectory_dir)
+        self.brain_updates = deque(maxlen=20)
+
+        # --- TIMELINE (keyframes + actions for exact replay; off unless keyframe_every is set) ---
+        self.timeline = None
+        if keyframe_every:
+            self.timeline = Timeline(keyframe_every)
+            self.timeline.keyframe(self.pyboy, 0)
+
+        # --- REWARD (see rewards.py; NuzlockeVecEnv turns this off and scores all workers in one batch) ---
+        self.rewards = RewardEngine(1) if compute_reward else None
+
+        # --- GO-EXPLORE (see go_explore.py): every step feeds the cell archive, reset() restarts from it ---
+        self.archive = archive
+
+        # --- EPISODE END ---
+        # A party wipe terminates; max_episode_steps (None = never) truncates.
+        # Either way the next reset() samples a start (or archive) state.
+        self.max_episode_steps = max_episode_steps
+        self.episode_steps = 0
         self.last_cookie_step = 0
         self.hunger_threshold = 1000
 
@@ -123,23 +117,45 @@ class NuzlockeEnv(gym.Env):
         """Allows the GUI to update while the emulator holds buttons."""
         self.render_callback = callback
 
-    def render(self):
+    def _notify_render(self):
+        if self.render_callback and not self.headless:
+            with self._t_render:
+                self.render_callback()
+
+    def advance(self, frames, render_last=False):
+        """
+        Ticks the emulator, rendering only on display-cadence frames.
+        render_last also renders the final tick and restarts the cadence from it.
+        """
+        start, render_before = perf_counter(), self._t_render.total
+        while frames > 0:
+            until_display = self.render_every - self._since_render
+            chunk = min(frames, until_display)
+            display = chunk == until_display or (render_last and chunk == frames)
+            self.pyboy.tick(chunk, display)
+            self.frame_count += chunk
+            self._since_render = 0 if display else self._since_render + chunk
+            frames -= chunk
+            if display: self._notify_render()
+        # One sample per call: ticking time minus whatever the render callback took
+        self._t_emulator.add(perf_counter() - start - (self._t_render.total - render_before))
+
+    def screen_buffer(self):
+        """PyBoy's RGBA framebuffer itself, no copy (overwritten by the next rendered tick)."""
+        return self.pyboy.screen.ndarray
+
+    def render(self, out=None):
+        """RGB copy of the screen, written into out if given (no allocation)."""
         try:
-            raw = np.array(self.pyboy.screen.ndarray, dtype=np.uint8, copy=True, order='C')
-            if raw.shape == (144, 160, 4): return raw[:, :, :3]
-            if raw.shape == (144, 160, 3): return raw
-            return np.zeros((144, 160, 3), dtype=np.uint8)
+            if out is None:
+                return np.ascontiguousarray(self.screen_buffer()[:, :, :3])
+            np.copyto(out, self.screen_buffer()[:, :, :3])
+            return out
         except:
             return np.zeros((144, 160, 3), dtype=np.uint8)
 
     def get_ram_nickname(self, slot):
-        addr = 0xD2B5 + (slot * 11)
-        name = ""
-        for i in range(11):
-            val = self.pyboy.memory[addr + i]
-            if val == 0x50: break 
-            if 0x80 <= val <= 0x99: name += chr(val - 0x80 + 65)
-        return name if name else "NEW"
+        return decode_text(self.ram.nicknames[slot]) or "NEW"
 
     def get_objective(self):
         if self.badges == 0: return "DELIVER PARCEL -> BROCK"
@@ -150,104 +166,133 @@ class NuzlockeEnv(gym.Env):
         return "BECOME CHAMPION"
 
     def update_data(self):
-        mem = self.pyboy.memory
-        self.map_id = mem[0xD35E]
-        self.x = mem[0xD362]
-        self.y = mem[0xD361]
-        self.badges = bin(mem[0xD356]).count('1')
+        ram = self.ram
+        self.events.sync(self.pyboy)
+        self.map_id = ram.map_id
+        self.x = ram.x
+        self.y = ram.y
+        self.badges = ram.badges
         self.current_objective = self.get_objective()
-        
-        party_count = mem[0xD163]
-        if party_count > 6: party_count = 0
-        
-        if party_count > self.last_party_count and self.last_party_count != 0:
-            self.handle_nicknaming()
-        self.last_party_count = party_count
-
-        self.party_info = []
-        current_total_hp = 0
-
-        for i in range(party_count):
-            base = 0xD16B + (i * 44)
-            species = mem[base]
-            name, emoji, type_label = self.ROM_DB.get(species, ("UNK", "❓", "???"))
-            
-            hp = (mem[base + 1] << 8) + mem[base + 2]
-            max_hp = (mem[base + 0x22] << 8) + mem[base + 0x23] 
-            lvl = mem[base + 0x21]
-            nickname = self.get_ram_nickname(i)
-            current_total_hp += hp
+        self.novel_tile[0] = self.exploration.visit(self.map_id, self.x, self.y, ram.map_shape)
 
-            if self.last_party_levels[i] != 0 and lvl > self.last_party_levels[i]:
+        # --- EVENTS (level-ups, faints, captures... since the last step) ---
+        for event in self.events.drain():
+            if isinstance(event, LevelUp):
                 self.cookies += 1
                 self.last_cookie_step = self.total_steps
-            self.last_party_levels[i] = lvl
-            
-            if hp == 0 and max_hp > 0:
-                 death_msg = f"{nickname} ({emoji})"
-                 if death_msg not in self.graveyard:
-                     self.graveyard.append(death_msg)
+            elif isinstance(event, HpLoss):
+                self.bonks += 1
+            elif isinstance(event, Faint):
+                death_msg = f"{self.get_ram_nickname(event.slot)} ({SPECIES[event.species][1]})"
+                if death_msg not in self.graveyard:
+                    self.graveyard.append(death_msg)
+            elif isinstance(event, Capture) and event.slot > 0:
+                self.handle_nicknaming()
+                self.events.sync(self.pyboy)
+
+        # --- HUD PARTY STATE ---
+        party_count = ram.party_count
+        party = ram.party[:party_count]
+        levels = party["level"]
+        hps = party["hp"]
+        max_hps = party["max_hp"]
+        nicknames = decode_names(ram.nicknames[:party_count])
 
+        self.party_info = []
+        for i in range(party_count):
+            name, emoji, type_label = SPECIES[party["species"][i]]
+            hp, max_hp = int(hps[i]), int(max_hps[i])
             self.party_info.append({
-                "name": nickname,
+                "name": nicknames[i] or "NEW",
                 "species": name,
                 "emoji": emoji,   
                 "type": type_label,
-                "lvl": lvl,
+                "lvl": int(levels[i]),
                 "hp": hp,
                 "max_hp": max_hp,
                 "pct": hp / max_hp if max_hp > 0 else 0
             })
-
-        if self.last_total_hp > 0 and current_total_hp < self.last_total_hp:
-             self.bonks += 1
-        self.last_total_hp = current_total_hp
         
         if (self.total_steps - self.last_cookie_step) > self.hunger_threshold and self.total_steps % 100 == 0:
              self.bonks += 1
 
     def handle_nicknaming(self):
-        for _ in range(50):
-            self.pyboy.button('a')
-            self.pyboy.tick()
-            if self.render_callback: self.render_callback()
-        self.pyboy.button_release('a')
+        # Mash A: press for a frame, release for a frame. The last tick renders, so the
+        # observation shows where the mash left off and the next step is back in phase.
+        for i in range(25):
+            self.pyboy.button_press('a')
+            self.advance(1)
+            self.pyboy.button_release('a')
+            self.advance(1, render_last=(i == 24))
         self.cookies += 5
         self.last_cookie_step = self.total_steps
 
+    def party_wiped(self):
+        """Every party member at 0 HP (the game is about to black out)."""
+        count = self.ram.party_count
+        return count > 0 and not self.ram.party["hp"][:count].any()
+
     def step(self, action):
         self.total_steps += 1
-        btn_map = ['UP','DOWN','LEFT','RIGHT','A','B','START','SELECT']
-        btn = btn_map[action]
+        self.episode_steps += 1
+        btn = BUTTONS[action]
         
-        # --- THE FIX: RENDER WHILE HOLDING ---
+        # --- RENDER WHILE HOLDING (at the display cadence) ---
         # 16 Frames Hold (0.25s)
-        for _ in range(16):
-            self.pyboy.button(btn.lower())
-            self.pyboy.tick()
-            # ** FORCE GUI UPDATE **
-            if self.render_callback: self.render_callback()
+        self.pyboy.button_press(btn.lower())
+        self.advance(self.hold_frames)
         
         # 16 Frames Cooldown (0.25s)
         self.pyboy.button_release(btn.lower())
-        for _ in range(16):
-            self.pyboy.tick()
-            # ** FORCE GUI UPDATE **
-            if self.render_callback: self.render_callback()
-        
-        log_entry = f"{self.total_steps} | M{self.map_id} | ({self.x},{self.y}) | {btn}"
-        self.log_history.append(log_entry)
+        self.advance(self.cooldown_frames)
         
-        self.update_data()
-        return np.zeros(10, dtype=np.uint8), 0, False, False, {}
+        with self._t_update:
+            self.update_data()
+        reward = float(self.rewards.step(self.ram.buf[None], novel=self.novel_tile)[0]) if self.rewards else 0.0
+        self.trajectory.append(self.total_steps, action, self.ram, reward)
+        terminated = self.party_wiped()
+        if self.archive is not None and not terminated:   # Never archive a state to restart into a wipe
+            self.archive.observe(self.pyboy, self.ram, self.total_steps)
+        if self.timeline:
+            self.timeline.record(self.total_steps, action, self.pyboy)
+        obs = self.observer.observe(self.screen_buffer(), self.ram)
+        truncated = not terminated and self.max_episode_steps is not None \
+            and self.episode_steps >= self.max_episode_steps
+        return obs, reward, terminated, truncated, {}
 
     def reset(self, seed=None, options=None):
-        with open("states/outside.state", "rb") as f: self.pyboy.load_state(f)
-        return np.zeros(10, dtype=np.uint8), {}
+        super().reset(seed=seed)
+        self.episode_steps = 0
+        if self.archive is not None:
+            self.archive.load(self.pyboy, self.np_random, self.start_states)
+        else:
+            self.start_states.load(self.pyboy, self.np_random)
+        self.events.reset()
+        self.events.sync(self.pyboy)
+        if self.rewards:
+            self.rewards.reset()
+        if self.timeline:
+            self.timeline.keyframe(self.pyboy, self.total_steps, reset=True)
+        return self.observer.observe(self.screen_buffer(), self.ram, reset=True), {}
     
     def trigger_brain_review(self):
         self.last_brain_update = self.total_steps
-        self.log_history.append(f"*** BRAIN UPDATE: {self.total_steps} ***")
+        self.brain_updates.append(self.total_steps)
+
+    def log_lines(self, n=11):
+        """Last n GUI log lines, oldest first. Only these get formatted."""
+        lines = []
+        marks = list(self.brain_updates)
+        for record in self.trajectory.recent(n):
+            step = int(record["step"])
+            while marks and marks[0] < step:
+                marks.pop(0)
+            lines.append(format_record(record))
+            while marks and marks[0] == step:
+                lines.append(f"*** BRAIN UPDATE: {marks.pop(0)} ***")
+        lines.extend(f"*** BRAIN UPDATE: {s} ***" for s in marks)
+        return lines[-n:]
 
     def close(self):
+        self.trajectory.close()
         self.pyboy.stop()
\ No newline at end of file
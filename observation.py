@@ -0,0 +1,139 @@
+import numpy as np
+from gymnasium import spaces
+
+from ram_snapshot import (WRAM_START, PARTY_SIZE, PARTY_MON_BYTES, MEM_PARTY_COUNT, MEM_PARTY_MONS,
+                          MEM_BADGES, MEM_MAP_ID, MEM_X_COORD, MEM_Y_COORD)
+
+# --- CONFIG ---
+SCREEN_SHAPE = (144, 160)
+OBS_SHAPE = (72, 80)      # Downsampled (height, width); must divide the screen evenly
+FRAME_STACK = 3           # Most recent frames in the observation, oldest first
+OBS_MODES = ("dict", "pixels", "ram")
+
+# RAM feature vector: raw bytes first, then one 0-255 HP fraction per party slot
+RAM_BYTES = [MEM_MAP_ID, MEM_X_COORD, MEM_Y_COORD, MEM_BADGES, MEM_PARTY_COUNT] + \
+            [MEM_PARTY_MONS + i * PARTY_MON_BYTES + 0x21 for i in range(PARTY_SIZE)]   # Levels
+RAM_FEATURES = len(RAM_BYTES) + PARTY_SIZE
+
+
+class FrameStack:
+    """
+    Grayscale, downsampled frame stack in one preallocated array.
+
+    Frames are block-averaged (integer factors only) through a uint16
+    accumulator and written twice into a ring of 2 * stack slots, so the
+    last `stack` frames are always one contiguous slice - no per-step
+    allocation and no reordering. The DMG palette is grey, so one colour
+    channel of the RGBA framebuffer is already the luma.
+    """
+
+    def __init__(self, shape=OBS_SHAPE, stack=FRAME_STACK):
+        height, width = shape
+        if SCREEN_SHAPE[0] % height or SCREEN_SHAPE[1] % width:
+            raise ValueError(f"observation shape {shape} must divide the screen {SCREEN_SHAPE} evenly")
+        fy, fx = SCREEN_SHAPE[0] // height, SCREEN_SHAPE[1] // width
+        self.shape = (stack, height, width)
+        self.stack = stack
+        self._offsets = [(dy, dx) for dy in range(fy) for dx in range(fx)]
+        self._steps = (fy, fx)
+        self._acc = np.zeros((height, width), dtype=np.uint16)
+        self._ring = np.zeros((2 * stack, height, width), dtype=np.uint8)
+        self._head = 0
+
+    @property
+    def frames(self):
+        """(stack, height, width) view, oldest first. Overwritten by the next push()."""
+        return self._ring[self._head:self._head + self.stack]
+
+    def push(self, screen):
+        """Adds an RGBA (or greyscale) screen; returns frames."""
+        gray = screen[:, :, 0] if screen.ndim == 3 else screen
+        fy, fx = self._steps
+        acc = self._acc
+        np.copyto(acc, gray[0::fy, 0::fx])
+        for dy, dx in self._offsets[1:]:
+            np.add(acc, gray[dy::fy, dx::fx], out=acc)
+        if len(self._offsets) > 1:
+            np.floor_divide(acc, len(self._offsets), out=acc)
+
+        slot = self._ring[self._head]
+        np.copyto(slot, acc, casting="unsafe")
+        self._ring[self._head + self.stack] = slot
+        self._head = (self._head + 1) % self.stack
+        return self.frames
+
+    def fill(self, screen):
+        """Start of an episode: every slot holds this screen."""
+        self.push(screen)
+        self._ring[:] = self._ring[(self._head - 1) % self.stack]
+        return self.frames
+
+
+class RamFeatures:
+    """Fixed-size uint8 vector of game state read from a RamSnapshot, updated in place."""
+
+    def __init__(self):
+        self.values = np.zeros(RAM_FEATURES, dtype=np.uint8)
+        self._src = np.array(RAM_BYTES, dtype=np.intp) - WRAM_START
+        self._n = len(RAM_BYTES)
+
+    def update(self, ram):
+        values = self.values
+        np.take(ram.buf, self._src, out=values[:self._n])
+        hps, max_hps = ram.party["hp"].tolist(), ram.party["max_hp"].tolist()
+        count = ram.party_count
+        for i in range(PARTY_SIZE):
+            max_hp = max_hps[i] if i < count else 0
+            values[self._n + i] = min(hps[i], max_hp) * 255 // max_hp if max_hp else 0
+        return values
+
+
+def observation_space(mode="dict", shape=OBS_SHAPE, stack=FRAME_STACK):
+    screen = spaces.Box(low=0, high=255, shape=(stack,) + tuple(shape), dtype=np.uint8)
+    ram = spaces.Box(low=0, high=255, shape=(RAM_FEATURES,), dtype=np.uint8)
+    if mode == "dict":
+        return spaces.Dict({"screen": screen, "ram": ram})
+    if mode == "pixels":
+        return screen
+    if mode == "ram":
+        return ram
+    raise ValueError(f"obs_mode must be one of {OBS_MODES}, not {mode!r}")
+
+
+def policy_for(space):
+    """SB3 policy name that fits an observation space."""
+    if isinstance(space, spaces.Dict):
+        return "MultiInputPolicy"
+    return "CnnPolicy" if len(space.shape) == 3 else "MlpPolicy"
+
+
+def copy_obs(obs):
+    """Detached copy of an observation (arrays or dict of arrays)."""
+    if isinstance(obs, dict):
+        return {key: np.array(value) for key, value in obs.items()}
+    return np.array(obs)
+
+
+class Observer:
+    """
+    Builds the env's observation in place. The returned arrays (or dict of
+    arrays) are reused - copy them if they must outlive the next step.
+    """
+
+    def __init__(self, mode="dict", shape=OBS_SHAPE, stack=FRAME_STACK):
+        self.space = observation_space(mode, shape, stack)
+        self.mode = mode
+        self.frames = FrameStack(shape, stack) if mode != "ram" else None
+        self.ram = RamFeatures() if mode != "pixels" else None
+        self._dict = {}
+
+    def observe(self, screen, ram, reset=False):
+        if self.frames is not None:
+            screen_obs = self.frames.fill(screen) if reset else self.frames.push(screen)
+        if self.ram is not None:
+            ram_obs = self.ram.update(ram)
+        if self.mode == "dict":
+            self._dict["screen"] = screen_obs
+            self._dict["ram"] = ram_obs
+            return self._dict
+        return screen_obs if self.mode == "pixels" else ram_obs
@@ -0,0 +1,138 @@
+import csv
+import os
+import time
+from time import perf_counter
+
+import numpy as np
+
+# --- CONFIG ---
+WINDOW = 1024             # Samples kept per phase for the rolling percentiles
+QUANTILES = (50, 90, 99)
+
+
+class Phase:
+    """
+    One timed section of the loop. Use as a context manager or add() a
+    duration directly; the last `window` samples feed the percentiles.
+    Recording is two list stores, so it's safe to wrap per-tick code.
+    """
+
+    __slots__ = ("name", "durations", "ends", "mask", "count", "total", "_start")
+
+    def __init__(self, name, window=WINDOW):
+        window = 1 << (window - 1).bit_length()   # Power of two: the ring index is a mask
+        self.name = name
+        self.durations = [0.0] * window
+        self.ends = [0.0] * window
+        self.mask = window - 1
+        self.count = 0
+        self.total = 0.0
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = perf_counter()
+        i = self.count & self.mask
+        self.durations[i] = seconds = end - self._start
+        self.ends[i] = end
+        self.count += 1
+        self.total += seconds
+
+    def add(self, seconds, end=None):
+        i = self.count & self.mask
+        self.durations[i] = seconds
+        self.ends[i] = perf_counter() if end is None else end
+        self.count += 1
+        self.total += seconds
+
+    def stats(self):
+        n = min(self.count, self.mask + 1)
+        if n == 0:
+            return None
+        window = np.array(self.durations[:n])
+        p = np.percentile(window, QUANTILES) * 1e3
+        ends = self.ends[:n]
+        span = max(ends) - min(ends)
+        stats = {"count": self.count, "total_s": self.total, "mean_ms": float(window.mean()) * 1e3,
+                 "rate": (n - 1) / span if span > 0 else 0.0}
+        stats.update({f"p{q}_ms": float(v) for q, v in zip(QUANTILES, p)})
+        return stats
+
+
+class PerfTracker:
+    """Named phases, created on first use. phase() hands back the same object every time."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.phases = {}
+
+    def phase(self, name):
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(name, self.window)
+        return phase
+
+    def summary(self):
+        """{phase: stats} for every phase with at least one sample."""
+        out = {}
+        for name, phase in self.phases.items():
+            stats = phase.stats()
+            if stats is not None:
+                out[name] = stats
+        return out
+
+    def export(self, path, extra=None):
+        summary = self.summary()
+        if extra:
+            summary.update(extra)
+        export_summary(path, summary)
+
+
+# One tracker per process, shared by the env and whatever loop drives it
+PERF = PerfTracker()
+
+
+def export_summary(path, summary):
+    """.csv appends one row per phase; anything else is (re)written as Prometheus text."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if path.endswith(".csv"):
+        _append_csv(path, summary)
+    else:
+        _write_prometheus(path, summary)
+
+
+def _append_csv(path, summary):
+    fields = ["timestamp", "phase", "count", "total_s", "mean_ms", "rate"] + [f"p{q}_ms" for q in QUANTILES]
+    new = not os.path.exists(path)
+    now = time.time()
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        if new:
+            writer.writeheader()
+        for name, stats in summary.items():
+            writer.writerow({"timestamp": f"{now:.3f}", "phase": name, **stats})
+
+
+def _write_prometheus(path, summary):
+    lines = ["# HELP nuzlocke_phase_seconds Wall time per loop phase (rolling window).",
+             "# TYPE nuzlocke_phase_seconds summary"]
+    for name, stats in summary.items():
+        for q in QUANTILES:
+            lines.append(f'nuzlocke_phase_seconds{{phase="{name}",quantile="{q / 100}"}} {stats[f"p{q}_ms"] / 1e3:.6g}')
+        lines.append(f'nuzlocke_phase_seconds_sum{{phase="{name}"}} {stats["total_s"]:.6g}')
+        lines.append(f'nuzlocke_phase_seconds_count{{phase="{name}"}} {stats["count"]}')
+    lines.append("# HELP nuzlocke_phase_rate Completions per second over the rolling window.")
+    lines.append("# TYPE nuzlocke_phase_rate gauge")
+    for name, stats in summary.items():
+        lines.append(f'nuzlocke_phase_rate{{phase="{name}"}} {stats["rate"]:.6g}')
+
+    # Scrapers may read at any moment: write aside, then swap in
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
@@ -0,0 +1,209 @@
+import os
+
+import numpy as np
+from gymnasium import spaces
+
+# --- CONFIG ---
+POLICY_EXPORT_PATH = "models/PPO/nuzlocke_live.npz"
+NATURE_CNN_STRIDES = (4, 2, 1)   # SB3's NatureCNN; kernel sizes come from the weights
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0.0),
+}
+
+# Only these state dict entries are needed to act and to estimate values (no duplicate extractors)
+POLICY_PREFIXES = ("features_extractor.", "mlp_extractor.policy_net.", "action_net.",
+                   "mlp_extractor.value_net.", "value_net.")
+ACTIVATION_KEY = "__activation__"
+
+
+class NumpyPolicy:
+    """
+    Torch-free forward pass of an SB3 ActorCriticPolicy (MlpPolicy,
+    CnnPolicy or MultiInputPolicy with the default, shared extractors), one
+    observation at a time. Exports without the value head can still act;
+    step() then reports no value.
+
+    Takes the policy's state dict as NumPy arrays - what the learner
+    already publishes - and reshapes it once: each convolution becomes one
+    matmul over a space-to-depth view of its input plus a few shifted adds
+    (no im2col copy), in height-width-channel layout, and the linear layer
+    after them is permuted to match.
+    """
+
+    def __init__(self, observation_space, weights, activation=None):
+        if activation is None:
+            activation = str(weights.get(ACTIVATION_KEY, "tanh"))   # policy_state() records it
+        self.activation = ACTIVATIONS[activation]
+        if isinstance(observation_space, spaces.Dict):
+            self.inputs = list(observation_space.spaces.items())   # SB3 concatenates in this order
+        else:
+            self.inputs = [(None, observation_space)]
+        self.load(weights)
+
+    def load(self, weights):
+        """Swaps in a new state dict (same architecture)."""
+        self.extractors = []
+        for key, space in self.inputs:
+            prefix = "features_extractor." if key is None else f"features_extractor.extractors.{key}."
+            cnn = _cnn(weights, prefix, space.shape) if prefix + "cnn.0.weight" in weights else None
+            self.extractors.append((key, cnn))
+
+        self.mlp = _mlp(weights, "mlp_extractor.policy_net.")
+        self.head = _linear(weights, "action_net.")
+        self.value_mlp = _mlp(weights, "mlp_extractor.value_net.")
+        self.value_head = _linear(weights, "value_net.") if "value_net.weight" in weights else None
+
+    # --- FORWARD ---
+    def features(self, obs):
+        parts = []
+        for key, cnn in self.extractors:
+            x = obs if key is None else obs[key]
+            parts.append(np.asarray(x, dtype=np.float32).ravel() if cnn is None else _nature_cnn(x, *cnn))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _head(self, x, layers, head):
+        for w, b in layers:
+            x = self.activation(x @ w + b)
+        w, b = head
+        return x @ w + b
+
+    def logits(self, obs):
+        return self._head(self.features(obs), self.mlp, self.head)
+
+    def act(self, obs, deterministic=False, rng=np.random):
+        """Action index: argmax, or sampled from the softmax like SB3's predict()."""
+        return _pick(self.logits(obs), deterministic, rng)
+
+    def step(self, obs, deterministic=False, rng=np.random):
+        """
+        (action, its log-probability, value estimate or None): what PPO's
+        rollout buffer stores per transition, from one feature pass.
+        """
+        x = self.features(obs)
+        logits = self._head(x, self.mlp, self.head)
+        action = _pick(logits, deterministic, rng)
+        shifted = logits - logits.max()
+        log_prob = float(shifted[action] - np.log(np.exp(shifted).sum()))
+        value = None if self.value_head is None else float(self._head(x, self.value_mlp, self.value_head)[0])
+        return action, log_prob, value
+
+
+def _pick(logits, deterministic, rng):
+    if deterministic:
+        return int(np.argmax(logits))
+    cdf = np.cumsum(np.exp(logits - logits.max()))
+    return int(min(np.searchsorted(cdf, rng.random() * cdf[-1], side="right"), len(cdf) - 1))
+
+
+def _mlp(weights, prefix):
+    """The Linear layers of an SB3 Sequential(Linear, activation, Linear, ...)."""
+    layers, i = [], 0
+    while f"{prefix}{i}.weight" in weights:
+        layers.append(_linear(weights, f"{prefix}{i}."))
+        i += 2
+    return layers
+
+
+def _linear(weights, prefix):
+    """(W.T, b) so that y = x @ W.T + b, as float32."""
+    w = np.asarray(weights[prefix + "weight"], dtype=np.float32)
+    return np.ascontiguousarray(w.T), np.asarray(weights[prefix + "bias"], dtype=np.float32)
+
+
+def _cnn(weights, prefix, image_shape):
+    """NatureCNN layers (see _conv) plus its linear layer, permuted for (H, W, C) input."""
+    _, h, w = image_shape
+    convs = []
+    for i, stride in zip((0, 2, 4), NATURE_CNN_STRIDES):
+        weight = np.asarray(weights[f"{prefix}cnn.{i}.weight"], dtype=np.float32)
+        out_c, in_c, kh, kw = weight.shape
+        # Kernel zero-padded to whole strides, split into (th, tw) taps of (stride, stride) pixels
+        th, tw = -(-kh // stride), -(-kw // stride)
+        padded = np.zeros((out_c, in_c, th * stride, tw * stride), dtype=np.float32)
+        padded[:, :, :kh, :kw] = weight
+        padded = padded.reshape(out_c, in_c, th, stride, tw, stride).transpose(3, 5, 1, 2, 4, 0)
+        convs.append((np.ascontiguousarray(padded.reshape(stride * stride * in_c, th * tw * out_c)),
+                      np.asarray(weights[f"{prefix}cnn.{i}.bias"], dtype=np.float32), (kh, kw), (th, tw), stride))
+        h, w = (h - kh) // stride + 1, (w - kw) // stride + 1
+
+    # Torch flattens the last conv output as (C, H, W); ours comes out (H, W, C)
+    lin = np.asarray(weights[prefix + "linear.0.weight"], dtype=np.float32)
+    lin = lin.reshape(lin.shape[0], out_c, h, w).transpose(0, 2, 3, 1).reshape(lin.shape[0], -1)
+    return convs, np.ascontiguousarray(lin.T), np.asarray(weights[prefix + "linear.0.bias"], dtype=np.float32)
+
+
+def _conv(x, w, b, kernel, taps, stride):
+    """
+    Valid strided convolution + ReLU of an (H, W, C) array. Space-to-depth
+    turns it into a stride-1 conv with (th, tw) taps: one matmul gives every
+    tap's output at every block, then the taps are summed with shifted views.
+    """
+    (kh, kw), (th, tw) = kernel, taps
+    h, wd, c = x.shape
+    oh, ow = (h - kh) // stride + 1, (wd - kw) // stride + 1
+    hn, wn = (oh - 1 + th) * stride, (ow - 1 + tw) * stride
+    if hn > h or wn > wd:
+        x = np.pad(x, ((0, max(hn - h, 0)), (0, max(wn - wd, 0)), (0, 0)))
+    x = x[:hn, :wn]
+    if stride > 1:
+        x = x.reshape(hn // stride, stride, wn // stride, stride, c).transpose(0, 2, 1, 3, 4)
+    y = (x.reshape(-1, w.shape[0]) @ w).reshape(hn // stride, wn // stride, th, tw, -1)
+    out = y[:oh, :ow, 0, 0] + b
+    for ty in range(th):
+        for tx in range(tw):
+            if ty or tx:
+                out += y[ty:ty + oh, tx:tx + ow, ty, tx]
+    return np.maximum(out, 0.0, out=out)
+
+
+def _nature_cnn(image, convs, lin_w, lin_b):
+    """image is channels-first uint8 like the env produces; SB3 scales images to [0, 1]."""
+    x = np.moveaxis(np.asarray(image, dtype=np.float32), 0, -1) * (1.0 / 255.0)   # (H, W, C)
+    for conv in convs:
+        x = _conv(x, *conv)
+    return np.maximum(x.ravel() @ lin_w + lin_b, 0.0)
+
+
+# --- EXPORT ---
+def policy_state(weights, activation="tanh"):
+    """
+    The entries of a full state dict (name -> array) that NumpyPolicy uses,
+    plus the activation name: what the learner publishes and exports.
+    """
+    state = {k: np.asarray(v) for k, v in weights.items() if k.startswith(POLICY_PREFIXES)}
+    state[ACTIVATION_KEY] = np.array(activation)
+    return state
+
+
+def model_state(model):
+    """policy_state() of an SB3 model."""
+    weights = {k: v.detach().cpu().numpy() for k, v in model.policy.state_dict().items()}
+    return policy_state(weights, model.policy.activation_fn.__name__.lower())
+
+
+def export_policy(state, path=POLICY_EXPORT_PATH):
+    """Writes a policy_state() as a flat .npz (atomically: temp file, then rename)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **state)
+    os.replace(tmp, path)
+
+
+def load_policy(observation_space, path=POLICY_EXPORT_PATH):
+    """NumpyPolicy from an export, or None if there is none or it doesn't fit the space."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            state = {k: data[k] for k in data.files}
+        policy = NumpyPolicy(observation_space, state)
+        policy.logits(observation_space.sample())   # Shape check
+        return policy
+    except (OSError, KeyError, ValueError) as e:
+        print(f">> Ignoring policy export {path}: {e}")
+        return None
@@ -0,0 +1,117 @@
+import numpy as np
+
+# --- WRAM WINDOW ---
+WRAM_START = 0xD000
+WRAM_END = 0xE000
+SLICE_MIN_BYTES = 8   # Shorter spans are read byte by byte: a PyBoy slice has a fixed per-call cost
+
+# --- MEMORY ADDRESSES ---
+MEM_PARTY_COUNT = 0xD163
+MEM_PARTY_MONS  = 0xD16B  # 6 x 44-byte party structs
+MEM_PARTY_NICKS = 0xD2B5  # 6 x 11-byte nicknames
+MEM_ITEM_COUNT  = 0xD31D
+MEM_ITEMS       = 0xD31E  # 20 x (item id, quantity)
+MEM_BADGES      = 0xD356
+MEM_MAP_ID      = 0xD35E
+MEM_Y_COORD     = 0xD361
+MEM_X_COORD     = 0xD362
+MEM_MAP_HEIGHT  = 0xD368  # Current map size in blocks (2x2 player steps each)
+MEM_MAP_WIDTH   = 0xD369
+
+PARTY_SIZE = 6
+PARTY_MON_BYTES = 44
+NICK_BYTES = 11
+BAG_SIZE = 20
+
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)   # Badge byte -> badge count
+
+# Party struct fields we care about (big-endian words, like the game stores them)
+PARTY_MON_DTYPE = np.dtype({
+    "names":    ["species", "hp", "level", "max_hp"],
+    "formats":  ["u1", ">u2", "u1", ">u2"],
+    "offsets":  [0x00, 0x01, 0x21, 0x22],
+    "itemsize": PARTY_MON_BYTES,
+})
+
+# --- WATCH LISTS ---
+# (start, end) spans copied on every refresh. Only the bytes we actually read
+# are pulled out of PyBoy: its memory view copies byte by byte either way, so
+# gathering ~110 addresses is several times cheaper than slicing the 4 KB window.
+PLAYER_SPANS = [(MEM_PARTY_COUNT, MEM_PARTY_COUNT + 1), (MEM_BADGES, MEM_BADGES + 1),
+                (MEM_MAP_ID, MEM_MAP_ID + 1), (MEM_Y_COORD, MEM_MAP_WIDTH + 1)]
+PARTY_SPANS = [span for i in range(PARTY_SIZE)
+               for base in [MEM_PARTY_MONS + i * PARTY_MON_BYTES]
+               for span in [(base, base + 3), (base + 0x21, base + 0x24)]]
+NICK_SPANS = [(MEM_PARTY_NICKS, MEM_PARTY_NICKS + PARTY_SIZE * NICK_BYTES)]
+BAG_SPANS = [(MEM_ITEM_COUNT, MEM_ITEMS + BAG_SIZE * 2)]
+
+ENV_SPANS = PLAYER_SPANS + PARTY_SPANS + NICK_SPANS + BAG_SPANS
+
+
+class RamSnapshot:
+    """
+    Per-step copy of WRAM (0xD000-0xDFFF) in one preallocated NumPy buffer.
+
+    refresh() pulls the watched addresses out of the emulator with one
+    memory slice per contiguous span (short spans byte by byte) and one
+    store into the buffer; everything else reads from the buffer through fixed views, so
+    party stats come back as arrays instead of dozens of memory lookups.
+    """
+
+    def __init__(self, spans=ENV_SPANS):
+        self.buf = np.zeros(WRAM_END - WRAM_START, dtype=np.uint8)
+        merged = []   # Watched spans, overlapping/adjacent ones joined
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._bytes = [a for start, end in merged if end - start < SLICE_MIN_BYTES for a in range(start, end)]
+        self._slices = [(start, end) for start, end in merged if end - start >= SLICE_MIN_BYTES]
+        self._index = np.array(self._bytes + [a for start, end in self._slices for a in range(start, end)],
+                               dtype=np.intp) - WRAM_START
+
+        # --- VIEWS (no copies, always reflect the last refresh) ---
+        party_off = MEM_PARTY_MONS - WRAM_START
+        self.party = self.buf[party_off:party_off + PARTY_SIZE * PARTY_MON_BYTES].view(PARTY_MON_DTYPE)
+        nick_off = MEM_PARTY_NICKS - WRAM_START
+        self.nicknames = self.buf[nick_off:nick_off + PARTY_SIZE * NICK_BYTES].reshape(PARTY_SIZE, NICK_BYTES)
+        bag_off = MEM_ITEMS - WRAM_START
+        self.bag = self.buf[bag_off:bag_off + BAG_SIZE * 2].reshape(BAG_SIZE, 2)
+
+    def refresh(self, pyboy):
+        mem = pyboy.memory
+        values = [mem[a] for a in self._bytes]
+        for start, end in self._slices:
+            values += mem[start:end]
+        self.buf[self._index] = values
+        return self
+
+    def __getitem__(self, addr):
+        return int(self.buf[addr - WRAM_START])
+
+    @property
+    def map_id(self): return self[MEM_MAP_ID]
+
+    @property
+    def x(self): return self[MEM_X_COORD]
+
+    @property
+    def y(self): return self[MEM_Y_COORD]
+
+    @property
+    def map_shape(self):
+        """(rows, cols) of player positions on the current map."""
+        return 2 * self[MEM_MAP_HEIGHT], 2 * self[MEM_MAP_WIDTH]
+
+    @property
+    def badges(self): return int(POPCOUNT[self.buf[MEM_BADGES - WRAM_START]])
+
+    @property
+    def party_count(self):
+        count = self[MEM_PARTY_COUNT]
+        return count if count <= PARTY_SIZE else 0
+
+    def has_item(self, item_id):
+        count = min(self[MEM_ITEM_COUNT], BAG_SIZE)
+        return bool(np.any(self.bag[:count, 0] == item_id))
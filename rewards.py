@@ -0,0 +1,96 @@
+import numpy as np
+
+from ram_snapshot import WRAM_START, PARTY_SIZE, PARTY_MON_BYTES, MEM_PARTY_COUNT, MEM_PARTY_MONS, MEM_BADGES, POPCOUNT
+
+# --- CONFIG ---
+LEVEL_REWARD = 1.0       # Per level gained by a party member
+BADGE_REWARD = 10.0      # Per new badge
+CAPTURE_REWARD = 2.0     # Per new party member
+EXPLORE_REWARD = 0.02    # Per (map, x, y) tile stood on for the first time this run (ExplorationIndex.visit)
+FAINT_PENALTY = -2.0     # Per party member whose HP hit 0
+
+# --- COLUMNS gathered from each row of a stacked (n_envs, WRAM) snapshot block ---
+_party = lambda offset: [MEM_PARTY_MONS + i * PARTY_MON_BYTES + offset for i in range(PARTY_SIZE)]
+GATHER = np.array([MEM_PARTY_COUNT, MEM_BADGES]
+                  + _party(0x00) + _party(0x21) + _party(0x01) + _party(0x02) + _party(0x22) + _party(0x23)) - WRAM_START
+_SPECIES, _LEVELS, _HP_HI, _HP_LO, _MAX_HI, _MAX_LO = (slice(2 + k * PARTY_SIZE, 2 + (k + 1) * PARTY_SIZE)
+                                                        for k in range(6))
+
+
+class RewardEngine:
+    """
+    Rewards and bookkeeping for n envs at once from their stacked WRAM
+    snapshots (one RamSnapshot.buf per row).
+
+    Every quantity is a column gather plus elementwise NumPy over the
+    whole batch - popcount through a table, big-endian HP from byte
+    pairs, level/HP deltas against the previous call - so the per-env
+    Python cost is gone and one call serves 1 env or 64. Level and HP
+    deltas only count slots that hold the same species as before, like
+    EventTracker, so reordering the party pays nothing. New tiles come
+    from the envs' own ExplorationIndex (the novel argument) rather than
+    a second bitset here. Envs marked done start over: their next call
+    only sets the baseline.
+    """
+
+    def __init__(self, n_envs):
+        self.n_envs = n_envs
+        self._rows = np.arange(n_envs)
+        self._slots = np.arange(PARTY_SIZE)
+        self._fresh = np.ones(n_envs, dtype=bool)
+
+        # Latest values, (n_envs,) or (n_envs, PARTY_SIZE)
+        self.party_count = np.zeros(n_envs, dtype=np.int32)
+        self.badges = np.zeros(n_envs, dtype=np.int32)
+        self.species = np.zeros((n_envs, PARTY_SIZE), dtype=np.int32)
+        self.levels = np.zeros((n_envs, PARTY_SIZE), dtype=np.int32)
+        self.hp = np.zeros((n_envs, PARTY_SIZE), dtype=np.int32)
+        self.max_hp = np.zeros((n_envs, PARTY_SIZE), dtype=np.int32)
+        self.hp_total = np.zeros(n_envs, dtype=np.int32)
+        self.level_delta = np.zeros(n_envs, dtype=np.int32)
+        self.fainted = np.zeros((n_envs, PARTY_SIZE), dtype=bool)   # Newly fainted this step
+        self.novel = np.zeros(n_envs, dtype=bool)
+
+    def reset(self, envs=None):
+        """Episode restart for the given env indexes (all if None)."""
+        envs = self._rows if envs is None else envs
+        self._fresh[envs] = True
+
+    def step(self, rams, dones=None, novel=None):
+        """
+        (n_envs,) float32 rewards for the step that produced rams. novel[i]
+        is True if env i stood on a tile its ExplorationIndex hadn't seen.
+        """
+        v = np.asarray(rams)[:, GATHER].astype(np.int32)   # One gather, then column views
+        count = v[:, 0]
+        count[count > PARTY_SIZE] = 0
+        present = self._slots < count[:, None]
+
+        species = np.where(present, v[:, _SPECIES], 0)
+        levels = np.where(present, v[:, _LEVELS], 0)
+        hp = np.where(present, (v[:, _HP_HI] << 8) | v[:, _HP_LO], 0)
+        max_hp = np.where(present, (v[:, _MAX_HI] << 8) | v[:, _MAX_LO], 0)
+        badges = POPCOUNT[v[:, 1]].astype(np.int32)
+
+        # Deltas only over slots that hold the same mon before and after (switches, captures and
+        # deposits move mons between slots)
+        kept = present & (self._slots < self.party_count[:, None]) & (species == self.species)
+        self.level_delta = np.where(kept, np.maximum(levels - self.levels, 0), 0).sum(axis=1)
+        self.fainted = kept & (hp == 0) & (self.hp > 0)
+        captured = np.maximum(count - self.party_count, 0)
+        new_badges = np.maximum(badges - self.badges, 0)
+
+        self.novel = np.zeros(self.n_envs, dtype=bool) if novel is None else np.asarray(novel, dtype=bool)
+
+        rewards = (LEVEL_REWARD * self.level_delta + BADGE_REWARD * new_badges + CAPTURE_REWARD * captured
+                   + EXPLORE_REWARD * self.novel + FAINT_PENALTY * self.fainted.sum(axis=1)).astype(np.float32)
+        rewards[self._fresh] = 0.0
+        self._fresh[:] = False
+
+        self.party_count, self.badges, self.species = count, badges, species
+        self.levels, self.hp, self.max_hp = levels, hp, max_hp
+        self.hp_total = hp.sum(axis=1)
+        if dones is not None and np.any(dones):
+            self.reset(np.flatnonzero(dones))
+        return rewards
+
@@ -0,0 +1,146 @@
+import glob
+import io
+import os
+import time
+
+from state_store import STORE_DIR, StateStore
+
+# --- CONFIG ---
+STATES_DIR = "states"
+RECHECK_SECONDS = 5.0   # How often a cached file is re-stat'ed for changes
+STORE_PREFIX = "store:"  # "store:<name>" = a state in the chunked store (see state_store.py), not a file
+
+# Relative odds of each start state when a pool is built from states/
+DEFAULT_WEIGHTS = {
+    "outside.state": 4.0,
+    "has_starter.state": 1.0,
+    "choice.state": 1.0,
+}
+
+
+class StateCache:
+    """
+    Savestate bytes read from disk once and served from memory afterwards.
+
+    Files are re-stat'ed at most every recheck_seconds and reloaded if their
+    size or mtime changed, so loading a state is normally a BytesIO over
+    bytes we already hold. Directory listings are cached the same way.
+    "store:<name>" paths are served by the StateStore under store_dir,
+    opened on first use, whose chunk cache is shared between its states.
+    """
+
+    def __init__(self, recheck_seconds=RECHECK_SECONDS, store_dir=STORE_DIR):
+        self.recheck_seconds = recheck_seconds
+        self.store_dir = store_dir
+        self._store = None
+        self._files = {}     # path -> [signature, data, checked_at]
+        self._listings = {}  # directory -> [paths by mtime, checked_at]
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = StateStore(self.store_dir)
+        return self._store
+
+    def _stale(self, checked_at):
+        return time.monotonic() - checked_at >= self.recheck_seconds
+
+    def get(self, path):
+        """Raw savestate bytes for path."""
+        if path.startswith(STORE_PREFIX):
+            return self.store.get(path[len(STORE_PREFIX):])
+        entry = self._files.get(path)
+        if entry is not None and not self._stale(entry[2]):
+            return entry[1]
+
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+        if entry is None or entry[0] != signature:
+            with open(path, "rb") as f:
+                entry = [signature, f.read(), 0.0]
+            self._files[path] = entry
+        entry[2] = time.monotonic()
+        return entry[1]
+
+    def open(self, path):
+        return io.BytesIO(self.get(path))
+
+    def load(self, pyboy, path):
+        pyboy.load_state(self.open(path))
+
+    def invalidate(self, path=None):
+        """Forget one file (or everything) so the next access rereads disk."""
+        if path is None:
+            self._files.clear()
+            self._listings.clear()
+        else:
+            self._files.pop(path, None)
+
+    def list_states(self, directory=STATES_DIR):
+        """Every *.state in directory, oldest first."""
+        entry = self._listings.get(directory)
+        if entry is not None and not self._stale(entry[1]):
+            return entry[0]
+
+        paths = glob.glob(os.path.join(directory, "*.state"))
+        paths.sort(key=os.path.getmtime)
+        self._listings[directory] = [paths, time.monotonic()]
+        return paths
+
+    def latest(self, directory=STATES_DIR):
+        paths = self.list_states(directory)
+        return paths[-1] if paths else None
+
+
+# One cache per process, shared by every env and script in it
+STATE_CACHE = StateCache()
+
+
+class StartStatePool:
+    """Weighted set of start states; reset() samples one per episode."""
+
+    def __init__(self, states, cache=STATE_CACHE):
+        self.cache = cache
+        self.paths = []
+        self.weights = []
+        if isinstance(states, str):
+            states = {states: 1.0}
+        elif not isinstance(states, dict):
+            states = {path: 1.0 for path in states}
+        for path, weight in states.items():
+            self.add(path, weight)
+
+    def add(self, path, weight=1.0):
+        """Adds (or reweights) a start state. The file is read right away."""
+        self.cache.get(path)
+        if path in self.paths:
+            self.weights[self.paths.index(path)] = float(weight)
+        else:
+            self.paths.append(path)
+            self.weights.append(float(weight))
+
+    def remove(self, path):
+        i = self.paths.index(path)
+        del self.paths[i], self.weights[i]
+
+    def sample(self, rng):
+        """Picks a path using a NumPy Generator (e.g. env.np_random)."""
+        if len(self.paths) == 1:
+            return self.paths[0]
+        total = sum(self.weights)
+        return self.paths[rng.choice(len(self.paths), p=[w / total for w in self.weights])]
+
+    def load(self, pyboy, rng):
+        path = self.sample(rng)
+        self.cache.load(pyboy, path)
+        return path
+
+
+def default_start_weights(directory=STATES_DIR, cache=STATE_CACHE):
+    """{path: weight} for every state in directory, weighted by DEFAULT_WEIGHTS (1.0 otherwise)."""
+    return {p: DEFAULT_WEIGHTS.get(os.path.basename(p), 1.0) for p in cache.list_states(directory)}
+
+
+def default_start_pool(directory=STATES_DIR, cache=STATE_CACHE):
+    """Pool of every state in directory, weighted by DEFAULT_WEIGHTS (1.0 otherwise)."""
+    return StartStatePool(default_start_weights(directory, cache), cache)
@@ -0,0 +1,261 @@
+"""
+Content-addressed savestate store: states are cut into fixed-size chunks,
+each distinct chunk is stored once (zlib) and a state is its list of chunk
+ids. Snapshots of the same ROM share most of their bytes (cartridge RAM,
+tile data, unchanged WRAM/screen rows), so thousands of states cost little
+more than their differences.
+
+    python state_store.py import states/*.state          # name = file name without .state
+    python state_store.py export outside states/outside.state
+    python state_store.py list
+    python state_store.py stats
+
+Anything that takes a state path (NuzlockeEnv, StartStatePool, main.py)
+accepts "store:<name>" for a state in the default store (see state_cache.py).
+"""
+import argparse
+import hashlib
+import io
+import os
+import struct
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# --- CONFIG ---
+STORE_DIR = "states/store"
+CHUNK_SIZE = 1024                # Savestates have a fixed layout per ROM, so equal offsets line up
+CACHE_BYTES = 32 * 1024 ** 2     # Decompressed chunks kept in memory, least recently used evicted first
+COMPRESS_LEVEL = 6
+
+# --- FILES (append-only; a torn record at the end of a file is ignored) ---
+PACK_FILE = "chunks.pack"        # zlib chunks back to back
+INDEX_FILE = "chunks.idx"        # INDEX_RECORD per chunk; chunk id = record number
+MANIFEST_FILE = "states.mf"      # MANIFEST_HEADER + name + zlib(uint32 chunk ids); last one per name wins
+INDEX_RECORD = np.dtype([("digest", "V16"), ("offset", "<u8"), ("length", "<u4")])
+MANIFEST_HEADER = struct.Struct("<HII")   # name bytes, state bytes, compressed id bytes
+
+
+class StateStore:
+    """
+    Chunked, deduplicated savestates under one directory.
+
+    One writer at a time (a script or the CLI); any number of readers,
+    which pick up states added since they opened the store on the first
+    get() of a name they don't know. Decompressed chunks are shared by
+    every state that uses them in a bounded LRU, so holding many related
+    states in memory costs about as much as their distinct chunks.
+    """
+
+    def __init__(self, root=STORE_DIR, chunk_size=CHUNK_SIZE, cache_bytes=CACHE_BYTES):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.cache_bytes = cache_bytes
+        os.makedirs(root, exist_ok=True)
+        self._pack = open(os.path.join(root, PACK_FILE), "a+b")
+        self._digests = {}      # digest -> chunk id
+        self._offsets = []      # chunk id -> (offset, length) in the pack
+        self._manifests = {}    # name -> (state length, compressed ids)
+        self._read_upto = {INDEX_FILE: 0, MANIFEST_FILE: 0}
+        self._cache = OrderedDict()   # chunk id -> bytes
+        self.cached_bytes = 0
+        self.refresh()
+
+    def __len__(self):
+        return len(self._manifests)
+
+    def __contains__(self, name):
+        return name in self._manifests or (self.refresh() and name in self._manifests)
+
+    def names(self):
+        return sorted(self._manifests)
+
+    # --- LOADING THE INDEX ---
+    def refresh(self):
+        """Reads index and manifest records appended since the last call. True if there were any."""
+        records = self._read_new(INDEX_FILE, INDEX_RECORD.itemsize)
+        for digest, offset, length in np.frombuffer(records, dtype=INDEX_RECORD).tolist():
+            self._digests[digest] = len(self._offsets)
+            self._offsets.append((offset, length))
+
+        data = self._read_new(MANIFEST_FILE, 0)
+        pos = 0
+        while pos + MANIFEST_HEADER.size <= len(data):
+            name_len, state_len, ids_len = MANIFEST_HEADER.unpack_from(data, pos)
+            end = pos + MANIFEST_HEADER.size + name_len + ids_len
+            if end > len(data):
+                break
+            name = data[pos + MANIFEST_HEADER.size:pos + MANIFEST_HEADER.size + name_len].decode("utf-8")
+            self._manifests[name] = (state_len, data[end - ids_len:end])
+            pos = end
+        self._read_upto[MANIFEST_FILE] -= len(data) - pos   # Unfinished tail: reread next time
+        return bool(records) or pos > 0
+
+    def _read_new(self, filename, record_size):
+        """Bytes appended to filename since the last read (whole records only if record_size)."""
+        path = os.path.join(self.root, filename)
+        if not os.path.exists(path):
+            return b""
+        with open(path, "rb") as f:
+            f.seek(self._read_upto[filename])
+            data = f.read()
+        if record_size:
+            data = data[:len(data) - len(data) % record_size]
+        self._read_upto[filename] += len(data)
+        return data
+
+    # --- WRITING ---
+    def put(self, name, data):
+        """Stores a savestate (bytes) under name, replacing any earlier one. Returns new chunks written."""
+        data = bytes(data)
+        ids, fresh = [], []
+        for start in range(0, len(data), self.chunk_size):
+            chunk = data[start:start + self.chunk_size]
+            digest = hashlib.blake2b(chunk, digest_size=16).digest()
+            chunk_id = self._digests.get(digest)
+            if chunk_id is None:
+                chunk_id = self._append_chunk(digest, chunk)
+                fresh.append((digest,) + self._offsets[chunk_id])
+            ids.append(chunk_id)
+
+        # Chunks reach the disk before the manifest that points at them
+        self._pack.flush()
+        if fresh:
+            self._append(INDEX_FILE, np.array(fresh, dtype=INDEX_RECORD).tobytes())
+
+        name_bytes = name.encode("utf-8")
+        packed_ids = zlib.compress(np.array(ids, dtype="<u4").tobytes(), COMPRESS_LEVEL)
+        self._append(MANIFEST_FILE, MANIFEST_HEADER.pack(len(name_bytes), len(data), len(packed_ids))
+                     + name_bytes + packed_ids)
+        self._manifests[name] = (len(data), packed_ids)
+        return len(fresh)
+
+    def _append(self, filename, data):
+        with open(os.path.join(self.root, filename), "ab") as f:
+            if f.tell() != self._read_upto[filename]:
+                f.truncate(self._read_upto[filename])   # Torn record from a crashed writer
+            f.write(data)
+        self._read_upto[filename] += len(data)
+
+    def _append_chunk(self, digest, chunk):
+        self._pack.seek(0, os.SEEK_END)
+        offset = self._pack.tell()
+        blob = zlib.compress(chunk, COMPRESS_LEVEL)
+        self._pack.write(blob)
+        chunk_id = len(self._offsets)
+        self._digests[digest] = chunk_id
+        self._offsets.append((offset, len(blob)))
+        self._remember(chunk_id, chunk)
+        return chunk_id
+
+    def save(self, pyboy, name):
+        buf = io.BytesIO()
+        pyboy.save_state(buf)
+        return self.put(name, buf.getvalue())
+
+    # --- READING ---
+    def get(self, name):
+        """The savestate bytes stored under name (KeyError if there is none)."""
+        if name not in self:
+            raise KeyError(f"no state named {name!r} in {self.root}")
+        state_len, packed_ids = self._manifests[name]
+        ids = np.frombuffer(zlib.decompress(packed_ids), dtype="<u4").tolist()
+        data = b"".join([self._chunk(chunk_id) for chunk_id in ids])
+        if len(data) != state_len:
+            raise ValueError(f"state {name!r} in {self.root} is corrupt ({len(data)} of {state_len} bytes)")
+        return data
+
+    def open(self, name):
+        return io.BytesIO(self.get(name))
+
+    def load(self, pyboy, name):
+        pyboy.load_state(self.open(name))
+
+    def _chunk(self, chunk_id):
+        chunk = self._cache.get(chunk_id)
+        if chunk is not None:
+            self._cache.move_to_end(chunk_id)
+            return chunk
+        offset, length = self._offsets[chunk_id]
+        self._pack.seek(offset)
+        chunk = zlib.decompress(self._pack.read(length))
+        self._remember(chunk_id, chunk)
+        return chunk
+
+    def _remember(self, chunk_id, chunk):
+        self._cache[chunk_id] = chunk
+        self.cached_bytes += len(chunk)
+        while self.cached_bytes > self.cache_bytes and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self.cached_bytes -= len(old)
+
+    # --- FILES ---
+    def import_file(self, path, name=None):
+        """Adds a plain .state file; name defaults to its file name without the extension."""
+        if name is None:
+            name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "rb") as f:
+            self.put(name, f.read())
+        return name
+
+    def export(self, name, path):
+        """Writes a stored state back out as a plain .state file (temp file, then rename)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.get(name))
+        os.replace(tmp, path)
+
+    def stats(self):
+        logical = sum(state_len for state_len, _ in self._manifests.values())
+        stored = sum(os.path.getsize(os.path.join(self.root, f)) for f in (PACK_FILE, INDEX_FILE, MANIFEST_FILE)
+                     if os.path.exists(os.path.join(self.root, f)))
+        return {
+            "states": len(self._manifests),
+            "chunks": len(self._offsets),
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "ratio": logical / stored if stored else 0.0,
+            "cached_bytes": self.cached_bytes,
+        }
+
+    def close(self):
+        self._pack.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import, export and inspect the chunked savestate store.")
+    parser.add_argument("--store", default=STORE_DIR, help="Store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imp = commands.add_parser("import", help="Add .state files")
+    imp.add_argument("paths", nargs="+")
+    exp = commands.add_parser("export", help="Write a stored state as a .state file")
+    exp.add_argument("name")
+    exp.add_argument("path")
+    commands.add_parser("list", help="Stored state names")
+    commands.add_parser("stats", help="Sizes and dedup ratio")
+    args = parser.parse_args()
+
+    store = StateStore(args.store)
+    try:
+        if args.command == "import":
+            for path in args.paths:
+                print(f">> {path} -> {store.import_file(path)}")
+        elif args.command == "export":
+            store.export(args.name, args.path)
+            print(f">> {args.name} -> {args.path}")
+        elif args.command == "list":
+            print("\n".join(store.names()))
+        else:
+            stats = store.stats()
+            print(f"{stats['states']} states, {stats['chunks']} chunks: {stats['logical_bytes'] / 1e6:.1f} MB "
+                  f"stored in {stats['stored_bytes'] / 1e6:.2f} MB ({stats['ratio']:.1f}x)")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Keyframed replay: savestates every N steps plus every action in between,
+so any step of a run can be rebuilt exactly.
+
+    python timeline.py trajectories/<run>.timeline.npz 12345 --out states/step_12345.state
+"""
+import argparse
+import io
+import zlib
+
+import numpy as np
+
+# --- CONFIG ---
+KEYFRAME_EVERY = 100              # Steps between keyframes: worst-case seek replays this many (~0.5 s)
+MEMORY_BUDGET = 256 * 1024 ** 2   # Compressed keyframe bytes kept before thinning them out
+
+
+class Timeline:
+    """
+    Action stream + zlib-compressed in-memory keyframes for one env.
+
+    Keyframe k holds the state after k steps; actions[k] is the button of
+    step k + 1. A reset() in the live run is stored as a reset keyframe
+    for the step it followed, kept apart from that step's own keyframe:
+    seek(k) still rebuilds the state after step k (the wipe, not the
+    restart), and steps after k replay from the sampled start state. If
+    keyframes outgrow the memory budget every other step keyframe is
+    dropped (the interval doubles), trading seek time for memory; reset
+    keyframes are kept, since replaying across a reset can't recreate the
+    sampled start state.
+    """
+
+    def __init__(self, keyframe_every=KEYFRAME_EVERY, memory_budget=MEMORY_BUDGET):
+        self.keyframe_every = keyframe_every
+        self.memory_budget = memory_budget
+        self.actions = bytearray()
+        self.keyframes = {}         # step -> compressed savestate after that step
+        self.reset_keyframes = {}   # step -> compressed start state loaded after that step
+        self.keyframe_bytes = 0
+
+    def keyframe(self, pyboy, step, reset=False):
+        frames = self.reset_keyframes if reset else self.keyframes
+        buf = io.BytesIO()
+        pyboy.save_state(buf)
+        blob = zlib.compress(buf.getvalue(), 1)
+        self.keyframe_bytes += len(blob) - len(frames.get(step, b""))
+        frames[step] = blob
+        if self.keyframe_bytes > self.memory_budget:
+            self._thin()
+
+    def record(self, step, action, pyboy):
+        """Call after step `step` (1-based) finished."""
+        del self.actions[step - 1:]   # Re-recording after a seek overwrites the old future
+        self.actions.append(action)
+        if step % self.keyframe_every == 0:
+            self.keyframe(pyboy, step)
+
+    def _thin(self):
+        self.keyframe_every *= 2
+        steps = sorted(self.keyframes)
+        for step in steps[1:-1]:
+            if step % self.keyframe_every:
+                self.keyframe_bytes -= len(self.keyframes.pop(step))
+
+    @property
+    def steps(self):
+        return len(self.actions)
+
+    def nearest(self, step):
+        """
+        (keyframe step, savestate bytes) to replay step from: the newest
+        keyframe at or before it, or a reset after an earlier step if that
+        is newer (replay can't cross a reset).
+        """
+        starts = [(k, 0) for k in self.keyframes if k <= step] + [(k, 1) for k in self.reset_keyframes if k < step]
+        if not starts:
+            raise ValueError(f"no keyframe at or before step {step}")
+        k, reset = max(starts)
+        return k, zlib.decompress((self.reset_keyframes if reset else self.keyframes)[k])
+
+    def seek(self, env, step):
+        """
+        Puts env (a headless NuzlockeEnv on the same ROM) at the state after
+        `step` steps: loads the nearest keyframe and replays the actions since.
+        """
+        if step > self.steps:
+            raise ValueError(f"step {step} is past the end of the recording ({self.steps})")
+        k, state = self.nearest(step)
+        env.pyboy.load_state(io.BytesIO(state))
+        env.total_steps = k
+        env.events.reset()
+        env.events.sync(env.pyboy)
+        for action in self.actions[k:step]:
+            env.step(action)
+        return env
+
+    # --- PERSISTENCE ---
+    def save(self, path):
+        arrays = {"actions": np.frombuffer(bytes(self.actions), dtype=np.uint8),
+                  "keyframe_every": np.int64(self.keyframe_every)}
+        for prefix, frames in (("key", self.keyframes), ("reset", self.reset_keyframes)):
+            steps = np.array(sorted(frames), dtype=np.int64)
+            blobs = [frames[s] for s in steps]
+            arrays[f"{prefix}_steps"] = steps
+            arrays[f"{prefix}_offsets"] = np.cumsum([0] + [len(b) for b in blobs]).astype(np.int64)
+            arrays[f"{prefix}_data"] = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            timeline = cls(int(data["keyframe_every"]))
+            timeline.actions = bytearray(data["actions"].tobytes())
+            for prefix, frames in (("key", timeline.keyframes), ("reset", timeline.reset_keyframes)):
+                if f"{prefix}_data" not in data.files:
+                    continue
+                offsets, blob = data[f"{prefix}_offsets"], data[f"{prefix}_data"].tobytes()
+                for i, step in enumerate(data[f"{prefix}_steps"]):
+                    frames[int(step)] = blob[offsets[i]:offsets[i + 1]]
+            if "reset_steps" in data.files and "reset_data" not in data.files:
+                # Older files stored a reset in place of its step's keyframe
+                for step in data["reset_steps"].tolist():
+                    timeline.reset_keyframes[step] = timeline.keyframes.pop(step)
+        timeline.keyframe_bytes = sum(len(b) for frames in (timeline.keyframes, timeline.reset_keyframes)
+                                      for b in frames.values())
+        return timeline
+
+
+def main():
+    from nuzlocke_env import NuzlockeEnv
+    parser = argparse.ArgumentParser(description="Rebuild one step of a recorded run as a savestate.")
+    parser.add_argument("timeline", help="*.timeline.npz saved by the stream")
+    parser.add_argument("step", type=int)
+    parser.add_argument("--out", required=True, help="Savestate file to write")
+    parser.add_argument("--rom", default="PokemonRed.gb")
+    parser.add_argument("--state", default="states/outside.state", help="Any state (only used to boot the env)")
+    args = parser.parse_args()
+
+    timeline = Timeline.load(args.timeline)
+    env = NuzlockeEnv(args.rom, args.state, headless=True)
+    timeline.seek(env, args.step)
+    with open(args.out, "wb") as f:
+        env.pyboy.save_state(f)
+    env.close()
+    print(f"step {args.step} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,66 @@
-﻿import os
+﻿import multiprocessing as mp
+import os
 import sys
-from stable_baselines3 import PPO
-from nuzlocke_env import NuzlockeEnv
+from checkpoints import CheckpointWriter
+from frame_ring import MosaicBoard
+from learner import load_or_create
+from perf import PERF
+from policy_runtime import POLICY_EXPORT_PATH
+from vec_env import NuzlockeVecEnv
+
+# --- CONFIG ---
+NUM_ENVS = os.cpu_count()   # One headless PyBoy per core
+ROLLOUT_STEPS = 2048        # Total env steps per brain update (split across workers)
+PERF_EXPORT_PATH = "models/perf.csv"   # One row per phase per block (.prom = Prometheus text)
+TRAJECTORY_DIR = "trajectories"        # One run of chunk files per worker (see trajectory.py)
+EPISODE_STEPS = 4096        # Per-worker step budget; a wipe ends an episode sooner
+GO_EXPLORE = True           # Restart finished episodes from each worker's frontier cells (see go_explore.py)
+MOSAIC = "--mosaic" in sys.argv        # Opt-in window with every worker's screen (see gui_stream.run_mosaic)
 
 if __name__ == "__main__":
     if sys.platform == "win32":
         os.system('mode con: cols=120 lines=30')
 
-    env = NuzlockeEnv("PokemonRed.gb", "states/outside.state")
-    model = PPO('MlpPolicy', env, verbose=0)
+    board = display = None
+    if MOSAIC:
+        from gui_stream import run_mosaic
+        board = MosaicBoard(NUM_ENVS, create=True)
+        display = mp.get_context("spawn").Process(target=run_mosaic, args=(board.name,), daemon=True)
+        display.start()
+
+    env = NuzlockeVecEnv("PokemonRed.gb", n_envs=NUM_ENVS, trajectory_dir=TRAJECTORY_DIR,
+                         max_episode_steps=EPISODE_STEPS, go_explore=GO_EXPLORE,
+                         mosaic=board.name if board else None)
+    model, _ = load_or_create(env, n_steps=max(1, ROLLOUT_STEPS // NUM_ENVS))
+    checkpoints = CheckpointWriter(export_path=POLICY_EXPORT_PATH)   # gui_stream acts on the export until its learner catches up
+    best_badges = 0
+    t_learn, t_save = PERF.phase("learn"), PERF.phase("save")
 
     try:
-        print("SYSTEM ONLINE. BROADCAST ACTIVE.")
-        while True:
+        print(f"SYSTEM ONLINE. BROADCAST ACTIVE. ({NUM_ENVS} workers)")
+        while board is None or not board.stopped:   # Closing the mosaic window ends the run
             # Learning in blocks of 2048 steps
-            model.learn(total_timesteps=2048, reset_num_timesteps=False)
-            
+            with t_learn:
+                model.learn(total_timesteps=ROLLOUT_STEPS, reset_num_timesteps=False)
+
             # Update the HUD counter after the block finishes
-            env.trigger_brain_review()
-            model.save("models/PPO/nuzlocke_live")
-            
+            env.env_method("trigger_brain_review")
+            with t_save:
+                checkpoints.save(model)
+            PERF.export(PERF_EXPORT_PATH)
+
+            badges = max(env.get_attr("badges"))
+            if badges > best_badges:
+                best_badges = badges
+                checkpoints.milestone(model, f"badge_{badges}")
+
     except KeyboardInterrupt:
-        env.close()
\ No newline at end of file
+        pass
+
+    checkpoints.save(model)
+    checkpoints.close()
+    env.close()
+    if board is not None:
+        board.request_stop()
+        display.join(timeout=5)
+        board.close()
@@ -0,0 +1,153 @@
+import glob
+import os
+import time
+
+import numpy as np
+
+from ram_snapshot import (WRAM_START, PARTY_SIZE, PARTY_MON_BYTES, MEM_PARTY_COUNT, MEM_PARTY_MONS,
+                          MEM_MAP_ID, MEM_X_COORD, MEM_Y_COORD)
+
+# --- CONFIG ---
+RING_STEPS = 4096      # In-memory history (also what the GUI log reads from)
+FLUSH_EVERY = 1024     # Steps between copies from the ring to the chunk file
+CHUNK_STEPS = 1 << 20  # Steps per memory-mapped chunk file (~35 MB)
+
+BUTTONS = ['UP', 'DOWN', 'LEFT', 'RIGHT', 'A', 'B', 'START', 'SELECT']
+
+# One fixed-width record per agent step. step 0 never occurs (steps count
+# from 1), so all-zero rows mark the unused tail of a chunk. HP stays
+# big-endian like the game stores it, so RAM bytes copy straight in.
+STEP_DTYPE = np.dtype([
+    ("step", "<u8"),
+    ("action", "u1"),
+    ("map_id", "u1"),
+    ("x", "u1"),
+    ("y", "u1"),
+    ("party_count", "u1"),
+    ("level", "u1", (PARTY_SIZE,)),
+    ("hp", ">u2", (PARTY_SIZE,)),
+    ("reward", "<f4"),
+])
+
+
+def _ram_layout():
+    """(record byte offsets, WRAM buffer indexes) for every field copied from RAM."""
+    fields = STEP_DTYPE.fields
+    cols, addrs = [], []
+    for name, addr in [("map_id", MEM_MAP_ID), ("x", MEM_X_COORD), ("y", MEM_Y_COORD),
+                       ("party_count", MEM_PARTY_COUNT)]:
+        cols.append(fields[name][1])
+        addrs.append(addr)
+    for i in range(PARTY_SIZE):
+        base = MEM_PARTY_MONS + i * PARTY_MON_BYTES
+        cols.append(fields["level"][1] + i)
+        addrs.append(base + 0x21)
+        cols += [fields["hp"][1] + 2 * i, fields["hp"][1] + 2 * i + 1]
+        addrs += [base + 0x01, base + 0x02]
+    return np.array(cols, dtype=np.intp), np.array(addrs, dtype=np.intp) - WRAM_START
+
+
+class TrajectoryRecorder:
+    """
+    Per-step telemetry in a NumPy record ring, streamed to .npy chunk files.
+
+    append() is one byte gather from the RamSnapshot buffer into a
+    preallocated row plus three scalar stores - no strings, no Python
+    objects per step. Every FLUSH_EVERY steps the new rows are copied in
+    one slice into the current memory-mapped chunk, so a run of millions
+    of steps costs ~35 bytes a step on disk and nothing extra in RAM.
+    With directory=None only the ring is kept.
+    """
+
+    def __init__(self, directory=None, capacity=RING_STEPS, flush_every=FLUSH_EVERY, chunk_steps=CHUNK_STEPS):
+        assert capacity >= flush_every
+        self.ring = np.zeros(capacity, dtype=STEP_DTYPE)
+        self.count = 0
+        self._raw = self.ring.view(np.uint8).reshape(capacity, STEP_DTYPE.itemsize)
+        self._cols, self._src = _ram_layout()
+        self._steps, self._actions, self._rewards = self.ring["step"], self.ring["action"], self.ring["reward"]
+        self.directory = directory
+        self.flush_every = flush_every
+        self.chunk_steps = chunk_steps
+        self.run = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._flushed = 0
+        self._chunk = None
+        self._chunk_index = -1
+        self._chunk_fill = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def append(self, step, action, ram, reward=0.0):
+        """Records one step from the env's RamSnapshot (after it was refreshed)."""
+        i = self.count % len(self.ring)
+        self._raw[i, self._cols] = ram.buf[self._src]
+        self._steps[i] = step
+        self._actions[i] = action
+        self._rewards[i] = reward
+        self.count += 1
+        if self.directory and self.count - self._flushed >= self.flush_every:
+            self.flush()
+
+    def recent(self, n):
+        """Last n records, oldest first (a copy)."""
+        n = min(n, self.count, len(self.ring))
+        idx = np.arange(self.count - n, self.count) % len(self.ring)
+        return self.ring[idx]
+
+    def flush(self):
+        """Copies every not-yet-written row into the chunk files."""
+        if not self.directory:
+            return
+        start = max(self._flushed, self.count - len(self.ring))  # Anything older was overwritten
+        while start < self.count:
+            if self._chunk is None or self._chunk_fill == self.chunk_steps:
+                self._open_chunk()
+            n = min(self.count - start, self.chunk_steps - self._chunk_fill)
+            idx = np.arange(start, start + n) % len(self.ring)
+            self._chunk[self._chunk_fill:self._chunk_fill + n] = self.ring[idx]
+            self._chunk_fill += n
+            start += n
+        if self._chunk is not None:   # Nothing recorded yet, or already closed
+            self._chunk.flush()
+        self._flushed = self.count
+
+    def _open_chunk(self):
+        if self._chunk is not None:
+            self._chunk.flush()
+        self._chunk_index += 1
+        path = os.path.join(self.directory, f"{self.run}_{self._chunk_index:06d}.npy")
+        self._chunk = np.lib.format.open_memmap(path, mode="w+", dtype=STEP_DTYPE, shape=(self.chunk_steps,))
+        self._chunk_fill = 0
+
+    def close(self):
+        self.flush()
+        self._chunk = None
+
+
+def format_record(record):
+    """The GUI log line for one step."""
+    return f"{record['step']} | M{record['map_id']} | ({record['x']},{record['y']}) | {BUTTONS[record['action']]}"
+
+
+def list_runs(directory):
+    return sorted({os.path.basename(p).rsplit("_", 1)[0] for p in glob.glob(os.path.join(directory, "*_*.npy"))})
+
+
+def load_trajectory(directory, run=None):
+    """
+    Yields the records of a run (the newest if run is None) one chunk at a
+    time, as read-only memmap views: nothing is copied into memory, so
+    runs of any length can be scanned chunk by chunk.
+    """
+    if run is None:
+        runs = list_runs(directory)
+        if not runs:
+            return
+        run = runs[-1]
+    for path in sorted(glob.glob(os.path.join(directory, f"{run}_*.npy"))):
+        chunk = np.load(path, mmap_mode="r")
+        steps = chunk["step"]
+        # Chunks are preallocated and filled front to back: unwritten rows (step 0) are a tail
+        filled = len(chunk) if steps[-1] != 0 else int(np.argmax(steps == 0))
+        if filled:
+            yield chunk[:filled]
@@ -0,0 +1,247 @@
+import os
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+
+from frame_ring import MosaicBoard
+from go_explore import CellArchive
+from nuzlocke_env import NuzlockeEnv
+from observation import copy_obs
+from ram_snapshot import WRAM_START, WRAM_END
+from rewards import RewardEngine
+from state_cache import STATES_DIR, default_start_weights
+
+# --- CONFIG ---
+ROM_PATH = "PokemonRed.gb"
+
+
+# Each worker's RamSnapshot buffer and new-tile flag ride along in the shared block for the batched rewards
+WRAM_FIELD = ("__wram__", (WRAM_END - WRAM_START,), np.uint8)
+NOVEL_FIELD = ("__novel__", (), np.bool_)
+
+
+def _obs_fields(observation_space):
+    """(key, shape, dtype) for each array in an observation (key None = plain Box)."""
+    if isinstance(observation_space, spaces.Dict):
+        return [(key, sub.shape, sub.dtype) for key, sub in observation_space.spaces.items()]
+    return [(None, observation_space.shape, observation_space.dtype)]
+
+
+def _shared_fields(observation_space):
+    return _obs_fields(observation_space) + [WRAM_FIELD, NOVEL_FIELD]
+
+
+def _field_offsets(fields, n_envs):
+    """Byte offset of each field in the shared block (8-byte aligned) and the total size."""
+    offsets, offset = [], 0
+    for _, shape, dtype in fields:
+        offsets.append(offset)
+        offset += n_envs * int(np.prod(shape)) * np.dtype(dtype).itemsize
+        offset = (offset + 7) & ~7
+    return offsets, max(offset, 8)
+
+
+def _obs_views(buf, fields, n_envs):
+    """Carves one (n_envs, *shape) array per field out of the shared block."""
+    offsets, _ = _field_offsets(fields, n_envs)
+    return {key: np.ndarray((n_envs,) + tuple(shape), dtype=dtype, buffer=buf, offset=offset)
+            for (key, shape, dtype), offset in zip(fields, offsets)}
+
+
+def _write_obs(views, slot, obs):
+    if None in views:
+        views[None][slot] = obs
+    else:
+        for key, view in views.items():
+            view[slot] = obs[key]
+
+
+def _read_obs(views):
+    if None in views:
+        return views[None].copy()
+    return {key: view.copy() for key, view in views.items()}
+
+
+def _publish(board, slot, env, hud_state, hud_pacer):
+    """Mosaic tile (skipped if the frame didn't change), plus the HUD if this worker is promoted."""
+    board.write_tile(slot, env.screen_buffer())
+    if board.selected == slot and hud_pacer.due(env.total_steps):
+        board.write_hud(dict(hud_state(env, f"WORKER {slot}"), worker=slot))
+
+
+def _worker(remote, parent_remote, slot, n_envs, rom_path, state_path, env_kwargs, mosaic=None, go_explore=False):
+    parent_remote.close()
+    archive = CellArchive() if go_explore else None
+    env = NuzlockeEnv(rom_path, state_path, headless=True, compute_reward=False, archive=archive, **env_kwargs)
+    remote.send((env.observation_space, env.action_space))
+    board = MosaicBoard(name=mosaic) if mosaic else None
+    if board is not None:
+        from gui_stream import HudPacer, hud_state   # pygame comes with it; only in mosaic mode
+        hud_pacer = HudPacer()
+
+    # Parent allocates the shared block once it knows the spaces
+    shm_name = remote.recv()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views = _obs_views(shm.buf, _shared_fields(env.observation_space), n_envs)
+    wram = views.pop(WRAM_FIELD[0])
+    novel = views.pop(NOVEL_FIELD[0])
+
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                obs, reward, terminated, truncated, info = env.step(data)
+                wram[slot] = env.ram.buf   # Before any reset: the parent scores this step
+                novel[slot] = env.novel_tile[0]
+                done = terminated or truncated
+                info["TimeLimit.truncated"] = truncated and not terminated
+                if done:
+                    info["terminal_observation"] = copy_obs(obs)   # reset() reuses the obs arrays
+                    obs, _ = env.reset()
+                _write_obs(views, slot, obs)
+                if board is not None:
+                    _publish(board, slot, env, hud_state, hud_pacer)
+                remote.send((reward, done, info))
+            elif cmd == "reset":
+                seed, options = data
+                obs, info = env.reset(seed=seed, options=options)
+                _write_obs(views, slot, obs)
+                if board is not None:
+                    _publish(board, slot, env, hud_state, hud_pacer)
+                remote.send(info)
+            elif cmd == "env_method":
+                name, args, kwargs = data
+                remote.send(getattr(env, name)(*args, **kwargs))
+            elif cmd == "get_attr":
+                remote.send(getattr(env, data))
+            elif cmd == "set_attr":
+                setattr(env, data[0], data[1])
+                remote.send(None)
+            elif cmd == "close":
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del views, wram, novel
+        shm.close()
+        if board is not None:
+            board.close()
+        env.close()
+        remote.close()
+
+
+class NuzlockeVecEnv(VecEnv):
+    """
+    Runs n_envs headless NuzlockeEnv workers, one process (and PyBoy) each.
+
+    Observations are written by the workers straight into one shared-memory
+    block laid out as (n_envs, *obs_shape) per field, so a step costs a small
+    pipe message per worker (reward/done/info) instead of a pickled array.
+    Each worker's WRAM snapshot goes into the same block, and rewards for
+    all of them come from one RewardEngine call here (see rewards.py).
+    Worker i starts from state_paths[i % len(state_paths)]; without
+    state_paths every worker samples each reset from all of states/,
+    weighted by state_cache.DEFAULT_WEIGHTS. With go_explore every worker
+    keeps its own CellArchive and restarts finished episodes from it (pass
+    max_episode_steps so episodes finish without a wipe). With mosaic (a
+    MosaicBoard name) a worker also publishes its screen to tile i every step.
+    """
+
+    def __init__(self, rom_path=ROM_PATH, n_envs=None, state_paths=None,
+                 start_method=None, mosaic=None, go_explore=False, **env_kwargs):
+        n_envs = n_envs or os.cpu_count()
+        state_paths = state_paths or [default_start_weights()]
+        if not state_paths[0]:
+            raise FileNotFoundError(f"No .state files found in '{STATES_DIR}'")
+
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        self.waiting = False
+        self.closed = False
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(n_envs)])
+        self.processes = []
+        for slot, (work_remote, remote) in enumerate(zip(self.work_remotes, self.remotes)):
+            args = (work_remote, remote, slot, n_envs, rom_path,
+                    state_paths[slot % len(state_paths)], env_kwargs, mosaic, go_explore)
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        observation_space, action_space = self.remotes[0].recv()
+        for remote in self.remotes[1:]:
+            remote.recv()
+
+        # --- SHARED OBSERVATION BLOCK ---
+        fields = _shared_fields(observation_space)
+        _, size = _field_offsets(fields, n_envs)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._obs = _obs_views(self._shm.buf, fields, n_envs)
+        self._wram = self._obs.pop(WRAM_FIELD[0])
+        self._novel = self._obs.pop(NOVEL_FIELD[0])
+        self.rewards = RewardEngine(n_envs)
+        for remote in self.remotes:
+            remote.send(self._shm.name)
+
+        super().__init__(n_envs, observation_space, action_space)
+
+    def reset(self):
+        for i, remote in enumerate(self.remotes):
+            remote.send(("reset", (self._seeds[i], self._options[i])))
+        self.reset_infos = [remote.recv() for remote in self.remotes]
+        self.rewards.reset()
+        self._reset_seeds()
+        self._reset_options()
+        return _read_obs(self._obs)
+
+    def step_async(self, actions):
+        for remote, action in zip(self.remotes, actions):
+            remote.send(("step", int(action)))
+        self.waiting = True
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        _, dones, infos = zip(*results)
+        dones = np.array(dones)
+        rewards = self.rewards.step(self._wram, dones, self._novel)
+        # Copy out: SB3 keeps the previous obs around while the workers write the next one
+        return _read_obs(self._obs), rewards, dones, list(infos)
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self._obs = self._wram = self._novel = None
+        self._shm.close()
+        self._shm.unlink()
+        self.closed = True
+
+    def _call(self, cmd, data, indices):
+        targets = [self.remotes[i] for i in self._get_indices(indices)]
+        for remote in targets:
+            remote.send((cmd, data))
+        return [remote.recv() for remote in targets]
+
+    def get_attr(self, attr_name, indices=None):
+        return self._call("get_attr", attr_name, indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._call("set_attr", (attr_name, value), indices)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return self._call("env_method", (method_name, method_args, method_kwargs), indices)
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]